@@ -5,6 +5,8 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.db.base import Base
+from app.db.search import DATABASE_MANAGED_OBJECTS
+from app.db.partitions import PARTITION_NAME_PATTERN
 from app.core.config import settings
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -22,6 +24,17 @@ if config.config_file_name is not None:
 config.set_main_option("sqlalchemy.url", settings.SQLALCHEMY_DATABASE_URI)
 target_metadata = Base.metadata
 
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # search columns/indexes and order partitions are managed in raw DDL,
+    # see app/db/search.py and app/db/partitions.py
+    if reflected and compare_to is None and name in DATABASE_MANAGED_OBJECTS:
+        return False
+    if reflected and compare_to is None and type_ == "table" and PARTITION_NAME_PATTERN.match(name):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +57,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -67,14 +81,13 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
             context.run_migrations()
 
-    print("检测到的表:", [table.name for table in Base.metadata.sorted_tables])
-
 if context.is_offline_mode():
     run_migrations_offline()
 else:
@@ -0,0 +1,34 @@
+"""add sync_checkpoints
+
+Revision ID: 0c4e9a7b3d58
+Revises: f18b2d6e4a93
+Create Date: 2026-10-19 18:10:27.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c4e9a7b3d58'
+down_revision: Union[str, None] = 'f18b2d6e4a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'sync_checkpoints',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('position', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sync_checkpoints')
@@ -0,0 +1,58 @@
+"""add print_batches
+
+Revision ID: 7e2c4a9d1f36
+Revises: 0c4e9a7b3d58
+Create Date: 2026-10-19 19:02:41.318562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2c4a9d1f36'
+down_revision: Union[str, None] = '0c4e9a7b3d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# orders_archive mirrors the orders columns
+TABLES = ('orders', 'orders_archive')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'print_batches',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('printer', sa.String(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('paper_size', sa.String(), nullable=False),
+        sa.Column('color_mode', sa.String(), nullable=False),
+        sa.Column('sides', sa.String(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('impressions', sa.Integer(), nullable=False),
+        sa.Column('duration_seconds', sa.Integer(), nullable=False),
+        sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_print_batches_printer_status_position', 'print_batches', ['printer', 'status', 'position'], unique=False
+    )
+    for table in TABLES:
+        op.add_column(table, sa.Column('print_batch_id', sa.String(), nullable=True))
+    op.create_index('ix_orders_print_batch_id', 'orders', ['print_batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_print_batch_id', table_name='orders')
+    for table in TABLES:
+        op.drop_column(table, 'print_batch_id')
+    op.drop_index('ix_print_batches_printer_status_position', table_name='print_batches')
+    op.drop_table('print_batches')
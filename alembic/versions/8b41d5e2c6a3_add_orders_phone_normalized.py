@@ -0,0 +1,76 @@
+"""add orders phone_normalized
+
+Revision ID: 8b41d5e2c6a3
+Revises: 3f2a9c1d7e10
+Create Date: 2026-10-19 10:03:17.552910
+
+"""
+import re
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d5e2c6a3'
+down_revision: Union[str, None] = '3f2a9c1d7e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+# frozen copy of app.core.phone.normalize_phone as of this revision, so later changes to it don't change the backfill
+def normalize_phone(phone: Optional[str], country_code: str = "61") -> Optional[str]:
+    if not phone:
+        return None
+    phone = phone.strip()
+    digits = re.sub(r"\D", "", phone)
+    if not digits:
+        return None
+
+    if phone.startswith("+"):
+        return f"+{digits}"
+    if digits.startswith("00"):
+        return f"+{digits[2:]}"
+    if digits.startswith("0"):
+        return f"+{country_code}{digits[1:]}"
+    if digits.startswith(country_code) and len(digits) > 9:
+        return f"+{digits}"
+    return f"+{country_code}{digits}"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('phone_normalized', sa.String(), nullable=True))
+
+    # backfill in keyset batches so large tables are not loaded at once
+    orders = sa.table('orders', sa.column('id', sa.String), sa.column('phone', sa.String), sa.column('phone_normalized', sa.String))
+    bind = op.get_bind()
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(orders.c.id, orders.c.phone)
+            .where(orders.c.id > last_id, orders.c.phone.isnot(None))
+            .order_by(orders.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            orders.update().where(orders.c.id == sa.bindparam('_id')).values(phone_normalized=sa.bindparam('_phone')),
+            [{'_id': row.id, '_phone': normalize_phone(row.phone)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+    op.create_index(
+        'ix_orders_phone_normalized', 'orders', ['phone_normalized'], unique=False,
+        postgresql_ops={'phone_normalized': 'varchar_pattern_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_phone_normalized', table_name='orders')
+    op.drop_column('orders', 'phone_normalized')
@@ -0,0 +1,41 @@
+"""add order_daily_rollups
+
+Revision ID: a91f4c3d2b77
+Revises: e5d19b6a0f84
+Create Date: 2026-10-19 15:08:30.671942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91f4c3d2b77'
+down_revision: Union[str, None] = 'e5d19b6a0f84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'order_daily_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('color_mode', sa.String(), nullable=False),
+        sa.Column('paper_size', sa.String(), nullable=False),
+        sa.Column('delivery_method', sa.String(), nullable=False),
+        sa.Column('paid_orders', sa.Integer(), nullable=False),
+        sa.Column('paid_pages', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('completed_orders', sa.Integer(), nullable=False),
+        sa.Column('completed_pages', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'color_mode', 'paper_size', 'delivery_method'),
+    )
+    # backfill with: python -m app.jobs.rebuild_rollups
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_daily_rollups')
@@ -0,0 +1,28 @@
+"""add users token_version
+
+Revision ID: b3c8e1f07a26
+Revises: a91f4c3d2b77
+Create Date: 2026-10-19 16:22:09.418733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c8e1f07a26'
+down_revision: Union[str, None] = 'a91f4c3d2b77'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
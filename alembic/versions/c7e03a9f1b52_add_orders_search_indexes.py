@@ -0,0 +1,48 @@
+"""add orders search indexes
+
+Revision ID: c7e03a9f1b52
+Revises: 8b41d5e2c6a3
+Create Date: 2026-10-19 11:26:05.104377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e03a9f1b52'
+down_revision: Union[str, None] = '8b41d5e2c6a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        """
+        ALTER TABLE orders ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(email, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(file_name, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(notes, '')), 'C')
+        ) STORED
+        """
+    )
+    op.execute("CREATE INDEX ix_orders_search_vector ON orders USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_orders_name_trgm ON orders USING gin (name gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_orders_email_trgm ON orders USING gin (email gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_orders_file_name_trgm ON orders USING gin (file_name gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_orders_notes_trgm ON orders USING gin (notes gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_orders_notes_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_orders_file_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_orders_email_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_orders_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_orders_search_vector")
+    op.execute("ALTER TABLE orders DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,139 @@
+"""partition orders by created_at month and add orders_archive
+
+Revision ID: e5d19b6a0f84
+Revises: c7e03a9f1b52
+Create Date: 2026-10-19 13:41:52.906115
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5d19b6a0f84'
+down_revision: Union[str, None] = 'c7e03a9f1b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITION_MONTHS_AHEAD = 3
+
+# search_vector is generated, it is recomputed on insert and must not be copied
+ORDER_COLUMNS = (
+    "id, order_search_id, user_id, username, email, name, phone, phone_normalized, is_guest, "
+    "file_name, file_id, pages, color_mode, sides, paper_size, orientation, pages_per_side, copies, "
+    "amount, status, delivery_method, building, mailbox_number, notes, created_at, updated_at, completed_at"
+)
+
+# index names are schema wide, so they are dropped from the old table before being recreated
+ORDER_INDEXES = {
+    "ix_orders_user_id_created_at": "CREATE INDEX ix_orders_user_id_created_at ON orders (user_id, created_at)",
+    "ix_orders_phone_normalized": "CREATE INDEX ix_orders_phone_normalized ON orders (phone_normalized varchar_pattern_ops)",
+    "ix_orders_search_vector": "CREATE INDEX ix_orders_search_vector ON orders USING gin (search_vector)",
+    "ix_orders_name_trgm": "CREATE INDEX ix_orders_name_trgm ON orders USING gin (name gin_trgm_ops)",
+    "ix_orders_email_trgm": "CREATE INDEX ix_orders_email_trgm ON orders USING gin (email gin_trgm_ops)",
+    "ix_orders_file_name_trgm": "CREATE INDEX ix_orders_file_name_trgm ON orders USING gin (file_name gin_trgm_ops)",
+    "ix_orders_notes_trgm": "CREATE INDEX ix_orders_notes_trgm ON orders USING gin (notes gin_trgm_ops)",
+    "ix_orders_order_search_id": "CREATE INDEX ix_orders_order_search_id ON orders (order_search_id)",
+    "ix_orders_status_created_at": "CREATE INDEX ix_orders_status_created_at ON orders (status, created_at)",
+}
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    op.execute("UPDATE orders SET created_at = now() WHERE created_at IS NULL")
+    op.execute("ALTER TABLE orders RENAME TO orders_legacy")
+    op.execute("ALTER TABLE orders_legacy RENAME CONSTRAINT orders_pkey TO orders_legacy_pkey")
+    for name in ORDER_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute(
+        "CREATE TABLE orders (LIKE orders_legacy INCLUDING DEFAULTS INCLUDING GENERATED) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER TABLE orders ALTER COLUMN created_at SET NOT NULL")
+    # the partition key has to be part of every unique constraint
+    op.execute("ALTER TABLE orders ADD CONSTRAINT orders_pkey PRIMARY KEY (id, created_at)")
+    op.execute("ALTER TABLE orders ADD CONSTRAINT orders_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)")
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM orders_legacy")).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = (oldest.date().replace(day=1) if oldest else current)
+    last = current
+    for _ in range(PARTITION_MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        end = _next_month(month)
+        op.execute(
+            f"CREATE TABLE orders_{month:%Y_%m} PARTITION OF orders "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{end} 00:00:00+00')"
+        )
+        month = end
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+
+    op.execute(f"INSERT INTO orders ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM orders_legacy")
+    for statement in ORDER_INDEXES.values():
+        op.execute(statement)
+    op.execute("DROP TABLE orders_legacy")
+
+    op.create_table(
+        'orders_archive',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('order_search_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('phone_normalized', sa.String(), nullable=True),
+        sa.Column('is_guest', sa.Boolean(), nullable=True),
+        sa.Column('file_name', sa.String(), nullable=False),
+        sa.Column('file_id', sa.String(), nullable=False),
+        sa.Column('pages', sa.Integer(), nullable=False),
+        sa.Column('color_mode', sa.String(), nullable=False),
+        sa.Column('sides', sa.String(), nullable=False),
+        sa.Column('paper_size', sa.String(), nullable=False),
+        sa.Column('orientation', sa.String(), nullable=False),
+        sa.Column('pages_per_side', sa.Integer(), nullable=True),
+        sa.Column('copies', sa.Integer(), nullable=True),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('delivery_method', sa.String(), nullable=True),
+        sa.Column('building', sa.String(), nullable=True),
+        sa.Column('mailbox_number', sa.String(), nullable=True),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_orders_archive_order_search_id', 'orders_archive', ['order_search_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_archive_order_search_id', table_name='orders_archive')
+    op.drop_table('orders_archive')
+
+    op.execute("ALTER TABLE orders RENAME TO orders_partitioned")
+    op.execute("ALTER TABLE orders_partitioned RENAME CONSTRAINT orders_pkey TO orders_partitioned_pkey")
+    for name in ORDER_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("CREATE TABLE orders (LIKE orders_partitioned INCLUDING DEFAULTS INCLUDING GENERATED)")
+    op.execute("ALTER TABLE orders ADD CONSTRAINT orders_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE orders ALTER COLUMN created_at DROP NOT NULL")
+    op.execute("ALTER TABLE orders ADD CONSTRAINT orders_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)")
+    op.execute(f"INSERT INTO orders ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM orders_partitioned")
+    for name, statement in ORDER_INDEXES.items():
+        if name not in ("ix_orders_order_search_id", "ix_orders_status_created_at"):
+            op.execute(statement)
+    op.execute("DROP TABLE orders_partitioned")
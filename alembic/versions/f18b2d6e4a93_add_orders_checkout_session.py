@@ -0,0 +1,37 @@
+"""add orders checkout session
+
+Revision ID: f18b2d6e4a93
+Revises: d62a7f0c9e15
+Create Date: 2026-10-19 17:48:12.650214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f18b2d6e4a93'
+down_revision: Union[str, None] = 'd62a7f0c9e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# orders_archive mirrors the orders columns
+TABLES = ('orders', 'orders_archive')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('checkout_session_id', sa.String(), nullable=True))
+        op.add_column(table, sa.Column('checkout_session_url', sa.String(), nullable=True))
+        op.add_column(table, sa.Column('checkout_session_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_column(table, 'checkout_session_expires_at')
+        op.drop_column(table, 'checkout_session_url')
+        op.drop_column(table, 'checkout_session_id')
@@ -25,6 +25,12 @@ class Settings(BaseSettings):
     # Security Configuration
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 1 day
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+    # bcrypt cost; existing hashes are upgraded on the next successful login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
     
     # Database Configuration
     POSTGRES_USER: str
@@ -34,15 +40,130 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_URL: str
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    # comma separated read replica URLs, empty means every read goes to the primary
+    SQLALCHEMY_REPLICA_URIS_RAW: str = ""
+    SQLALCHEMY_REPLICA_URIS: list[str] = []
+    REPLICA_RETRY_SECONDS: int = 30
+    
+    # Connection Pool Configuration (per engine, per worker process)
+    # "queue" keeps a local pool, "null" opens a connection per checkout for PgBouncer transaction pooling;
+    # "null" requires ORDER_EVENTS_LISTEN_URL, LISTEN never receives notifications through a transaction pooler
+    DB_POOL_MODE: Literal["queue", "null"] = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables
+    # ping on every checkout; with a recycle shorter than the server idle timeout it can usually be off
+    DB_POOL_PRE_PING: bool = True
     
     # Stripe Configuration
     STRIPE_SECRET_KEY: str
     STRIPE_WEBHOOK_SECRET: str
+    # e.g. http://localhost:12111 for stripe-mock or another local fake; unset means api.stripe.com
+    STRIPE_API_BASE: Optional[str] = None
+    STRIPE_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    STRIPE_TIMEOUT_SECONDS: float = 10.0
+    # retried with exponential backoff and jitter; POSTs reuse the same idempotency key
+    STRIPE_MAX_NETWORK_RETRIES: int = 2
+    # Stripe allows 30 minutes to 24 hours; a stored session is reused until shortly before it expires
+    STRIPE_CHECKOUT_EXPIRY_MINUTES: int = 60
+    STRIPE_CHECKOUT_REUSE_MARGIN_MINUTES: int = 5
+    # first reconciliation run (no stored high-water mark) looks back this far
+    PAYMENT_RECONCILE_LOOKBACK_HOURS: int = 48
+    # webhook events are stored and applied in the background
+    STRIPE_EVENT_BATCH_SIZE: int = 50
+    STRIPE_EVENT_POLL_SECONDS: float = 5.0
+    # failed events back off exponentially from the base delay, then are dead-lettered
+    STRIPE_EVENT_MAX_ATTEMPTS: int = 8
+    STRIPE_EVENT_RETRY_BASE_SECONDS: float = 30.0
     
     # File Upload Configuration
     UPLOAD_FOLDER: str = "uploads"
     MAX_CONTENT_LENGTH: int = 16 * 1024 * 1024  # 16MB
     
+    # Pricing Configuration
+    # JSON file shaped like DEFAULT_PRICE_TABLE in app/services/pricing_service.py; unset = that table
+    PRICE_TABLE_PATH: Optional[str] = None
+    # what create_order does when the client's page count or amount differs from the uploaded file and server quote;
+    # "off" also skips counting the file's pages
+    PRICE_CHECK_MODE: Literal["enforce", "log", "off"] = "enforce"
+    
+    # Print Scheduling Configuration
+    # printers as "<name>:<pages per minute>:<paper sizes>:<colour modes>", separated by ";"
+    PRINTERS_RAW: str = "printer-1:40:A4,A3:bw,color"
+    # deadline after payment by delivery method; pickup customers are waiting at the counter
+    PRINT_SLA_MINUTES_PICKUP: int = 120
+    PRINT_SLA_MINUTES_DELIVERY: int = 24 * 60
+    # upper bound per batch, so a pile of one media can't hold back urgent work on another
+    PRINT_BATCH_MAX_IMPRESSIONS: int = 1000
+    # time lost swapping paper trays or colour settings between batches
+    PRINT_CHANGEOVER_SECONDS: int = 120
+    
+    # Order Archive Configuration
+    ORDER_RETENTION_DAYS: int = 365
+    ORDER_ARCHIVE_BATCH_SIZE: int = 500
+    ORDER_PARTITION_MONTHS_AHEAD: int = 3
+    
+    # Order Events (SSE) Configuration
+    ORDER_EVENTS_CHANNEL: str = "order_events"
+    # direct postgres URL (bypassing PgBouncer) for the LISTEN connection; unset = SQLALCHEMY_DATABASE_URI
+    ORDER_EVENTS_LISTEN_URL: Optional[str] = None
+    SSE_HEARTBEAT_SECONDS: int = 15
+    SSE_QUEUE_SIZE: int = 16
+    
+    # Rate Limiting Configuration ("<count>/<second|minute|hour|day>")
+    RATE_LIMIT_ENABLED: bool = True
+    # "memory" is per worker process, "redis" is shared by all workers
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    # use CF-Connecting-IP / X-Forwarded-For, only when running behind the tunnel or a proxy
+    RATE_LIMIT_TRUST_PROXY_HEADERS: bool = False
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_UPLOAD_PER_IP: str = "30/minute"
+    RATE_LIMIT_UPLOAD_PER_USER: str = "20/minute"
+    RATE_LIMIT_TRACKING: str = "60/minute"
+    
+    # Logging Configuration
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    # fraction of DEBUG records kept (per-upload / per-payment detail lines)
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1
+    
+    # Metrics Configuration (/metrics, Prometheus text format)
+    METRICS_ENABLED: bool = True
+    # bearer token the scraper must send (Prometheus `authorization: credentials`); unset = /metrics is not served,
+    # since it exposes pool and queue internals
+    METRICS_TOKEN: Optional[str] = None
+    # queries at least this slow are logged, with parameter values redacted
+    SLOW_QUERY_MS: int = 200
+    # the same statement this many times in one request is logged as a possible N+1
+    N_PLUS_ONE_THRESHOLD: int = 10
+    
+    # Readiness Probe Configuration (/health/ready)
+    # probe results are reused for this long, so frequent load balancer checks never add DB load
+    HEALTH_CACHE_SECONDS: float = 2.0
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_MIN_FREE_DISK_MB: int = 512
+    # not ready once this many jobs wait for the password-hash pool or the sync-route threadpool
+    HEALTH_MAX_QUEUE_DEPTH: int = 32
+    
+    # Production Server Configuration (gunicorn.conf.py)
+    SERVER_BIND: str = "0.0.0.0:8000"
+    # 0 = one worker per CPU core
+    SERVER_WORKERS: int = 0
+    # recycle a worker after this many requests (+ random jitter so they don't all restart at once)
+    SERVER_MAX_REQUESTS: int = 2000
+    SERVER_MAX_REQUESTS_JITTER: int = 200
+    SERVER_TIMEOUT_SECONDS: int = 60
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    # after requests have drained: how long background jobs get to finish their current batch
+    SHUTDOWN_JOBS_TIMEOUT_SECONDS: float = 3.0
+    # *.part upload files older than this are leftovers of a killed process, removed at startup
+    UPLOAD_PARTIAL_MAX_AGE_SECONDS: int = 3600
+    # per-process metric files are written here when running several workers
+    SERVER_METRICS_DIR: str = "/tmp/printer-metrics"
+    
     # CORS Configuration
     ALLOWED_ORIGINS_RAW: str = "http://localhost:3000"
     ALLOWED_ORIGINS: list[str] = []
@@ -65,6 +186,9 @@ class Settings(BaseSettings):
                 f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
             )
         
+        if self.SQLALCHEMY_REPLICA_URIS_RAW:
+            self.SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in self.SQLALCHEMY_REPLICA_URIS_RAW.split(",") if uri.strip()]
+        
         # production environment
         if self.ENVIRONMENT == "production":
             self.DEBUG = True # TODO: change to False
@@ -80,10 +204,5 @@ class Settings(BaseSettings):
                 "http://127.0.0.1:3000",
                 "http://localhost:8080"
             ])
-            
-        print(f"🔧 Loading configuration from: {selected_env_file}")
-        print(f"🌍 Environment: {self.ENVIRONMENT}")
-        print(f"🐛 Debug mode: {self.DEBUG}")
-        print(f"🔧 ALLOWED_ORIGINS: {self.ALLOWED_ORIGINS}")
 
 settings = Settings()
\ No newline at end of file
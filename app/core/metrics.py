@@ -0,0 +1,154 @@
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import Header, HTTPException
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# http
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is fully sent", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled", ["method"], multiprocess_mode="livesum"
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size", ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+
+# domain
+UPLOAD_BYTES = Histogram(
+    "upload_bytes", "Size of uploaded documents", ["file_type"],
+    buckets=(100_000, 500_000, 1_000_000, 2_000_000, 5_000_000, 10_000_000, 16_000_000),
+)
+PAGE_COUNT_DURATION = Histogram(
+    "page_count_duration_seconds", "Time spent counting pages of an uploaded document", ["file_type"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+STRIPE_REQUEST_DURATION = Histogram(
+    "stripe_request_duration_seconds", "Stripe API call latency including retries", ["operation", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+FILE_TYPES = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "application/msword": "doc",
+}
+
+
+def file_type_label(content_type: str) -> str:
+    return FILE_TYPES.get(content_type, "other")
+
+
+@contextmanager
+def track_stripe_call(operation: str) -> Iterator[None]:
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        STRIPE_REQUEST_DURATION.labels(operation, outcome).observe(time.perf_counter() - start)
+
+
+class DatabasePoolCollector:
+    # read at scrape time, so the pool costs nothing per request
+    def collect(self):
+        from app.db.pool import pool_stats
+        from app.db.session import engine, replica_engines
+
+        gauges = {
+            name: GaugeMetricFamily(f"db_pool_{name}", help_text, labels=["engine"])
+            for name, help_text in (
+                ("size", "Configured pool size"),
+                ("checked_out", "Connections currently in use"),
+                ("checked_in", "Idle connections in the pool"),
+                ("overflow", "Connections opened beyond the pool size"),
+                ("checkouts", "Connection checkouts since start"),
+                ("timeouts", "Checkouts that timed out waiting for a connection"),
+                ("wait_seconds_total", "Total time spent waiting for a connection"),
+                ("wait_seconds_max", "Longest wait for a connection"),
+            )
+        }
+        engines = [("primary", engine)] + [(f"replica{i}", replica) for i, replica in enumerate(replica_engines)]
+        for label, db_engine in engines:
+            stats = pool_stats(db_engine)
+            for name, gauge in gauges.items():
+                if name in stats:
+                    gauge.add_metric([label], stats[name])
+        return list(gauges.values())
+
+
+REGISTRY.register(DatabasePoolCollector())
+
+
+def require_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+
+
+def metrics_response() -> Response:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # several workers: merge the per-process files, plus this worker's pool gauges
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(DatabasePoolCollector())
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    # pure ASGI: a dict lookup and a few observations per request
+    def __init__(self, app: ASGIApp, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            # the router stores the matched route on the scope; templates keep label cardinality bounded
+            route = scope.get("route")
+            route = getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_RESPONSE_SIZE.labels(method, route).observe(size)
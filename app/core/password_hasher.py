@@ -0,0 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+
+class _LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+
+    def record(self, queued: float, ran: float) -> None:
+        self.count += 1
+        self.run_seconds_total += ran
+        self.run_seconds_max = max(self.run_seconds_max, ran)
+        self.queue_seconds_total += queued
+        self.queue_seconds_max = max(self.queue_seconds_max, queued)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "run_seconds_avg": round(self.run_seconds_total / self.count, 6) if self.count else 0.0,
+            "run_seconds_max": round(self.run_seconds_max, 6),
+            "queue_seconds_avg": round(self.queue_seconds_total / self.count, 6) if self.count else 0.0,
+            "queue_seconds_max": round(self.queue_seconds_max, 6),
+        }
+
+
+class PasswordHasher:
+    # runs bcrypt on its own small thread pool so a login storm cannot starve
+    # Starlette's shared threadpool; beyond workers + queue_size pending jobs,
+    # requests are shed with a 503 instead of piling up
+    def __init__(self, context: CryptContext, workers: int, queue_size: int):
+        self.context = context
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.rejected = 0
+        self._pending = 0  # only touched from the event loop
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        self._stats = {"hash": _LatencyStats(), "verify": _LatencyStats()}
+
+    async def _run(self, operation: str, func: Callable, *args) -> Any:
+        if self._pending >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            return started, func(*args), time.perf_counter()
+
+        try:
+            started, result, finished = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self._pending -= 1
+        self._stats[operation].record(started - submitted, finished - started)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        # the new hash is set when hashed_password used another cost/scheme than the current one
+        return await self._run("verify", self.context.verify_and_update, password, hashed_password)
+
+    @property
+    def queue_depth(self) -> int:
+        # jobs waiting for a free worker thread
+        return max(0, self._pending - self.workers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "pending": self._pending,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected,
+            **{operation: stats.as_dict() for operation, stats in self._stats.items()},
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
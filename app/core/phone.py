@@ -0,0 +1,27 @@
+import re
+from typing import Optional
+
+DEFAULT_COUNTRY_CODE = "61"  # Australia
+
+_non_digits = re.compile(r"\D")
+
+
+def normalize_phone(phone: Optional[str], country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    # best-effort E.164: "0412 345 678", "+61 412 345 678" and "0061412345678" all become "+61412345678"
+    if not phone:
+        return None
+    phone = phone.strip()
+    digits = _non_digits.sub("", phone)
+    if not digits:
+        return None
+
+    if phone.startswith("+"):
+        return f"+{digits}"
+    if digits.startswith("00"):
+        return f"+{digits[2:]}"
+    if digits.startswith("0"):
+        # national number with trunk prefix
+        return f"+{country_code}{digits[1:]}"
+    if digits.startswith(country_code) and len(digits) > 9:
+        return f"+{digits}"
+    return f"+{country_code}{digits}"
@@ -0,0 +1,233 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# (allowed, remaining tokens, seconds until the bucket is full again, seconds until the next token)
+BucketResult = Tuple[bool, int, float, float]
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    # "10/minute" -> 10 requests refilled evenly over 60 seconds
+    count, _, period = rate.partition("/")
+    return int(count), float(PERIODS[period.strip().rstrip("s")])
+
+
+class RateLimitRule:
+    # path_pattern is a regular expression matched against the whole path;
+    # literal parts (dots, the API prefix) need re.escape
+    def __init__(
+        self,
+        name: str,
+        methods: Iterable[str],
+        path_pattern: str,
+        per_ip: Optional[str] = None,
+        per_user: Optional[str] = None,
+    ):
+        self.name = name
+        self.methods = {method.upper() for method in methods}
+        self.path = re.compile(path_pattern)
+        self.per_ip = parse_rate(per_ip) if per_ip else None
+        self.per_user = parse_rate(per_user) if per_user else None
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and self.path.fullmatch(path) is not None
+
+
+class MemoryBucketBackend:
+    # token buckets for a single worker process, bounded LRU
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def consume(self, key: str, capacity: int, period: float) -> BucketResult:
+        refill_per_second = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(capacity), now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, int(tokens), (capacity - tokens) / refill_per_second, (1 - tokens) / refill_per_second
+
+    async def refund(self, key: str, capacity: int, period: float) -> None:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                tokens, updated = bucket
+                self._buckets[key] = (min(capacity, tokens + 1), updated)
+
+
+class RedisBucketBackend:
+    # the same token bucket, kept in Redis so every worker shares it;
+    # `client` is any redis.asyncio-compatible client (fakeredis works for local runs)
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+    REFUND_SCRIPT = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+    if tokens then
+        redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tokens + 1))
+    end
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBucketBackend":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis needs the 'redis' package") from e
+        return cls(redis_asyncio.from_url(url))
+
+    async def consume(self, key: str, capacity: int, period: float) -> BucketResult:
+        refill_per_second = capacity / period
+        allowed, tokens = await self.client.eval(
+            self.SCRIPT, 1, self.prefix + key, capacity, refill_per_second, time.time()
+        )
+        tokens = float(tokens)
+        return bool(allowed), int(tokens), (capacity - tokens) / refill_per_second, (1 - tokens) / refill_per_second
+
+    async def refund(self, key: str, capacity: int, period: float) -> None:
+        await self.client.eval(self.REFUND_SCRIPT, 1, self.prefix + key, capacity)
+
+
+class RateLimitMiddleware:
+    # pure ASGI so unthrottled routes only pay for a method/path check
+    def __init__(self, app: ASGIApp, rules: List[RateLimitRule], backend, trust_proxy_headers: bool = False):
+        self.app = app
+        self.rules = rules
+        self.backend = backend
+        self.trust_proxy_headers = trust_proxy_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rule = next((rule for rule in self.rules if rule.matches(scope["method"], scope["path"])), None)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        checks = []
+        if rule.per_ip:
+            checks.append((f"{rule.name}:ip:{self._client_ip(scope, headers)}", rule.per_ip))
+        username = self._username(headers) if rule.per_user else None
+        if username:
+            checks.append((f"{rule.name}:user:{username}", rule.per_user))
+
+        # the most restrictive bucket decides what the client sees
+        limit, remaining, reset, retry_after, allowed = None, None, 0.0, 0.0, True
+        taken = []
+        for key, (capacity, period) in checks:
+            ok, left, full_in, next_in = await self.backend.consume(key, capacity, period)
+            if remaining is None or left < remaining:
+                limit, remaining, reset = capacity, left, full_in
+            if ok:
+                taken.append((key, capacity, period))
+            else:
+                allowed = False
+                retry_after = max(retry_after, next_in)
+        if not allowed:
+            # a denied request must not use up the other buckets, e.g. a throttled user draining their IP's
+            for key, capacity, period in taken:
+                await self.backend.refund(key, capacity, period)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        rate_headers = {
+            "RateLimit-Limit": str(limit),
+            "RateLimit-Remaining": str(max(remaining, 0)),
+            "RateLimit-Reset": str(math.ceil(reset)),
+        }
+        if not allowed:
+            response = JSONResponse(
+                {"detail": "Too many requests, please slow down"},
+                status_code=429,
+                headers={**rate_headers, "Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (name.lower().encode(), value.encode()) for name, value in rate_headers.items()
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _client_ip(self, scope: Scope, headers: Headers) -> str:
+        if self.trust_proxy_headers:
+            forwarded = headers.get("cf-connecting-ip") or headers.get("x-forwarded-for", "").split(",")[0].strip()
+            if forwarded:
+                return forwarded
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _username(self, headers: Headers) -> Optional[str]:
+        # signature check only, no database: an invalid token simply falls back to the IP bucket
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"]).get("sub")
+        except JWTError:
+            return None
+
+
+def default_rate_limit_rules(api: Optional[str] = None) -> List[RateLimitRule]:
+    # api: the prefix the routers are mounted under
+    api = settings.API_V1_STR if api is None else api
+    return [
+        RateLimitRule("login", ["POST"], re.escape(f"{api}/auth/login"), per_ip=settings.RATE_LIMIT_LOGIN),
+        RateLimitRule(
+            "upload", ["POST"], re.escape(f"{api}/files/upload"),
+            per_ip=settings.RATE_LIMIT_UPLOAD_PER_IP, per_user=settings.RATE_LIMIT_UPLOAD_PER_USER,
+        ),
+        RateLimitRule("tracking", ["GET"], re.escape(f"{api}/orders/search/") + ".+", per_ip=settings.RATE_LIMIT_TRACKING),
+    ]
+
+
+def create_rate_limit_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBucketBackend.from_url(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryBucketBackend()
@@ -1,15 +1,22 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+# imported eagerly, unlike the other heavy libraries: every authenticated request decodes a token,
+# so a lazy import would only move the cost onto the first request of each worker
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db, engine, replica_router, SessionLocal
 from app.models.user import User
+from app.core.user_cache import UserPrincipalCache
+from app.core.password_hasher import PasswordHasher
+from app.schemas.user_schema import UserPrincipal
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+password_hasher = PasswordHasher(pwd_context, settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
 
 class OAuth2PasswordBearerOptional(OAuth2PasswordBearer):
     async def __call__(self, request: Request) -> Optional[str]:
@@ -21,6 +28,8 @@ class OAuth2PasswordBearerOptional(OAuth2PasswordBearer):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearerOptional(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+user_cache = UserPrincipalCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_SIZE)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, role: str = None) -> str:
     to_encode = data.copy()
@@ -41,29 +50,66 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _decode_token(token: str) -> Optional[dict]:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except JWTError:
+        return None
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+def _get_user_from_replica(db: Session, username: str) -> Optional[User]:
+    user = db.query(User).filter(User.username == username).first()
+    if user is None and db.get_bind() is not engine:
+        # a replica may not have caught up with a user that just registered
+        with SessionLocal() as primary_db:
+            user = primary_db.query(User).filter(User.username == username).first()
+            if user is not None:
+                primary_db.expunge(user)
+    return user
+
+def _token_matches(payload: dict, user) -> bool:
+    return (
+        payload.get("role") == user.role
+        and payload.get("ver", 0) == user.token_version
+        and user.is_active is not False
+    )
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        role: str = payload.get("role")
-    except JWTError:
-        raise credentials_exception
+
+# sync, so FastAPI runs the lookup on the threadpool
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    payload = _decode_token(token)
+    if payload is None:
+        raise _credentials_exception()
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    if role != user.role:
-        raise credentials_exception
+    user = db.query(User).filter(User.username == payload["sub"]).first()
+    if user is None or not _token_matches(payload, user):
+        raise _credentials_exception()
+    return user
+
+# for read-only endpoints: the lookup goes to a read replica and the
+# returned user must not be modified
+async def get_current_user_read(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_read_db)
+) -> User:
+    payload = _decode_token(token)
+    if payload is None:
+        raise _credentials_exception()
+    
+    user = _get_user_from_replica(db, payload["sub"])
+    if user is None or not _token_matches(payload, user):
+        raise _credentials_exception()
     return user
 
 async def get_current_user_optional(
@@ -72,18 +118,53 @@ async def get_current_user_optional(
 ) -> Optional[User]:
     if not token:
         return None
-        
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-    except JWTError:
+    payload = _decode_token(token)
+    if payload is None:
         return None
     
-    user = db.query(User).filter(User.username == username).first()
+    user = db.query(User).filter(User.username == payload["sub"]).first()
+    if user is None or not _token_matches(payload, user):
+        return None
     return user
 
+def _load_principal(username: str) -> Optional[UserPrincipal]:
+    with replica_router.session() as db:
+        user = _get_user_from_replica(db, username)
+        if user is None:
+            return None
+        return UserPrincipal.model_validate(user)
+
+async def _principal_from_token(token: str) -> Optional[UserPrincipal]:
+    payload = _decode_token(token)
+    if payload is None:
+        return None
+    username, version = payload["sub"], payload.get("ver", 0)
+    principal = user_cache.get(username, version)
+    if principal is None:
+        # only a cache miss opens a session, on the threadpool so the event loop never waits on it
+        principal = await run_in_threadpool(_load_principal, username)
+        if principal is None:
+            return None
+        user_cache.set(principal)
+    if not _token_matches(payload, principal):
+        return None
+    return principal
+
+# for endpoints that only need id, username and role: served from the token
+# claims and a short-TTL cache, so most requests never touch the database
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> UserPrincipal:
+    principal = await _principal_from_token(token)
+    if principal is None:
+        raise _credentials_exception()
+    return principal
+
+async def get_current_principal_optional(
+    token: Optional[str] = Depends(oauth2_scheme_optional)
+) -> Optional[UserPrincipal]:
+    if not token:
+        return None
+    return await _principal_from_token(token)
+
 async def get_current_user_role(token: str = Depends(oauth2_scheme)) -> str:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
@@ -96,8 +177,9 @@ async def get_current_user_role(token: str = Depends(oauth2_scheme)) -> str:
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-def is_admin(role: str = Depends(get_current_user_role)) -> bool:
-    if role != "admin":
+# checks the user record as well as the token, so a demoted admin's or a revoked token stops working
+def is_admin(principal: UserPrincipal = Depends(get_current_principal)) -> bool:
+    if principal.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Need admin role",
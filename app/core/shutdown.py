@@ -0,0 +1,52 @@
+import logging
+from typing import Callable, Iterable, List
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class ShutdownCoordinator:
+    # flips once per process, as soon as the server starts shutting down (before in-flight requests finish)
+    def __init__(self):
+        self.draining = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    def on_drain(self, callback: Callable[[], None]) -> None:
+        self._callbacks.append(callback)
+
+    def begin_drain(self) -> None:
+        if self.draining:
+            return
+        self.draining = True
+        logger.info("draining: refusing new uploads, waiting for in-flight requests")
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("drain callback failed")
+
+
+class DrainMiddleware:
+    # while draining, requests that would start long work get a 503 and a closed connection,
+    # so the client retries against a worker that is staying up
+    def __init__(self, app: ASGIApp, coordinator: ShutdownCoordinator, paths: Iterable[str] = (), retry_after: int = 2):
+        self.app = app
+        self.coordinator = coordinator
+        self.paths = set(paths)
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.coordinator.draining or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse(
+            {"detail": "Server is restarting, please retry"},
+            status_code=503,
+            headers={"Retry-After": str(self.retry_after), "Connection": "close"},
+        )
+        await response(scope, receive, send)
+
+
+shutdown_coordinator = ShutdownCoordinator()
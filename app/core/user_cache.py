@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.schemas.user_schema import UserPrincipal
+
+
+class UserPrincipalCache:
+    # per-process TTL + LRU cache of the user fields most endpoints need.
+    # Keys include the token version, so tokens issued before a password reset
+    # or role change stop matching as soon as the TTL runs out in every worker;
+    # invalidate() makes it immediate in the current one.
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, UserPrincipal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username: str, token_version: int) -> Optional[UserPrincipal]:
+        key = (username, token_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def set(self, principal: UserPrincipal) -> None:
+        key = (principal.username, principal.token_version)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,38 @@
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+from app.core.shutdown import shutdown_coordinator
+
+
+class DrainingServer(Server):
+    async def shutdown(self, sockets=None) -> None:
+        # tell the app first, so SSE streams end and new uploads are refused while uvicorn drains
+        shutdown_coordinator.begin_drain()
+        await super().shutdown(sockets=sockets)
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    # uvloop and httptools are pinned rather than "auto", so a broken install fails at boot instead of
+    # silently falling back to asyncio/h11; uvicorn stops waiting for open connections early enough
+    # that the lifespan shutdown (jobs, pools) still fits in gunicorn's graceful timeout
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        "timeout_graceful_shutdown": max(
+            1, int(settings.SERVER_GRACEFUL_TIMEOUT_SECONDS - settings.SHUTDOWN_JOBS_TIMEOUT_SECONDS - 2)
+        ),
+    }
+
+    async def _serve(self) -> None:
+        # same as UvicornWorker._serve, with DrainingServer
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
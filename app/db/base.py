@@ -1,4 +1,9 @@
 # Import all models here so Alembic can detect them
 from app.db.base_class import Base
 from app.models.user import User
-from app.models.order import Order
\ No newline at end of file
+from app.models.order import Order
+from app.models.order_archive import OrderArchive
+from app.models.order_rollup import OrderDailyRollup
+from app.models.stripe_event import StripeEvent
+from app.models.sync_checkpoint import SyncCheckpoint
+from app.models.print_batch import PrintBatch
\ No newline at end of file
@@ -0,0 +1,128 @@
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Query, Session
+
+from app.models.order import Order
+
+# orders is range partitioned by created_at month on Postgres (see the
+# partition migration); other databases keep a plain table and every helper
+# here is a no-op for them.
+PARTITION_NAME_PATTERN = re.compile(r"^orders_(\d{4})_(\d{2})$|^orders_default$")
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def month_partition_ddl(month: date) -> str:
+    start = _month_start(month)
+    end = _next_month(start)
+    return (
+        f"CREATE TABLE IF NOT EXISTS orders_{start:%Y_%m} PARTITION OF orders "
+        f"FOR VALUES FROM ('{start} 00:00:00+00') TO ('{end} 00:00:00+00')"
+    )
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'orders'::regclass)")
+    ).scalar()
+
+
+def _create_month_partition(db: Session, month: date) -> None:
+    start = _month_start(month)
+    end = _next_month(start)
+    window = {
+        "start": datetime(start.year, start.month, 1, tzinfo=timezone.utc),
+        "end": datetime(end.year, end.month, 1, tzinfo=timezone.utc),
+    }
+    in_default = db.execute(
+        text("SELECT EXISTS (SELECT 1 FROM orders_default WHERE created_at >= :start AND created_at < :end)"), window
+    ).scalar()
+    if not in_default:
+        db.execute(text(month_partition_ddl(month)))
+        return
+    # Postgres refuses to create a partition for rows the default partition already holds, so those
+    # rows are moved out while it is detached; search_vector is generated and left out of the copy
+    columns = ", ".join(column.name for column in Order.__table__.columns)
+    db.execute(text("ALTER TABLE orders DETACH PARTITION orders_default"))
+    db.execute(text(month_partition_ddl(month)))
+    db.execute(
+        text(
+            f"INSERT INTO orders ({columns}) SELECT {columns} FROM orders_default "
+            "WHERE created_at >= :start AND created_at < :end"
+        ),
+        window,
+    )
+    db.execute(text("DELETE FROM orders_default WHERE created_at >= :start AND created_at < :end"), window)
+    db.execute(text("ALTER TABLE orders ATTACH PARTITION orders_default DEFAULT"))
+
+
+def ensure_month_partitions(db: Session, months_ahead: int) -> List[str]:
+    # create the current and upcoming month partitions so inserts never land in orders_default
+    if not is_partitioned(db):
+        return []
+    created = []
+    month = _month_start(datetime.now(timezone.utc).date())
+    for _ in range(months_ahead + 1):
+        name = f"orders_{month:%Y_%m}"
+        exists = db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+        if not exists:
+            # one transaction per month, so a failure never leaves orders_default detached
+            _create_month_partition(db, month)
+            db.commit()
+            created.append(name)
+        month = _next_month(month)
+    return created
+
+
+def drop_empty_partitions_before(db: Session, cutoff: datetime) -> List[str]:
+    # once archiving has emptied a month there is no reason to keep planning over it
+    if not is_partitioned(db):
+        return []
+    partitions = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'orders'::regclass"
+        )
+    ).scalars().all()
+    dropped = []
+    for name in sorted(partitions):
+        match = PARTITION_NAME_PATTERN.match(name)
+        if not match or not match.group(1):
+            continue
+        if _next_month(date(int(match.group(1)), int(match.group(2)), 1)) > cutoff.date():
+            continue
+        if db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            continue
+        db.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    db.commit()
+    return dropped
+
+
+def search_id_created_window(order_search_id: str) -> Optional[Tuple[datetime, datetime]]:
+    # order_search_id starts with its creation time ("%y%m%d%H%M", server local time);
+    # a +/- 1 day window absorbs any timezone difference and lets Postgres prune partitions
+    try:
+        created = datetime.strptime(order_search_id[:10], "%y%m%d%H%M")
+    except ValueError:
+        return None
+    return created - timedelta(days=1), created + timedelta(days=1)
+
+
+def filter_by_search_id(query: Query, model, order_search_id: str) -> Query:
+    query = query.filter(model.order_search_id == order_search_id)
+    window = search_id_created_window(order_search_id)
+    if window is not None:
+        query = query.filter(model.created_at >= window[0], model.created_at < window[1])
+    return query
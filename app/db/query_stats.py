@@ -0,0 +1,115 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+
+# set per request by QueryStatsMiddleware; copied into threadpool workers along with the context
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+# extra collectors installed by count_queries(), independent of the request context
+_collectors: List[QueryStats] = []
+
+
+def redact_parameters(parameters: Any) -> Any:
+    # keep the shape and types for debugging, never the values (passwords, emails, phone numbers)
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<executemany: {len(parameters)} rows>"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_query_stats.get()
+    for collector in ([stats] if stats is not None else []) + _collectors:
+        collector.count += 1
+        collector.duration += elapsed
+        collector.statements[statement] += 1
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "slow query (%.1f ms): %s params=%s",
+            elapsed * 1000, " ".join(statement.split())[:1000], redact_parameters(parameters),
+        )
+
+
+class QueryStatsMiddleware:
+    # per-request query count and DB time; Server-Timing header in debug, N+1 warnings always
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if self.server_timing and message["type"] == "http.response.start":
+                # only queries issued before the response starts; streamed bodies are not included
+                timing = (
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={(time.perf_counter() - start) * 1000:.1f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            repeated = [(sql, n) for sql, n in stats.statements.items() if n >= settings.N_PLUS_ONE_THRESHOLD]
+            for sql, n in repeated:
+                logger.warning(
+                    "possible N+1: %s %s ran the same statement %d times: %s",
+                    scope["method"], scope["path"], n, " ".join(sql.split())[:300],
+                )
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    # counts every query on every engine while the block runs, e.g. around TestClient calls
+    stats = QueryStats()
+    _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    # test helper: `with assert_max_queries(3): client.get("/api/orders/my", headers=headers)`
+    with count_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        statements = "\n".join(f"  {n}x {' '.join(sql.split())[:200]}" for sql, n in stats.statements.most_common())
+        raise AssertionError(f"expected at most {limit} queries, got {stats.count}:\n{statements}")
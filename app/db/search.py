@@ -0,0 +1,73 @@
+from sqlalchemy import DDL, Table, event
+
+# Postgres: a generated tsvector column (weighted name/email > file_name > notes)
+# plus trigram indexes for email and name fragments. Both are maintained by the
+# database itself, no application code has to keep them in sync.
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE orders ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(email, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(file_name, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(notes, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_orders_search_vector ON orders USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_name_trgm ON orders USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_email_trgm ON orders USING gin (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_file_name_trgm ON orders USING gin (file_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_notes_trgm ON orders USING gin (notes gin_trgm_ops)",
+]
+
+# SQLite (local development and tests): an external-content FTS5 table kept in
+# sync by triggers.
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS orders_fts USING fts5(
+        name, email, file_name, notes, content='orders', content_rowid='rowid'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS orders_fts_ai AFTER INSERT ON orders BEGIN
+        INSERT INTO orders_fts(rowid, name, email, file_name, notes)
+        VALUES (new.rowid, new.name, new.email, new.file_name, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS orders_fts_ad AFTER DELETE ON orders BEGIN
+        INSERT INTO orders_fts(orders_fts, rowid, name, email, file_name, notes)
+        VALUES ('delete', old.rowid, old.name, old.email, old.file_name, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS orders_fts_au AFTER UPDATE OF name, email, file_name, notes ON orders BEGIN
+        INSERT INTO orders_fts(orders_fts, rowid, name, email, file_name, notes)
+        VALUES ('delete', old.rowid, old.name, old.email, old.file_name, old.notes);
+        INSERT INTO orders_fts(rowid, name, email, file_name, notes)
+        VALUES (new.rowid, new.name, new.email, new.file_name, new.notes);
+    END
+    """,
+]
+
+
+def register_search_ddl(table: Table) -> None:
+    # only used by metadata.create_all(); migrations carry their own copy
+    for statement in POSTGRES_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(table, "before_drop", DDL("DROP TABLE IF EXISTS orders_fts").execute_if(dialect="sqlite"))
+
+
+# objects created above that are not declared on the model, so Alembic
+# autogenerate must not try to drop them
+DATABASE_MANAGED_OBJECTS = {
+    "search_vector",
+    "ix_orders_search_vector",
+    "ix_orders_name_trgm",
+    "ix_orders_email_trgm",
+    "ix_orders_file_name_trgm",
+    "ix_orders_notes_trgm",
+    "orders_fts",
+}
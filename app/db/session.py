@@ -1,13 +1,78 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.db.pool import engine_options
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, **engine_options(settings.SQLALCHEMY_DATABASE_URI))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engines = [create_engine(uri, **engine_options(uri)) for uri in settings.SQLALCHEMY_REPLICA_URIS]
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, info={"read_only": True})
+
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        raise RuntimeError("read-only session: use get_db for writes")
+
+
+class ReplicaRouter:
+    def __init__(self, replicas: List[Engine], primary: Engine, retry_seconds: int = 30):
+        self.replicas = replicas
+        self.primary = primary
+        self.retry_seconds = retry_seconds
+        self._down_until = {id(replica): 0.0 for replica in replicas}
+        self._cycle = itertools.cycle(replicas) if replicas else None
+        self._lock = threading.Lock()
+
+    def _next_healthy(self, tried: set) -> Optional[Engine]:
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if id(replica) not in tried and self._down_until[id(replica)] <= time.monotonic():
+                    return replica
+        return None
+
+    def mark_down(self, replica: Engine) -> None:
+        with self._lock:
+            self._down_until[id(replica)] = time.monotonic() + self.retry_seconds
+
+    def session(self) -> Session:
+        # round-robin over healthy replicas, the primary is the last resort
+        tried = set()
+        while self._cycle is not None:
+            replica = self._next_healthy(tried)
+            if replica is None:
+                break
+            tried.add(id(replica))
+            db = ReadSessionLocal(bind=replica)
+            try:
+                # checks out a connection now, so a dead replica is skipped
+                db.connection()
+                return db
+            except OperationalError:
+                db.close()
+                self.mark_down(replica)
+        return ReadSessionLocal(bind=self.primary)
+
+replica_router = ReplicaRouter(replica_engines, engine, settings.REPLICA_RETRY_SECONDS)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    db = replica_router.session()
+    try:
+        yield db
+    finally:
+        db.close()
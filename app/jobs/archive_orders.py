@@ -0,0 +1,33 @@
+"""Move completed/cancelled orders past the retention window into orders_archive.
+
+Also creates upcoming monthly partitions of orders and drops emptied ones.
+Meant to run daily, e.g. from cron:
+
+    python -m app.jobs.archive_orders --retention-days 365
+"""
+import argparse
+import logging
+
+from app.core.config import settings
+from app.core.logging_config import setup_logging
+from app.db.session import SessionLocal
+from app.services.order_archive_service import order_archive_service
+
+logger = logging.getLogger("app.jobs.archive_orders")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--retention-days", type=int, default=settings.ORDER_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ORDER_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--months-ahead", type=int, default=settings.ORDER_PARTITION_MONTHS_AHEAD)
+    args = parser.parse_args()
+    setup_logging()
+
+    with SessionLocal() as db:
+        result = order_archive_service.run(db, args.retention_days, args.batch_size, args.months_ahead)
+    logger.info("orders archived", extra=result)
+
+
+if __name__ == "__main__":
+    main()
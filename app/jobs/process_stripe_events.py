@@ -0,0 +1,37 @@
+"""Apply stored Stripe webhook events outside the API process.
+
+Drains everything that is due, optionally after moving dead-lettered
+events back to pending (e.g. once the cause of the failures is fixed):
+
+    python -m app.jobs.process_stripe_events --requeue-dead
+"""
+import argparse
+import logging
+
+from app.core.logging_config import setup_logging
+from app.db.session import SessionLocal
+from app.services.stripe_event_service import stripe_event_consumer
+
+logger = logging.getLogger("app.jobs.process_stripe_events")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requeue-dead", action="store_true")
+    args = parser.parse_args()
+    setup_logging()
+
+    with SessionLocal() as db:
+        if args.requeue_dead:
+            logger.info("dead events requeued", extra={"requeued": stripe_event_consumer.requeue_dead(db)})
+        total = 0
+        while True:
+            processed = stripe_event_consumer.process_batch(db)
+            total += processed
+            if processed < stripe_event_consumer.batch_size:
+                break
+    logger.info("stripe events processed", extra={"processed": total})
+
+
+if __name__ == "__main__":
+    main()
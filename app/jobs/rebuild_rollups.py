@@ -0,0 +1,31 @@
+"""Rebuild order_daily_rollups from orders and orders_archive.
+
+Used for the initial backfill and to repair a day range:
+
+    python -m app.jobs.rebuild_rollups --start 2025-01-01 --end 2025-01-31
+"""
+import argparse
+import logging
+from datetime import date
+
+from app.core.logging_config import setup_logging
+from app.db.session import SessionLocal
+from app.services.rollup_service import rollup_service
+
+logger = logging.getLogger("app.jobs.rebuild_rollups")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", type=date.fromisoformat, default=None)
+    parser.add_argument("--end", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+    setup_logging()
+
+    with SessionLocal() as db:
+        rows = rollup_service.rebuild(db, args.start, args.end)
+    logger.info("rollups rebuilt", extra={"rows": rows, "start": args.start, "end": args.end})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Mark pending orders paid from completed Stripe checkout sessions.
+
+Catches payments whose webhook was missed. Runs incrementally from the
+stored high-water mark, e.g. every 15 minutes from cron:
+
+    python -m app.jobs.reconcile_payments
+    python -m app.jobs.reconcile_payments --since 2025-01-01T00:00:00+00:00 --dry-run
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+
+from app.core.logging_config import setup_logging
+from app.db.session import SessionLocal
+from app.services.payment_reconciliation_service import payment_reconciliation_service
+from app.services.stripe_service import stripe_service
+
+logger = logging.getLogger("app.jobs.reconcile_payments")
+
+
+async def run(since, dry_run: bool) -> dict:
+    try:
+        with SessionLocal() as db:
+            return await payment_reconciliation_service.reconcile(db, stripe_service, since, dry_run)
+    finally:
+        await stripe_service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="ignore the stored high-water mark")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    setup_logging()
+
+    since = int(args.since.timestamp()) if args.since else None
+    result = asyncio.run(run(since, args.dry_run))
+    logger.info(
+        "payments reconciled",
+        extra={
+            "sessions": result["sessions"],
+            "paid": result["paid"],
+            "updated": result["updated"],
+            "dry_run": args.dry_run,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Work the print queue with fake printers, to try the scheduler end to end.
+
+Schedules the processing orders, then each configured printer prints its
+queue: start, "print" for the batch's duration times --time-scale,
+complete. Orders end up completed, so only run it against a test database:
+
+    python -m app.jobs.simulate_print_queue --time-scale 0.001
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+import app.db.base  # noqa: F401  (all models, orders.user_id needs users mapped before a flush)
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.fake_printer import FakePrinter
+from app.services.print_scheduler_service import print_scheduler_service
+
+
+async def run_printer(fake: FakePrinter, started: datetime) -> Dict[str, Any]:
+    late = 0
+    while True:
+        with SessionLocal() as db:
+            batch = print_scheduler_service.next_batch(db, fake.printer.name)
+            if batch is None:
+                break
+            if batch.status == "queued":
+                print_scheduler_service.start_batch(db, batch.id)
+            batch_id, key, duration = batch.id, (batch.paper_size, batch.color_mode, batch.sides), batch.duration_seconds
+            due_at = batch.due_at if batch.due_at.tzinfo else batch.due_at.replace(tzinfo=timezone.utc)
+        finished = await fake.print_batch(batch_id, key, duration)
+        if started + timedelta(seconds=finished) > due_at:
+            late += 1
+        with SessionLocal() as db:
+            print_scheduler_service.complete_batch(db, batch_id)
+    return {
+        "printer": fake.printer.name,
+        "batches": len(fake.printed),
+        "changeovers": fake.changeovers,
+        "simulated_minutes": round(fake.clock_seconds / 60, 1),
+        "late_batches": late,
+    }
+
+
+async def simulate(time_scale: float) -> None:
+    started = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        result = print_scheduler_service.schedule(db, now=started, wait=True)
+    print(f"scheduled {result['orders']} orders into {len(result['batches'])} batches")
+    for batch in result["unschedulable"]:
+        print(f"  no printer for {batch['paper_size']} {batch['color_mode']}: {len(batch['order_search_ids'])} orders")
+
+    fakes = [
+        FakePrinter(printer, settings.PRINT_CHANGEOVER_SECONDS, time_scale)
+        for printer in print_scheduler_service.printers
+    ]
+    for row in await asyncio.gather(*(run_printer(fake, started) for fake in fakes)):
+        print(
+            f"  {row['printer']:<16} {row['batches']:4d} batches {row['changeovers']:4d} changeovers "
+            f"{row['simulated_minutes']:8.1f} min {row['late_batches']:4d} late"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--time-scale", type=float, default=0.0, help="real seconds slept per simulated second")
+    args = parser.parse_args()
+    asyncio.run(simulate(args.time_scale))
+
+
+if __name__ == "__main__":
+    main()
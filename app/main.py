@@ -1,9 +1,59 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.config import settings
+from fastapi.responses import ORJSONResponse
+import logging
+from app.core.config import settings, selected_env_file
+from app.core.logging_config import RequestIdMiddleware, setup_logging
+
+setup_logging()
+logging.getLogger(__name__).info(
+    "configuration loaded",
+    extra={
+        "env_file": selected_env_file,
+        "environment": settings.ENVIRONMENT,
+        "debug": settings.DEBUG,
+        "allowed_origins": settings.ALLOWED_ORIGINS,
+    },
+)
+
+from app.core.security import is_admin, password_hasher
+from app.core.rate_limit import RateLimitMiddleware, create_rate_limit_backend, default_rate_limit_rules
+from app.core.metrics import MetricsMiddleware, metrics_response, require_metrics_token
+from app.core.shutdown import DrainMiddleware, shutdown_coordinator
+from app.db.query_stats import QueryStatsMiddleware
+from app.db.pool import pool_stats
+from app.db.session import engine, replica_engines
+from app.services.file_processor import file_processor
+from app.services.health_service import health_service
+from app.services.order_events import order_event_broker
+from app.services.stripe_service import stripe_service
+from app.services.stripe_event_service import stripe_event_consumer
+
+shutdown_coordinator.on_drain(order_event_broker.close_streams)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(
+        file_processor.remove_stale_partials, settings.UPLOAD_FOLDER, settings.UPLOAD_PARTIAL_MAX_AGE_SECONDS
+    )
+    await order_event_broker.start()
+    await stripe_event_consumer.start()
+    yield
+    # under gunicorn this already happened when uvicorn started draining; a no-op then
+    shutdown_coordinator.begin_drain()
+    await stripe_event_consumer.stop(timeout=settings.SHUTDOWN_JOBS_TIMEOUT_SECONDS)
+    await order_event_broker.stop()
+    await stripe_service.close()
+    # waits for hashes already queued, so no login in flight is dropped
+    await asyncio.to_thread(password_hasher.shutdown)
+    for db_engine in (engine, *replica_engines):
+        db_engine.dispose()
 
 api_prefix = settings.API_V1_STR or "/api"
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME or "Printer API",
     version=settings.VERSION or "1.0.0",
     openapi_url= f"{api_prefix}/openapi.json" if settings.DEBUG else None,
@@ -11,6 +61,25 @@ app = FastAPI(
     redoc_url= f"{api_prefix}/redoc" if settings.DEBUG else None,
 )
 
+# innermost, counts only the queries of the request itself; Server-Timing only in debug
+app.add_middleware(QueryStatsMiddleware, server_timing=settings.DEBUG)
+
+# refuses new uploads once the worker is shutting down
+app.add_middleware(
+    DrainMiddleware,
+    coordinator=shutdown_coordinator,
+    paths=[f"{api_prefix}/files/upload"],
+)
+
+# added before CORS so throttled responses still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=default_rate_limit_rules(api_prefix),
+        backend=create_rate_limit_backend(),
+        trust_proxy_headers=settings.RATE_LIMIT_TRUST_PROXY_HEADERS,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -19,6 +88,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# outermost, so throttled and CORS preflight responses are measured too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# wraps everything, so every log line of a request carries its ID
+app.add_middleware(RequestIdMiddleware)
+
 @app.get("/", include_in_schema=False)
 async def root():
     if settings.DEBUG:
@@ -27,6 +103,8 @@ async def root():
     return {"message": "Printer API", "environment": settings.ENVIRONMENT}
 
 
+# liveness: the process and its event loop respond; never checks dependencies, so a DB outage
+# doesn't get every worker restarted
 @app.get("/health")
 async def health_check():
     return {
@@ -35,22 +113,71 @@ async def health_check():
         "debug": settings.DEBUG
     }
 
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+def _readiness_response(body: dict, ready: bool) -> ORJSONResponse:
+    return ORJSONResponse(body, status_code=200 if ready else 503, headers={"Cache-Control": "no-store"})
+
+# readiness: whether the load balancer should send traffic here (DB, upload disk, queues, draining);
+# the verdict only, the individual checks are under /health/ready/details
+@app.get("/health/ready")
+async def readiness():
+    result = await health_service.readiness()
+    return _readiness_response({"ready": result["ready"]}, result["ready"])
+
+@app.get("/health/ready/details")
+async def readiness_details(_: bool = Depends(is_admin)):
+    result = await health_service.readiness()
+    return _readiness_response(result, result["ready"])
+
+# operational detail, admins only
+@app.get("/health/db-pool")
+async def db_pool_health(_: bool = Depends(is_admin)):
+    return {
+        "primary": pool_stats(engine),
+        "replicas": [pool_stats(replica) for replica in replica_engines],
+    }
+
+@app.get("/health/password-hasher")
+async def password_hasher_health(_: bool = Depends(is_admin)):
+    return password_hasher.stats()
+
+if settings.METRICS_ENABLED:
+    # scraper only (METRICS_TOKEN), like the admin-only /health/db-pool
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+    async def metrics():
+        return metrics_response()
+
 from app.routes.auth import router as auth
 
-app.include_router(auth, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
+app.include_router(auth, prefix=f"{api_prefix}/auth", tags=["Authentication"])
 
 from app.routes.files import router as files
 
-app.include_router(files, prefix=f"{settings.API_V1_STR}/files", tags=["Files"])
+app.include_router(files, prefix=f"{api_prefix}/files", tags=["Files"])
 
 from app.routes.orders import router as orders
 
-app.include_router(orders, prefix=f"{settings.API_V1_STR}/orders", tags=["Orders"])
+app.include_router(orders, prefix=f"{api_prefix}/orders", tags=["Orders"])
 
 from app.routes.stripe import router as stripe
 
-app.include_router(stripe, prefix=f"{settings.API_V1_STR}/stripe", tags=["Stripe"])
+app.include_router(stripe, prefix=f"{api_prefix}/stripe", tags=["Stripe"])
+
+from app.routes.pricing import router as pricing
+
+app.include_router(pricing, prefix=f"{api_prefix}/pricing", tags=["Pricing"])
+
+from app.routes.print_queue import router as print_queue
+
+app.include_router(print_queue, prefix=f"{api_prefix}/print-queue", tags=["Print Queue"])
 
 from app.routes.user import router as user
 
-app.include_router(user, prefix=f"{settings.API_V1_STR}/user", tags=["User"])
+app.include_router(user, prefix=f"{api_prefix}/user", tags=["User"])
+
+from app.routes.analytics import router as analytics
+
+app.include_router(analytics, prefix=f"{api_prefix}/analytics", tags=["Analytics"])
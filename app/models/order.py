@@ -1,17 +1,23 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, ForeignKey
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, ForeignKeyConstraint, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 from app.db.base_class import Base
+from app.core.phone import normalize_phone
+from app.db.search import register_search_ddl
 
-class Order(Base):
-    __tablename__ = "orders"
-
-    id = Column(String, primary_key=True)
-    order_search_id = Column(String, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+class OrderColumns:
+    # columns shared by orders and orders_archive (see app/models/order_archive.py);
+    # primary and foreign keys differ between the two, so each table declares its own
+    id = Column(String, nullable=False)
+    order_search_id = Column(String, nullable=False, index=True)
+    user_id = Column(Integer, nullable=True)
     username = Column(String)
     email = Column(String, nullable=False)
     name = Column(String)
     phone = Column(String)
+    phone_normalized = Column(String)  # E.164, kept in sync with phone
     is_guest = Column(Boolean, default=False)
     
     file_name = Column(String, nullable=False)
@@ -29,6 +35,12 @@ class Order(Base):
     # payment info
     amount = Column(Float, nullable=False)
     status = Column(String, default="pending")  # pending, processing, completed, cancelled
+    # current Stripe checkout session, reused until it expires
+    checkout_session_id = Column(String, nullable=True)
+    checkout_session_url = Column(String, nullable=True)
+    checkout_session_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # print batch the scheduler put this order in, while it is processing
+    print_batch_id = Column(String, nullable=True)
     
     # delivery info
     delivery_method = Column(String)  # pickup or delivery
@@ -37,6 +49,37 @@ class Order(Base):
     notes = Column(String)
     
     # time info
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # also set client side: it is part of the orders primary key, so the ORM must know it without reading it back
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    completed_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class Order(OrderColumns, Base):
+    __tablename__ = "orders"
+    __table_args__ = (
+        # orders is partitioned by created_at month on Postgres and the partition key has to be part of
+        # the primary key (see the partition migration); id alone is still unique
+        PrimaryKeyConstraint("id", "created_at"),
+        ForeignKeyConstraint(["user_id"], ["users.id"]),
+        # "my orders" listing: newest first per user
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        # archive job: completed/cancelled orders past the retention window
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # pattern ops so LIKE 'prefix%' can use the index under non-C collations
+        Index(
+            "ix_orders_phone_normalized",
+            "phone_normalized",
+            postgresql_ops={"phone_normalized": "varchar_pattern_ops"},
+        ),
+        # orders of a print batch
+        Index("ix_orders_print_batch_id", "print_batch_id"),
+    )
+
+    @validates("phone")
+    def _sync_phone_normalized(self, key, value):
+        self.phone_normalized = normalize_phone(value)
+        return value
+
+
+register_search_ddl(Order.__table__)
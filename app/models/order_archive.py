@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+from app.models.order import OrderColumns
+
+class OrderArchive(OrderColumns, Base):
+    # completed/cancelled orders moved out of orders by the archive job,
+    # same columns as orders plus the time they were archived
+    __tablename__ = "orders_archive"
+    __table_args__ = (PrimaryKeyConstraint("id"),)
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Date, Float, Integer, String
+from app.db.base_class import Base
+
+class OrderDailyRollup(Base):
+    # pre-aggregated sales/volume per order day (Sydney time) and print options,
+    # kept up to date by RollupService on every order status change
+    __tablename__ = "order_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    color_mode = Column(String, primary_key=True)
+    paper_size = Column(String, primary_key=True)
+    delivery_method = Column(String, primary_key=True)
+
+    # paid = processing or completed
+    paid_orders = Column(Integer, nullable=False, default=0)
+    paid_pages = Column(Integer, nullable=False, default=0)  # pages * copies
+    revenue = Column(Float, nullable=False, default=0.0)
+    completed_orders = Column(Integer, nullable=False, default=0)
+    completed_pages = Column(Integer, nullable=False, default=0)
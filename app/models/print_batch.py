@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class PrintBatch(Base):
+    # processing orders with the same paper, colour and sides, queued on one printer by PrintSchedulerService;
+    # orders point at their batch through orders.print_batch_id
+    __tablename__ = "print_batches"
+    __table_args__ = (
+        # a printer's queue, in print order
+        Index("ix_print_batches_printer_status_position", "printer", "status", "position"),
+    )
+
+    id = Column(String, primary_key=True)
+    printer = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)  # order within the printer's queue
+    status = Column(String, nullable=False, default="queued")  # queued, printing, done, cancelled
+
+    paper_size = Column(String, nullable=False)
+    color_mode = Column(String, nullable=False)
+    sides = Column(String, nullable=False)
+    order_count = Column(Integer, nullable=False)
+    impressions = Column(Integer, nullable=False)  # printed sides, all copies
+    duration_seconds = Column(Integer, nullable=False)  # at the printer's rated speed, without changeover
+    due_at = Column(DateTime(timezone=True), nullable=False)  # earliest SLA deadline of its orders
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class StripeEvent(Base):
+    # raw webhook events, written by the webhook and applied later by StripeEventConsumer;
+    # keyed by the Stripe event ID so redelivered events are no-ops
+    __tablename__ = "stripe_events"
+    __table_args__ = (
+        # consumer poll: due pending events, oldest first
+        Index("ix_stripe_events_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(String, primary_key=True)  # evt_...
+    type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # event JSON as received
+    status = Column(String, nullable=False, default="pending")  # pending, processed, ignored, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
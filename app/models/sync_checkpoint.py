@@ -0,0 +1,11 @@
+from sqlalchemy import BigInteger, Column, DateTime, String
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class SyncCheckpoint(Base):
+    # high-water marks for incremental jobs, e.g. "stripe_checkout_sessions" -> unix time
+    __tablename__ = "sync_checkpoints"
+
+    name = Column(String, primary_key=True)
+    position = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
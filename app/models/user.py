@@ -15,5 +15,7 @@ class User(Base):
     mailbox_number = Column(String)
     role = Column(String, default="user")
     is_active = Column(Boolean, default=True)
+    # bumped on password resets and role changes, tokens carry it as "ver"
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List
+
+from app.db.session import get_read_db
+from app.core.security import is_admin
+from app.schemas.analytics_schema import SalesAnalyticsResponse
+from app.services.rollup_service import get_rollup_service, RollupService, ROLLUP_GROUPS
+
+router = APIRouter()
+
+# sales and volume from the daily rollups (only for admin)
+@router.get("/sales", response_model=SalesAnalyticsResponse, response_class=ORJSONResponse)
+async def get_sales_analytics(
+    start: date = Query(...),
+    end: date = Query(...),
+    group_by: List[str] = Query(["day"]),
+    _: bool = Depends(is_admin),
+    rollup_service: RollupService = Depends(get_rollup_service),
+    db: Session = Depends(get_read_db)
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    unknown = set(group_by) - set(ROLLUP_GROUPS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"cannot group by: {', '.join(sorted(unknown))}")
+
+    rows = rollup_service.summarize(db, start, end, list(dict.fromkeys(group_by)))
+    for row in rows:
+        if "day" in row:
+            row["day"] = row["day"].isoformat()
+    return ORJSONResponse({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "group_by": group_by,
+        "rows": rows
+    })
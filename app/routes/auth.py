@@ -1,20 +1,23 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.security import create_access_token, password_hasher
 from app.core.config import settings
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user_schema import UserCreate, Token, User as UserSchema, PasswordResetRequest
-from app.core.security import get_current_user, is_admin
+from app.core.security import get_current_user, is_admin, user_cache
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-@router.post("/register", response_model=UserSchema)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+# the handlers stay async so bcrypt can be awaited on the password hasher's executor;
+# their queries go to the threadpool instead of blocking the event loop
+
+def _check_registration(db: Session, user_in: UserCreate) -> None:
     user = db.query(User).filter(User.email == user_in.email).first()
     if user:
         raise HTTPException(
@@ -27,18 +30,37 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
             status_code=400,
             detail="The username has already been registered"
         )
+
+def _save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def _get_user_by_login(db: Session, username_or_email: str):
+    return (
+        db.query(User)
+        .filter(
+            or_(
+                User.username == username_or_email,
+                User.email == username_or_email
+            )
+        )
+        .first()
+    )
+
+@router.post("/register", response_model=UserSchema)
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
+    await run_in_threadpool(_check_registration, db, user_in)
     
     user = User(
         username=user_in.username,
         email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await password_hasher.hash(user_in.password),
         full_name=user_in.full_name,
         phone=user_in.phone,
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    return await run_in_threadpool(_save_user, db, user)
 
 # @router.post("adminRegister", response_model=UserSchema)
 # def admin_register(user_in: UserCreate, db: Session = Depends(get_db)):
@@ -70,26 +92,29 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
 
 # admin reset user password
 @router.post("/reset-user-password")
-def reset_user_password(
+async def reset_user_password(
     user_email: str,
     new_password: str,
     _: bool = Depends(is_admin),
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == user_email).first()
+    user = await run_in_threadpool(db.query(User).filter(User.email == user_email).first)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user.hashed_password = get_password_hash(new_password)
-    db.commit()
+    user.hashed_password = await password_hasher.hash(new_password)
+    # existing tokens of this user stop working
+    user.token_version = (user.token_version or 0) + 1
+    await run_in_threadpool(_save_user, db, user)
+    user_cache.invalidate(user.username)
     return {"message": "Password reset successfully"}
 
 @router.post("/reset-password")
-def reset_password(
+async def reset_password(
     password_reset_request: PasswordResetRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    if not verify_password(password_reset_request.current_password, current_user.hashed_password):
+    if not await password_hasher.verify(password_reset_request.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -101,35 +126,43 @@ def reset_password(
             detail="New password must be at least 8 characters long"
         )
     
-    current_user.hashed_password = get_password_hash(password_reset_request.new_password)
-    db.commit()
-    return {"message": "Password reset successfully"}
+    current_user.hashed_password = await password_hasher.hash(password_reset_request.new_password)
+    current_user.token_version = (current_user.token_version or 0) + 1
+    await run_in_threadpool(_save_user, db, current_user)
+    user_cache.invalidate(current_user.username)
+    # other sessions are signed out, this one gets a fresh token
+    access_token = create_access_token(
+        data={"sub": current_user.username, "ver": current_user.token_version}, role=current_user.role
+    )
+    return {"message": "Password reset successfully", "access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = (
-        db.query(User)
-        .filter(
-            or_(
-                User.username == form_data.username,
-                User.email == form_data.username
-            )
+    user = await run_in_threadpool(_get_user_by_login, db, form_data.username)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="The username or password is incorrect",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        .first()
-    )
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="The username or password is incorrect",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        user.hashed_password = new_hash
+        await run_in_threadpool(_save_user, db, user)
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires, role=user.role
+        data={"sub": user.username, "ver": user.token_version or 0}, expires_delta=access_token_expires, role=user.role
     )
     return {
         "access_token": access_token,
@@ -1,29 +1,30 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from fastapi.responses import FileResponse
+import logging
 import os
 from datetime import datetime
-from app.services.file_processor import get_file_processor, FileProcessor
+from app.services.file_processor import PAGES_SUFFIX, PARTIAL_SUFFIX, get_file_processor, FileProcessor
 from app.core.config import settings
-from app.core.security import get_current_user, get_current_user_optional
-from app.models.user import User
+from app.core.metrics import UPLOAD_BYTES, file_type_label
+from app.core.security import get_current_principal_optional
+from app.schemas.user_schema import UserPrincipal
 from typing import Optional
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     file_processor: FileProcessor = Depends(get_file_processor)
 ):
-    if current_user:
-        print(f"Uploading file for user: {current_user.username}")
-    else:
-        print("Uploading file for anonymous user")
+    logger.debug("uploading file", extra={"username": current_user.username if current_user else None})
     
     try:
         file_info = await file_processor.process_file(file)
+        UPLOAD_BYTES.labels(file_type_label(file_info["content_type"])).observe(file.size or 0)
         
-        file_id, file_path = await file_processor.save_file(file, settings.UPLOAD_FOLDER)
+        file_id, file_path = await file_processor.save_file(file, settings.UPLOAD_FOLDER, pages=file_info["pages"])
         return {
             "fileId": file_id,
             "filename": file_path,
@@ -37,7 +38,7 @@ async def upload_file(
 @router.get("/{filename}")
 async def get_file(filename: str):
     file_path = os.path.join(settings.UPLOAD_FOLDER, filename)
-    if not os.path.exists(file_path):
+    if filename.endswith((PARTIAL_SUFFIX, PAGES_SUFFIX)) or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
     return FileResponse(
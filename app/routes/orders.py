@@ -1,24 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Literal, Optional, Tuple, Union
+from sqlalchemy import and_, func, or_, select, union_all
 from sqlalchemy.orm import Session
+import asyncio
+import base64
+import hashlib
+import json
 import uuid
 from datetime import datetime
 
-from app.db.session import get_db
-from app.core.security import get_current_user, get_current_user_optional, is_admin
-from app.models.user import User
+from app.db.session import get_db, get_read_db
+from app.core.security import get_current_principal, get_current_principal_optional, is_admin
+from app.schemas.user_schema import UserPrincipal
 from app.models.order import Order
-from app.schemas.order_schema import OrderCreate, OrderResponse, OrderUpdate, OrderResponseForCreate, OrderListResponse
+from app.schemas.order_schema import OrderCreate, OrderResponse, OrderUpdate, OrderResponseForCreate, OrderListResponse, OrderSummary, MyOrdersResponse, OrderSearchResponse, order_rows_to_dicts
+from app.core.config import settings
+from app.core.phone import normalize_phone
+from app.db.partitions import filter_by_search_id
+from app.models.order_archive import OrderArchive
+from app.services.order_archive_service import get_order_archive_service, OrderArchiveService
+from app.services.order_search_service import get_order_search_service, OrderSearchService
+from app.services.rollup_service import get_rollup_service, RollupService
+from app.services.order_events import get_order_event_broker, build_order_event, OrderEventBroker
+from app.services.pricing_service import get_pricing_service, PricingService
+from app.services.file_processor import get_file_processor, FileProcessor
 
 
 router = APIRouter()
 
+TERMINAL_STATUSES = {"completed", "cancelled"}
+MIN_PHONE_PREFIX_LENGTH = 7
+
+def _sse_message(payload: dict) -> str:
+    return f"event: status\ndata: {json.dumps(payload)}\n\n"
+
+async def _order_event_stream(
+    request: Request,
+    broker: OrderEventBroker,
+    queue: asyncio.Queue,
+    order_search_id: Optional[str] = None,
+    initial: Optional[dict] = None,
+):
+    try:
+        if initial is not None:
+            yield _sse_message(initial)
+            if order_search_id and initial["status"] in TERMINAL_STATUSES:
+                return
+        while not await request.is_disconnected():
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if payload is None:  # server is draining
+                return
+            yield _sse_message(payload)
+            if order_search_id and payload["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        broker.unsubscribe(queue, order_search_id)
+
+ORDER_SUMMARY_COLUMNS = [getattr(Order, name) for name in OrderSummary.model_fields]
+ORDER_RESPONSE_COLUMNS = [getattr(Order, name) for name in OrderResponse.model_fields]
+
+def _encode_cursor(created_at: datetime, order_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), order_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, order_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), order_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+def _sse_response(stream) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("", response_model=OrderResponseForCreate)
 async def create_order(
     order_in: OrderCreate,
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
+    pricing_service: PricingService = Depends(get_pricing_service),
+    file_processor: FileProcessor = Depends(get_file_processor),
     db: Session = Depends(get_db)
 ):
+    if pricing_service.check_mode != "off":
+        # pages are counted from the stored upload, the client's count is only checked against it
+        counted_pages = await file_processor.count_saved_file_pages(order_in.file_id, settings.UPLOAD_FOLDER)
+        pricing_service.check_amount(order_in, counted_pages)
     timestamp = datetime.now().strftime("%y%m%d%H%M")
     random_num = str(uuid.uuid4().int)[:4]
     order_search_id = f"{timestamp}-{random_num}"
@@ -64,22 +140,119 @@ async def create_order(
         "created_at": order.created_at
     }
 
-@router.get("/my", response_model=List[OrderResponse])
+# read from the primary: users reload their list right after ordering and a lagging replica would hide the order
+# by default the full list of full orders, as before; paginated=true returns {"orders", "next_cursor"} pages
+# and view=summary a smaller row per order
+@router.get("/my", response_model=Union[List[OrderResponse], MyOrdersResponse], response_class=ORJSONResponse)
 async def get_my_orders(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    paginated: bool = Query(False),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    view: Literal["summary", "full"] = Query("full"),
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    # cheap aggregate first, so an unchanged list never loads any rows
+    count, last_change = (
+        db.query(func.count(Order.id), func.max(func.coalesce(Order.updated_at, Order.created_at)))
+        .filter(Order.user_id == current_user.id)
+        .one()
+    )
+    version = f"{current_user.id}:{count}:{last_change}:{paginated}:{cursor}:{limit}:{view}"
+    etag = f'W/"{hashlib.sha1(version.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    columns = ORDER_SUMMARY_COLUMNS if view == "summary" else ORDER_RESPONSE_COLUMNS
+    query = db.query(*columns, Order.id.label("_cursor_id")).filter(Order.user_id == current_user.id)
+    if paginated and cursor:
+        created_at, order_id = _decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                Order.created_at < created_at,
+                and_(Order.created_at == created_at, Order.id < order_id),
+            )
+        )
+    # newest first, with id as a tie-breaker so the cursor is stable
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    orders = query.limit(limit + 1).all() if paginated else query.all()
+
+    next_cursor = None
+    if paginated and len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = _encode_cursor(orders[-1].created_at, orders[-1]._cursor_id)
+
+    items = order_rows_to_dicts(orders)
+    for item in items:
+        del item["_cursor_id"]
+    if not paginated:
+        return ORJSONResponse(items, headers=headers)
+    return ORJSONResponse({"orders": items, "next_cursor": next_cursor}, headers=headers)
+
+# free-text search over name, email, file name and notes (only for admin)
+@router.get("/admin/search", response_model=OrderSearchResponse, response_class=ORJSONResponse)
+async def search_orders(
+    q: str = Query(..., min_length=2, max_length=200),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    _: bool = Depends(is_admin),
+    search_service: OrderSearchService = Depends(get_order_search_service),
+    db: Session = Depends(get_read_db)
+):
+    # fetch one extra row instead of counting every match
+    orders = search_service.search(db, ORDER_RESPONSE_COLUMNS, q.strip(), (page - 1) * size, size + 1)
+    return ORJSONResponse({
+        "orders": order_rows_to_dicts(orders[:size]),
+        "page": page,
+        "size": size,
+        "has_more": len(orders) > size
+    })
+
+# stream status changes of all orders (only for admin)
+@router.get("/events")
+async def stream_all_order_events(
+    request: Request,
+    _: bool = Depends(is_admin),
+    broker: OrderEventBroker = Depends(get_order_event_broker)
+):
+    queue = broker.subscribe()
+    return _sse_response(_order_event_stream(request, broker, queue))
+
+@router.get("/{order_search_id}/events")
+async def stream_order_events(
+    order_search_id: str,
+    request: Request,
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
+    broker: OrderEventBroker = Depends(get_order_event_broker),
     db: Session = Depends(get_db)
 ):
-    orders = db.query(Order).filter(Order.user_id == current_user.id).all()
-    return orders
+    # subscribe before reading the current status so no change is missed in between
+    queue = broker.subscribe(order_search_id)
+    order = filter_by_search_id(db.query(Order), Order, order_search_id).first()
+    if not order or (current_user and current_user.role != "admin" and order.user_id != current_user.id):
+        broker.unsubscribe(queue, order_search_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="order not found")
+        raise HTTPException(status_code=403, detail="no permission to view this order")
+
+    initial = build_order_event(order)
+    # idle subscribers must not hold a pooled connection
+    db.close()
+    return _sse_response(_order_event_stream(request, broker, queue, order_search_id, initial))
 
 @router.get("/{order_search_id}", response_model=OrderResponse)
 async def get_order(
     order_search_id: str,
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
+    archive_service: OrderArchiveService = Depends(get_order_archive_service),
     db: Session = Depends(get_db)
 ):
 
-    order = db.query(Order).filter(Order.order_search_id == order_search_id).first()
+    order = filter_by_search_id(db.query(Order), Order, order_search_id).first()
+    if not order:
+        order = archive_service.get_by_search_id(db, order_search_id)
     if not order:
         raise HTTPException(status_code=404, detail="order not found")
     
@@ -88,26 +261,57 @@ async def get_order(
     
     return order
 
-@router.get("/search/phone/{phone}", response_model=List[OrderResponse])
+@router.get("/search/phone/{phone}", response_model=List[OrderResponse], response_class=ORJSONResponse)
 async def get_orders_by_phone(
     phone: str,
-    current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    prefix: bool = Query(False),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
+    db: Session = Depends(get_read_db)
 ):
-    orders = db.query(Order).filter(Order.phone == phone).all()
     if current_user and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="no permission to view this order")
-    
+
+    normalized = normalize_phone(phone)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="invalid phone number")
+
+    query = db.query(*ORDER_RESPONSE_COLUMNS)
+    if prefix:
+        # a prefix enumerates other people's orders, so only admins may use it
+        if current_user is None:
+            raise HTTPException(
+                status_code=401,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        # "+61" plus at least a few digits, otherwise a prefix matches half the table
+        if len(normalized) < MIN_PHONE_PREFIX_LENGTH:
+            raise HTTPException(status_code=400, detail="phone prefix is too short")
+        query = query.filter(Order.phone_normalized.startswith(normalized, autoescape=True))
+    else:
+        query = query.filter(Order.phone_normalized == normalized)
+
+    orders = (
+        query.order_by(Order.created_at.desc())
+        .offset((page - 1) * size)
+        .limit(size)
+        .all()
+    )
     if not orders:
         raise HTTPException(status_code=404, detail="No orders found for this phone number")
-    return orders
+    return ORJSONResponse(order_rows_to_dicts(orders))
 
 @router.get("/search/{order_search_id}", response_model=OrderResponse)
 async def get_order_by_search_id(
     order_search_id: str,
+    archive_service: OrderArchiveService = Depends(get_order_archive_service),
     db: Session = Depends(get_db)
 ):
-    order = db.query(Order).filter(Order.order_search_id == order_search_id).first()
+    order = filter_by_search_id(db.query(Order), Order, order_search_id).first()
+    if not order:
+        order = archive_service.get_by_search_id(db, order_search_id)
     if not order:
         raise HTTPException(status_code=404, detail="order not found")
     return order
@@ -118,41 +322,61 @@ async def update_order_status(
     order_id: str,
     status_update: OrderUpdate,
     _: bool = Depends(is_admin),
+    broker: OrderEventBroker = Depends(get_order_event_broker),
+    rollup_service: RollupService = Depends(get_rollup_service),
     db: Session = Depends(get_db)
 ):
     
-    order = db.query(Order).filter(Order.order_search_id == order_id).first()
+    order = filter_by_search_id(db.query(Order).with_for_update(), Order, order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="order not found")
     
+    previous_status = order.status
     order.status = status_update.status
     if status_update.status == "completed":
         order.completed_at = datetime.now()
     
     db.add(order)
+    rollup_service.record_status_change(db, order, previous_status)
+    broker.notify(db, order)
     db.commit()
     db.refresh(order)
     return order
 
 # Get all orders (only for admin)
-@router.get("", response_model=OrderListResponse)
+@router.get("", response_model=OrderListResponse, response_class=ORJSONResponse)
 async def get_all_orders(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    include_archived: bool = Query(False),
     _: bool = Depends(is_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
   
-    total = db.query(Order).count()
-    
-    orders = db.query(Order).offset((page - 1) * size).limit(size).all()
+    if include_archived:
+        # live and archived orders as one list, newest first
+        combined = union_all(
+            select(*ORDER_RESPONSE_COLUMNS),
+            select(*(OrderArchive.__table__.c[column.key] for column in ORDER_RESPONSE_COLUMNS)),
+        ).subquery()
+        total = db.query(func.count()).select_from(combined).scalar()
+        orders = (
+            db.query(*combined.c)
+            .order_by(combined.c.created_at.desc())
+            .offset((page - 1) * size)
+            .limit(size)
+            .all()
+        )
+    else:
+        total = db.query(Order).count()
+        orders = db.query(*ORDER_RESPONSE_COLUMNS).offset((page - 1) * size).limit(size).all()
     
     total_pages = (total + size - 1) // size
     
-    return {
-        "orders": orders,
+    return ORJSONResponse({
+        "orders": order_rows_to_dicts(orders),
         "total": total,
         "page": page,
         "size": size,
         "total_pages": total_pages
-    }
\ No newline at end of file
+    })
\ No newline at end of file
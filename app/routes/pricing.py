@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
+
+from app.core.config import settings
+from app.schemas.pricing_schema import QuoteRequest, QuoteResponse
+from app.services.file_processor import get_file_processor, FileProcessor
+from app.services.pricing_service import get_pricing_service, PricingService
+
+router = APIRouter()
+
+# prices for many candidate print configurations of one document in a single call (the price matrix UI)
+@router.post("/quote", response_model=QuoteResponse, response_class=ORJSONResponse)
+async def quote(
+    quote_in: QuoteRequest,
+    pricing_service: PricingService = Depends(get_pricing_service),
+    file_processor: FileProcessor = Depends(get_file_processor)
+):
+    pages = quote_in.pages
+    if pages is None:
+        pages = await file_processor.count_saved_file_pages(quote_in.file_id, settings.UPLOAD_FOLDER)
+
+    quotes = pricing_service.quote_cents(pages, quote_in.configurations)
+    return {
+        "pages": pages,
+        "currency": pricing_service.table.currency,
+        "quotes": [
+            {**configuration.model_dump(), "printed_sides": printed_sides, "amount": amount_cents / 100}
+            for configuration, (printed_sides, amount_cents) in zip(quote_in.configurations, quotes)
+        ],
+    }
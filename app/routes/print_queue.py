@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.core.security import is_admin
+from app.services.print_scheduler_service import get_print_scheduler_service, PrintSchedulerService
+
+router = APIRouter()
+
+# printers and their queued/printing batches with live time estimates (only for admin)
+@router.get("", response_class=ORJSONResponse)
+async def get_print_queue(
+    _: bool = Depends(is_admin),
+    scheduler: PrintSchedulerService = Depends(get_print_scheduler_service),
+    db: Session = Depends(get_db)
+):
+    return ORJSONResponse(await run_in_threadpool(scheduler.queue, db))
+
+# batch the processing orders that are not queued yet (only for admin); 409 while another run holds the lock
+@router.post("/schedule", response_class=ORJSONResponse)
+async def schedule_print_batches(
+    dry_run: bool = Query(False),
+    _: bool = Depends(is_admin),
+    scheduler: PrintSchedulerService = Depends(get_print_scheduler_service),
+    db: Session = Depends(get_db)
+):
+    return ORJSONResponse(await run_in_threadpool(scheduler.schedule, db, dry_run=dry_run))
+
+@router.post("/batches/{batch_id}/start", response_class=ORJSONResponse)
+async def start_print_batch(
+    batch_id: str,
+    _: bool = Depends(is_admin),
+    scheduler: PrintSchedulerService = Depends(get_print_scheduler_service),
+    db: Session = Depends(get_db)
+):
+    return ORJSONResponse(await run_in_threadpool(scheduler.start_batch, db, batch_id))
+
+# marks the batch's orders completed
+@router.post("/batches/{batch_id}/complete", response_class=ORJSONResponse)
+async def complete_print_batch(
+    batch_id: str,
+    _: bool = Depends(is_admin),
+    scheduler: PrintSchedulerService = Depends(get_print_scheduler_service),
+    db: Session = Depends(get_db)
+):
+    return ORJSONResponse(await run_in_threadpool(scheduler.complete_batch, db, batch_id))
+
+# puts the batch's orders back for the next schedule run
+@router.post("/batches/{batch_id}/cancel", response_class=ORJSONResponse)
+async def cancel_print_batch(
+    batch_id: str,
+    _: bool = Depends(is_admin),
+    scheduler: PrintSchedulerService = Depends(get_print_scheduler_service),
+    db: Session = Depends(get_db)
+):
+    return ORJSONResponse(await run_in_threadpool(scheduler.cancel_batch, db, batch_id))
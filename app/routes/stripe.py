@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.core.security import get_current_user_optional
-from app.models.user import User
+from app.core.security import get_current_principal_optional
+from app.schemas.user_schema import UserPrincipal
 from app.models.order import Order
+from app.db.partitions import filter_by_search_id
 from app.services.stripe_service import get_stripe_service, StripeService
+from app.services.order_events import get_order_event_broker, OrderEventBroker
+from app.services.rollup_service import get_rollup_service, RollupService, PAID_STATUSES
+from app.services.stripe_event_service import get_stripe_event_consumer, StripeEventConsumer
+from app.core.config import settings
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 router = APIRouter()
@@ -12,7 +18,7 @@ router = APIRouter()
 @router.post("/create-checkout-session/{order_id}")
 async def create_checkout_session(
     order_id: str,
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     stripe_service: StripeService = Depends(get_stripe_service),
     db: Session = Depends(get_db)
 ):
@@ -28,49 +34,77 @@ async def create_checkout_session(
     if order.status != "pending":
         raise HTTPException(status_code=400, detail="this order is not pending")
     
+    # reuse the current session (e.g. the payment page was refreshed) while it is still valid
+    expires_at = order.checkout_session_expires_at
+    if expires_at is not None and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    reuse_until = datetime.now(timezone.utc) + timedelta(minutes=settings.STRIPE_CHECKOUT_REUSE_MARGIN_MINUTES)
+    if order.checkout_session_id and order.checkout_session_url and expires_at and expires_at > reuse_until:
+        return {'session_id': order.checkout_session_id, 'url': order.checkout_session_url}
+    
     # create payment session
     try:
         checkout_session = await stripe_service.create_checkout_session(order)
-        return checkout_session
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    order.checkout_session_id = checkout_session['session_id']
+    order.checkout_session_url = checkout_session['url']
+    order.checkout_session_expires_at = checkout_session['expires_at']
+    db.commit()
+    return {'session_id': checkout_session['session_id'], 'url': checkout_session['url']}
 
 @router.post("/verify-payment")
 async def verify_payment(
     session_id: str = Query(...),
     order_id: str = Query(...),
-    current_user: Optional[User] = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     stripe_service: StripeService = Depends(get_stripe_service),
+    broker: OrderEventBroker = Depends(get_order_event_broker),
+    rollup_service: RollupService = Depends(get_rollup_service),
     db: Session = Depends(get_db)
 ):
     # get order
-    order = db.query(Order).filter(Order.order_search_id == order_id).first()
+    order = filter_by_search_id(db.query(Order), Order, order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="order not found")
     
+    # already marked paid (usually by the webhook), no need to ask Stripe
+    if order.status != "pending":
+        return {
+            'order_id': order_id,
+            'payment_status': 'paid' if order.status in PAID_STATUSES else order.status,
+            'is_paid': order.status in PAID_STATUSES,
+            'session_id': session_id
+        }
     
-    # verify payment
+    # verify payment; the session metadata carries the internal order id
     try:
-        payment_info = await stripe_service.verify_payment(session_id, order_id)
-        
-        # if payment is successful, update order status
-        if payment_info['is_paid'] and order.status == "pending":
-            order.status = "processing"
-            db.add(order)
-            db.commit()
-            db.refresh(order)
-        
-        return payment_info
+        payment_info = await stripe_service.verify_payment(session_id, order.id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    payment_info['order_id'] = order_id
+    
+    # if payment is successful, update order status
+    if payment_info['is_paid']:
+        # lock only after the Stripe call; the re-check means a concurrent webhook cannot count the payment twice
+        order = db.query(Order).filter(Order.id == order.id).populate_existing().with_for_update().first()
+        if order.status == "pending":
+            order.status = "processing"
+            rollup_service.record_status_change(db, order, "pending")
+            broker.notify(db, order)
+        db.commit()
+    
+    return payment_info
 
 @router.post("/webhook")
 async def stripe_webhook(
     request: Request,
     stripe_service: StripeService = Depends(get_stripe_service),
+    consumer: StripeEventConsumer = Depends(get_stripe_event_consumer),
     db: Session = Depends(get_db)
 ):
-    # handle Stripe webhook
+    # handle Stripe webhook: verify, store, ack; the order is updated by the background consumer
     payload = await request.body()
     sig_header = request.headers.get("Stripe-Signature")
     
@@ -78,16 +112,12 @@ async def stripe_webhook(
         raise HTTPException(status_code=400, detail="missing Stripe signature")
     
     try:
-        event_info = await stripe_service.handle_webhook(payload, sig_header)
-        
-        # if payment is successful and there is an order ID
-        if event_info.get('is_paid', False) and event_info.get('order_id'):
-            order = db.query(Order).filter(Order.id == event_info['order_id']).first()
-            if order and order.status == "pending":
-                order.status = "processing"
-                db.add(order)
-                db.commit()
-        
-        return {"status": "success", "event": event_info.get('event_type')}
+        event = stripe_service.construct_webhook_event(payload, sig_header)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # redeliveries hit the unique event ID and are acknowledged without doing anything
+    if consumer.record(db, event['id'], event['type'], payload.decode()):
+        consumer.wake()
+    
+    return {"status": "success", "event": event['type']}
\ No newline at end of file
@@ -1,17 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.core.security import get_current_user, is_admin
+from app.db.session import get_db, get_read_db
+from app.core.security import get_current_user, get_current_user_read, is_admin
 from app.models.user import User
-from app.schemas.user_schema import UserUpdate, UserInfoResponseForAdmin, UserInfoResponseForUser
+from app.schemas.user_schema import UserUpdate, UserRoleUpdate, UserInfoResponseForAdmin, UserInfoResponseForUser
 from app.services.user_service import get_user_service, UserService
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserInfoResponseForUser)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_read),
 ):
     return current_user
 
@@ -29,9 +29,23 @@ async def get_user_info(
     user_id: int,
     _: bool = Depends(is_admin),
     user_service: UserService = Depends(get_user_service),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     user = user_service.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+# change a user's role (only for admin)
+@router.put("/{user_id}/role", response_model=UserInfoResponseForAdmin)
+async def update_user_role(
+    user_id: int,
+    role_update: UserRoleUpdate,
+    _: bool = Depends(is_admin),
+    user_service: UserService = Depends(get_user_service),
+    db: Session = Depends(get_db)
+):
+    user = user_service.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_service.update_user_role(db, user, role_update.role)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import date
+
+class SalesRollupRow(BaseModel):
+    day: Optional[date] = None
+    color_mode: Optional[str] = None
+    paper_size: Optional[str] = None
+    delivery_method: Optional[str] = None
+    paid_orders: int
+    paid_pages: int
+    revenue: float
+    completed_orders: int
+    completed_pages: int
+
+class SalesAnalyticsResponse(BaseModel):
+    start: date
+    end: date
+    group_by: List[str]
+    rows: List[SalesRollupRow]
@@ -1,21 +1,46 @@
 from pydantic import BaseModel, EmailStr, field_validator, Field
-from typing import Optional, List
+from typing import Optional, List, Union, Iterable, Dict, Any
 from datetime import datetime, timezone
-import pytz
+from zoneinfo import ZoneInfo
 
-target_timezone = pytz.timezone('Australia/Sydney')
+# zoneinfo caches the tz object and its astimezone() is much cheaper than pytz
+target_timezone = ZoneInfo('Australia/Sydney')
+
+
+def to_local_datetime(value):
+    if value is None:
+        return None
+
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+
+        return value.astimezone(target_timezone)
+    return value
+
+
+def order_rows_to_dicts(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    # fast path for column-only queries: skips model validation, only localizes datetimes
+    dicts = []
+    for row in rows:
+        item = row._asdict()
+        for key, value in item.items():
+            if isinstance(value, datetime):
+                item[key] = to_local_datetime(value)
+        dicts.append(item)
+    return dicts
 
 
 class OrderBase(BaseModel):
     file_name: str
     file_id: str
-    pages: int
+    pages: int = Field(ge=1)
     color_mode: str  # "color" or "bw"
     sides: str  # "single" or "double"
     paper_size: str  # "A4", "A3"
     orientation: str  # "portrait" or "landscape"
-    pages_per_side: int = 1
-    copies: int = 1
+    pages_per_side: int = Field(1, ge=1)
+    copies: int = Field(1, ge=1)
     amount: float
     delivery_method: str  # "pickup" or "delivery"
     email: EmailStr
@@ -50,19 +75,38 @@ class OrderResponse(OrderBase):
 
     @field_validator('created_at', 'updated_at', 'completed_at', mode='before')
     def convert_datetime_to_local(cls, value):
-        if value is None:
-            return None
-    
-        if isinstance(value, datetime):
-            if value.tzinfo is None:
-                value = value.replace(tzinfo=timezone.utc)
-            
-            return value.astimezone(target_timezone)
-        return value
+        return to_local_datetime(value)
 
     class Config:
         from_attributes = True
     
+class OrderSummary(BaseModel):
+    order_search_id: str
+    file_name: str
+    pages: int
+    copies: int = 1
+    color_mode: str
+    amount: float
+    status: str
+    created_at: datetime
+
+    @field_validator('created_at', mode='before')
+    def convert_datetime_to_local(cls, value):
+        return to_local_datetime(value)
+
+    class Config:
+        from_attributes = True
+
+class MyOrdersResponse(BaseModel):
+    orders: Union[List[OrderResponse], List[OrderSummary]] = Field(union_mode='left_to_right')
+    next_cursor: Optional[str] = None
+
+class OrderSearchResponse(BaseModel):
+    orders: List[OrderResponse]
+    page: int
+    size: int
+    has_more: bool
+
 class OrderListResponse(BaseModel):
     orders: List[OrderResponse]
     total: int
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
+
+MAX_QUOTE_CONFIGURATIONS = 256
+
+class QuoteConfiguration(BaseModel):
+    color_mode: str  # "color" or "bw"
+    sides: str  # "single" or "double"
+    paper_size: str  # "A4", "A3"
+    pages_per_side: int = Field(1, ge=1)
+    copies: int = Field(1, ge=1)
+    delivery_method: str = "pickup"  # "pickup" or "delivery"
+
+class QuoteRequest(BaseModel):
+    # either the page count the upload returned, or the uploaded file's ID to count it server-side
+    pages: Optional[int] = Field(None, ge=1)
+    file_id: Optional[str] = None
+    configurations: List[QuoteConfiguration] = Field(..., min_length=1, max_length=MAX_QUOTE_CONFIGURATIONS)
+
+    @model_validator(mode="after")
+    def check_pages_or_file(self):
+        if (self.pages is None) == (self.file_id is None):
+            raise ValueError("give exactly one of pages or file_id")
+        return self
+
+class Quote(QuoteConfiguration):
+    printed_sides: int
+    amount: float
+
+class QuoteResponse(BaseModel):
+    pages: int
+    currency: str
+    quotes: List[Quote]
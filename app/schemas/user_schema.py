@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, Literal
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -40,6 +40,9 @@ class UserInfoResponseForUser(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+class UserRoleUpdate(BaseModel):
+    role: Literal["user", "admin"]
+
 class UserUpdate(BaseModel):
     full_name: Optional[str] = None
     phone: Optional[str] = None
@@ -63,6 +66,18 @@ class UserInDB(UserBase):
 class User(UserInDB):
     pass
 
+class UserPrincipal(BaseModel):
+    # what most endpoints need from the current user, cacheable without a session
+    id: int
+    username: str
+    role: str
+    is_active: bool = True
+    token_version: int = 0
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
 class Token(BaseModel):
     access_token: str
     token_type: str
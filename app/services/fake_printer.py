@@ -0,0 +1,30 @@
+import asyncio
+from typing import List, Optional
+
+from app.services.print_scheduler_service import MediaKey, Printer
+
+
+class FakePrinter:
+    # stands in for a real printer in tests and the simulation job: "prints" a batch by sleeping for its
+    # duration (plus a changeover when the media differs from the last batch) times time_scale,
+    # and keeps a simulated clock so lateness can be judged without waiting in real time
+    def __init__(self, printer: Printer, changeover_seconds: int, time_scale: float = 0.0):
+        self.printer = printer
+        self.changeover_seconds = changeover_seconds
+        self.time_scale = time_scale
+        self.clock_seconds = 0
+        self.changeovers = 0
+        self.printed: List[str] = []
+        self._loaded: Optional[MediaKey] = None
+
+    async def print_batch(self, batch_id: str, key: MediaKey, duration_seconds: int) -> int:
+        # returns the simulated second the batch finished at
+        seconds = duration_seconds
+        if self._loaded is not None and self._loaded != key:
+            self.changeovers += 1
+            seconds += self.changeover_seconds
+        self._loaded = key
+        await asyncio.sleep(seconds * self.time_scale)
+        self.clock_seconds += seconds
+        self.printed.append(batch_id)
+        return self.clock_seconds
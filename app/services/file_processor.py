@@ -1,18 +1,31 @@
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+import logging
 import os
 import uuid
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 import aiofiles
-import magic
-import PyPDF2
 import io
 import tempfile
-from docx import Document
+import time
+from app.core.metrics import PAGE_COUNT_DURATION, file_type_label
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_SUFFIX = ".part"
+PAGES_SUFFIX = ".pages"
+EXTENSION_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".doc": "application/msword",
+}
 
 class FileProcessor:
     
     async def process_file(self, file: UploadFile) -> Dict[str, Any]:
         
+        # magic, PyPDF2 and docx are imported where they are used, so workers start without them
+        import magic
         content = await file.read(1024)  
         file_type = magic.from_buffer(content, mime=True)
         await file.seek(0) 
@@ -21,7 +34,8 @@ class FileProcessor:
                         'application/msword', 
                         'application/vnd.openxmlformats-officedocument.wordprocessingml.document']
         
-        print(f"File type: {file_type}")
+        logger.debug("sniffed file type", extra={"file_type": file_type})
+        detected_type = file_type
         if file_type not in allowed_types:
                 if file.filename:
                     filename_lower = file.filename.lower()
@@ -36,7 +50,8 @@ class FileProcessor:
             raise HTTPException(status_code=400, detail="Not supported file type, only PDF and Word documents are supported for now")
         
         
-        pages = await self._count_pages(file, detected_type)
+        with PAGE_COUNT_DURATION.labels(file_type_label(detected_type)).time():
+            pages = await self._count_pages(file, detected_type)
         
         return {
             "filename": None, 
@@ -51,24 +66,29 @@ class FileProcessor:
             content = await file.read()
             await file.seek(0)
             
-            print(f"File name: {file.filename}")
-            print(f"Detected MIME type: {file_type}")
-            print(f"Content type from upload: {file.content_type}")
-            
-            if file_type == 'application/pdf':
-                pdf_file = io.BytesIO(content)
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                return len(pdf_reader.pages)
-            elif file_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-                return await self._estimate_word_pages(content, file_type)
-            elif file_type == 'application/msword':
-                 file_size_kb = len(content) / 1024
-                 return max(1, int(file_size_kb / 75))
-            else:
-                raise HTTPException(status_code=400, detail="Not supported file type, only PDF and Word documents are supported for now")
+            logger.debug(
+                "counting pages",
+                extra={"file_name": file.filename, "file_type": file_type, "upload_content_type": file.content_type},
+            )
+            # parsing is CPU bound, so it runs on the threadpool instead of stalling the event loop
+            return await run_in_threadpool(self._parse_pages, content, file_type)
         except Exception as e:
-            print(f"Error reading document: {str(e)}")
+            logger.exception("error reading document", extra={"file_name": file.filename, "file_type": file_type})
             raise HTTPException(status_code=500, detail="Error reading document")
+
+    def _parse_pages(self, content: bytes, file_type: str) -> int:
+        if file_type == 'application/pdf':
+            import PyPDF2
+            pdf_file = io.BytesIO(content)
+            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            return len(pdf_reader.pages)
+        elif file_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
+            return self._estimate_word_pages(content, file_type)
+        elif file_type == 'application/msword':
+             file_size_kb = len(content) / 1024
+             return max(1, int(file_size_kb / 75))
+        else:
+            raise HTTPException(status_code=400, detail="Not supported file type, only PDF and Word documents are supported for now")
     
 
     # async def _count_word_pages_via_pdf(self, content: bytes, file_type: str) -> int:
@@ -122,7 +142,8 @@ class FileProcessor:
     #             shutil.rmtree(temp_dir, ignore_errors=True)
 
 
-    async def _estimate_word_pages(self, content: bytes, file_type: str) -> int:
+    def _estimate_word_pages(self, content: bytes, file_type: str) -> int:
+        from docx import Document
         try:
             if file_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
                 with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as temp_file:
@@ -196,7 +217,7 @@ class FileProcessor:
                 return estimated_pages
                 
         except Exception as e:
-            print(f"Error in page estimation: {str(e)}")
+            logger.exception("error in page estimation", extra={"file_type": file_type})
             # downgrade estimation
             if file_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
                 try:
@@ -226,20 +247,78 @@ class FileProcessor:
                 file_size_kb = len(content) / 1024
                 return max(1, int(file_size_kb / 75))
 
-    async def save_file(self, file: UploadFile, upload_folder: str) -> str:
+    async def save_file(self, file: UploadFile, upload_folder: str, pages: Optional[int] = None) -> str:
         os.makedirs(upload_folder, exist_ok=True)
         
         file_extension = os.path.splitext(file.filename)[1] if file.filename else ""
         file_id = uuid.uuid4()
         file_path = os.path.join(upload_folder, f"{file_id}{file_extension}")
         
+        # written under a temporary name and renamed once complete, so an interrupted
+        # upload (client gone, worker shut down) never leaves a truncated file behind
+        partial_path = f"{file_path}{PARTIAL_SUFFIX}"
         await file.seek(0)
-        async with aiofiles.open(file_path, 'wb') as out_file:
-            while content := await file.read(1024 * 1024):  
-                await out_file.write(content)
+        try:
+            async with aiofiles.open(partial_path, 'wb') as out_file:
+                while content := await file.read(1024 * 1024):  
+                    await out_file.write(content)
+            os.replace(partial_path, file_path)
+        except BaseException:
+            try:
+                os.remove(partial_path)
+            except FileNotFoundError:
+                pass
+            raise
+        if pages is not None:
+            # the count process_file already made, read back by count_saved_file_pages
+            async with aiofiles.open(os.path.join(upload_folder, f"{file_id}{PAGES_SUFFIX}"), 'w') as pages_file:
+                await pages_file.write(str(pages))
         
         return file_id, file_path
 
+    async def count_saved_file_pages(self, file_id: str, upload_folder: str) -> int:
+        # pages of a file save_file stored earlier, looked up by the ID the upload returned
+        try:
+            file_id = str(uuid.UUID(file_id))
+        except ValueError:
+            raise HTTPException(status_code=404, detail="File not found")
+        try:
+            async with aiofiles.open(os.path.join(upload_folder, f"{file_id}{PAGES_SUFFIX}")) as pages_file:
+                return int(await pages_file.read())
+        except (FileNotFoundError, ValueError):
+            # stored before page counts were kept, or the count was cut short: parse the file itself
+            pass
+        file_path = None
+        if os.path.isdir(upload_folder):
+            for extension in EXTENSION_TYPES:
+                candidate = os.path.join(upload_folder, f"{file_id}{extension}")
+                if os.path.exists(candidate):
+                    file_path = candidate
+                    break
+        if file_path is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        async with aiofiles.open(file_path, 'rb') as saved_file:
+            content = await saved_file.read()
+        upload = UploadFile(file=io.BytesIO(content), size=len(content), filename=os.path.basename(file_path))
+        return await self._count_pages(upload, EXTENSION_TYPES[os.path.splitext(file_path)[1]])
+
+    def remove_stale_partials(self, upload_folder: str, max_age_seconds: float) -> int:
+        # leftovers of a process that was killed mid-upload; recent ones may still be written by another worker
+        if not os.path.isdir(upload_folder):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for entry in os.scandir(upload_folder):
+            if entry.name.endswith(PARTIAL_SUFFIX) and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        if removed:
+            logger.info("removed stale partial uploads", extra={"count": removed, "upload_folder": upload_folder})
+        return removed
+
 file_processor = FileProcessor()
 
 def get_file_processor():
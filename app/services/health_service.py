@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Optional
+
+import anyio.to_thread
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.core.shutdown import shutdown_coordinator
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class HealthService:
+    def __init__(self, cache_seconds: float, db_timeout_seconds: float, min_free_disk_mb: int, max_queue_depth: int):
+        self.cache_seconds = cache_seconds
+        self.db_timeout_seconds = db_timeout_seconds
+        self.min_free_disk_bytes = min_free_disk_mb * 1024 * 1024
+        self.max_queue_depth = max_queue_depth
+        self._checks: Optional[Dict[str, Dict[str, Any]]] = None
+        self._checked_at = 0.0
+        # created on first use by the running loop; a new loop (tests, a restarted worker) gets its own
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._ping: Optional[asyncio.Future] = None
+
+    async def readiness(self) -> Dict[str, Any]:
+        # checks arriving while a probe runs (or within cache_seconds of it) share its result
+        if not self._fresh():
+            self._bind_loop()
+            async with self._lock:
+                if not self._fresh():
+                    self._checks = await self._probe()
+                    self._checked_at = time.monotonic()
+        checks = {**self._checks, "draining": {"ok": not shutdown_coordinator.draining}}
+        return {
+            "ready": all(check["ok"] for check in checks.values()),
+            "checked_seconds_ago": round(time.monotonic() - self._checked_at, 3),
+            "checks": checks,
+        }
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock, self._ping = loop, asyncio.Lock(), None
+
+    def _fresh(self) -> bool:
+        return self._checks is not None and time.monotonic() - self._checked_at < self.cache_seconds
+
+    async def _probe(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "database": await self._check_database(),
+            "upload_disk": self._check_disk(settings.UPLOAD_FOLDER),
+            "password_hasher": self._check_queue(password_hasher.queue_depth),
+            "threadpool": self._check_queue(anyio.to_thread.current_default_thread_limiter().statistics().tasks_waiting),
+        }
+
+    async def _check_database(self) -> Dict[str, Any]:
+        def ping() -> None:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+        started = time.perf_counter()
+        # on the default executor, not Starlette's threadpool, so a saturated threadpool can't hide a healthy DB;
+        # a ping stuck on an unreachable host is waited on again instead of starting another one
+        if self._ping is None or self._ping.done():
+            self._ping = asyncio.ensure_future(asyncio.to_thread(ping))
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ping), self.db_timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("readiness: database ping timed out", extra={"timeout_seconds": self.db_timeout_seconds})
+            return {"ok": False, "error": "timeout"}
+        except Exception as e:
+            logger.warning("readiness: database ping failed", extra={"error": type(e).__name__})
+            # class name only, the message may contain the DSN
+            return {"ok": False, "error": type(e).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    def _check_disk(self, folder: str) -> Dict[str, Any]:
+        # the folder is created by the first upload; until then the volume it will live on counts
+        path = os.path.abspath(folder)
+        while not os.path.isdir(path):
+            path = os.path.dirname(path)
+        free = shutil.disk_usage(path).free
+        writable = os.access(path, os.W_OK)
+        return {
+            "ok": writable and free >= self.min_free_disk_bytes,
+            "free_mb": free // (1024 * 1024),
+            "writable": writable,
+        }
+
+    def _check_queue(self, depth: int) -> Dict[str, Any]:
+        return {"ok": depth < self.max_queue_depth, "queue_depth": depth}
+
+
+health_service = HealthService(
+    cache_seconds=settings.HEALTH_CACHE_SECONDS,
+    db_timeout_seconds=settings.HEALTH_DB_TIMEOUT_SECONDS,
+    min_free_disk_mb=settings.HEALTH_MIN_FREE_DISK_MB,
+    max_queue_depth=settings.HEALTH_MAX_QUEUE_DEPTH,
+)
+
+def get_health_service():
+    return health_service
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.partitions import drop_empty_partitions_before, ensure_month_partitions, filter_by_search_id
+from app.models.order import Order
+from app.models.order_archive import OrderArchive
+
+ARCHIVABLE_STATUSES = ("completed", "cancelled")
+
+class OrderArchiveService:
+    def archive_orders(self, db: Session, retention_days: int, batch_size: int) -> int:
+        # moves finished orders older than the retention window, one transaction per batch
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        columns = [column.name for column in Order.__table__.columns]
+        moved = 0
+        while True:
+            ids = db.execute(
+                select(Order.id)
+                .where(Order.status.in_(ARCHIVABLE_STATUSES), Order.created_at < cutoff)
+                .order_by(Order.created_at)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            db.execute(
+                insert(OrderArchive.__table__).from_select(
+                    columns,
+                    select(*(Order.__table__.c[name] for name in columns)).where(Order.id.in_(ids)),
+                )
+            )
+            db.execute(delete(Order).where(Order.id.in_(ids)))
+            db.commit()
+            moved += len(ids)
+        return moved
+
+    def run(self, db: Session, retention_days: int, batch_size: int, months_ahead: int) -> Dict[str, Any]:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        created = ensure_month_partitions(db, months_ahead)
+        archived = self.archive_orders(db, retention_days, batch_size)
+        dropped = drop_empty_partitions_before(db, cutoff)
+        return {"archived": archived, "partitions_created": created, "partitions_dropped": dropped}
+
+    def get_by_search_id(self, db: Session, order_search_id: str) -> Optional[OrderArchive]:
+        return filter_by_search_id(db.query(OrderArchive), OrderArchive, order_search_id).first()
+
+order_archive_service = OrderArchiveService()
+
+def get_order_archive_service():
+    return order_archive_service
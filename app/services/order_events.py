@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event, make_url, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.order import Order
+
+logger = logging.getLogger(__name__)
+
+LISTEN_RECONNECT_MAX_SECONDS = 30.0
+
+
+def build_order_event(order: Order) -> Dict[str, Any]:
+    # built before the flush that bumps updated_at, so the column would still hold the previous change
+    return {
+        "order_id": order.id,
+        "order_search_id": order.order_search_id,
+        "status": order.status,
+        "changed_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class OrderEventBroker:
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._order_subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._admin_subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listen_conn = None
+        self._listen_fd: Optional[int] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    @property
+    def uses_postgres(self) -> bool:
+        return engine.dialect.name == "postgresql"
+
+    # subscriptions
+    def subscribe(self, order_search_id: Optional[str] = None) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if order_search_id is None:
+            self._admin_subscribers.add(queue)
+        else:
+            self._order_subscribers.setdefault(order_search_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, order_search_id: Optional[str] = None) -> None:
+        if order_search_id is None:
+            self._admin_subscribers.discard(queue)
+            return
+        subscribers = self._order_subscribers.get(order_search_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._order_subscribers[order_search_id]
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._admin_subscribers) + sum(len(s) for s in self._order_subscribers.values())
+
+    # fan-out (runs on the event loop)
+    def dispatch(self, payload: Dict[str, Any]) -> None:
+        targets = list(self._admin_subscribers)
+        targets.extend(self._order_subscribers.get(payload.get("order_search_id"), ()))
+        for queue in targets:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # slow consumer, drop the oldest event so the newest status wins
+                queue.get_nowait()
+                queue.put_nowait(payload)
+
+    def close_streams(self) -> None:
+        # None tells every open SSE stream to finish; browsers' EventSource reconnects to a live worker
+        for queue in [*self._admin_subscribers, *(q for s in self._order_subscribers.values() for q in s)]:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    def _dispatch_threadsafe(self, payload: Dict[str, Any]) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self.dispatch, payload)
+
+    # emitting
+    def notify(self, db: Session, order: Order) -> None:
+        # queued on the session and only published once the transaction commits
+        db.info.setdefault("order_events", []).append(build_order_event(order))
+
+    def _before_commit(self, db: Session) -> None:
+        if not self.uses_postgres:
+            return
+        for payload in db.info.get("order_events", []):
+            db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": settings.ORDER_EVENTS_CHANNEL, "payload": json.dumps(payload)},
+            )
+
+    def _after_commit(self, db: Session) -> None:
+        payloads = db.info.pop("order_events", [])
+        if self.uses_postgres:
+            # delivered back to every worker (including this one) by the LISTEN connection
+            return
+        for payload in payloads:
+            self._dispatch_threadsafe(payload)
+
+    def _after_rollback(self, db: Session) -> None:
+        db.info.pop("order_events", None)
+
+    def register_session_events(self) -> None:
+        event.listen(Session, "before_commit", self._before_commit)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    # postgres LISTEN connection
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if not self.uses_postgres:
+            return
+        if settings.DB_POOL_MODE == "null" and not settings.ORDER_EVENTS_LISTEN_URL:
+            # through PgBouncer in transaction mode LISTEN succeeds but never receives anything
+            raise RuntimeError("ORDER_EVENTS_LISTEN_URL must point at postgres directly when DB_POOL_MODE is \"null\"")
+        self._listen(self._connect())
+
+    def _connect(self):
+        import psycopg2
+
+        url = make_url(settings.ORDER_EVENTS_LISTEN_URL) if settings.ORDER_EVENTS_LISTEN_URL else engine.url
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        conn = psycopg2.connect(dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{settings.ORDER_EVENTS_CHANNEL}"')
+        return conn
+
+    def _listen(self, conn) -> None:
+        # the fd is kept because fileno() raises once psycopg2 has closed a broken connection
+        self._listen_conn, self._listen_fd = conn, conn.fileno()
+        self._loop.add_reader(self._listen_fd, self._on_notify)
+
+    def _on_notify(self) -> None:
+        import psycopg2
+
+        conn = self._listen_conn
+        try:
+            conn.poll()
+        except psycopg2.OperationalError:
+            # postgres restarted or the connection was cut; a dead socket stays readable, so stop watching it
+            logger.warning("order events: LISTEN connection lost, reconnecting")
+            self._drop_listen_conn()
+            self._reconnect_task = self._loop.create_task(self._reconnect())
+            return
+        while conn.notifies:
+            notification = conn.notifies.pop(0)
+            try:
+                payload = json.loads(notification.payload)
+            except ValueError:
+                continue
+            self.dispatch(payload)
+
+    async def _reconnect(self) -> None:
+        import psycopg2
+
+        delay = 0.5
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                conn = await asyncio.to_thread(self._connect)
+            except psycopg2.OperationalError as e:
+                delay = min(delay * 2, LISTEN_RECONNECT_MAX_SECONDS)
+                logger.warning("order events: reconnect failed", extra={"error": type(e).__name__, "retry_seconds": delay})
+                continue
+            self._listen(conn)
+            logger.info("order events: LISTEN connection restored")
+            return
+
+    def _drop_listen_conn(self) -> None:
+        conn, self._listen_conn = self._listen_conn, None
+        self._loop.remove_reader(self._listen_fd)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    async def stop(self) -> None:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._listen_conn is not None:
+            self._drop_listen_conn()
+        self._loop = None
+
+order_event_broker = OrderEventBroker(queue_size=settings.SSE_QUEUE_SIZE)
+order_event_broker.register_session_events()
+
+def get_order_event_broker():
+    return order_event_broker
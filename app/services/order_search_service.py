@@ -0,0 +1,55 @@
+import re
+from typing import Any, List, Sequence
+
+from sqlalchemy import func, literal_column, or_, table, column
+from sqlalchemy.orm import Session
+
+from app.models.order import Order
+
+orders_fts = table("orders_fts", column("rowid"))
+
+_fts_token = re.compile(r"\w+", re.UNICODE)
+
+
+class OrderSearchService:
+    def search(self, db: Session, columns: Sequence[Any], term: str, offset: int, limit: int) -> List[Any]:
+        if db.get_bind().dialect.name == "postgresql":
+            query = self._postgres_query(db, columns, term)
+        else:
+            query = self._sqlite_query(db, columns, term)
+        if query is None:
+            return []
+        return query.offset(offset).limit(limit).all()
+
+    def _postgres_query(self, db: Session, columns: Sequence[Any], term: str):
+        tsquery = func.websearch_to_tsquery("simple", term)
+        search_vector = literal_column("orders.search_vector")
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        fragment_fields = (Order.name, Order.email, Order.file_name, Order.notes)
+        rank = func.ts_rank(search_vector, tsquery) + func.greatest(
+            *(func.similarity(field, term) for field in fragment_fields)
+        )
+        return (
+            db.query(*columns)
+            .filter(or_(search_vector.op("@@")(tsquery), *(field.ilike(pattern, escape="\\") for field in fragment_fields)))
+            .order_by(rank.desc(), Order.created_at.desc())
+        )
+
+    def _sqlite_query(self, db: Session, columns: Sequence[Any], term: str):
+        # FTS5 fallback: every word becomes a quoted prefix query, all words must match
+        tokens = _fts_token.findall(term)
+        if not tokens:
+            return None
+        match = " ".join(f'"{token}"*' for token in tokens)
+        return (
+            db.query(*columns)
+            .join(orders_fts, orders_fts.c.rowid == literal_column("orders.rowid"))
+            .filter(literal_column("orders_fts").op("MATCH")(match))
+            .order_by(func.bm25(literal_column("orders_fts")), Order.created_at.desc())
+        )
+
+order_search_service = OrderSearchService()
+
+def get_order_search_service():
+    return order_search_service
@@ -0,0 +1,70 @@
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.order import Order
+from app.models.sync_checkpoint import SyncCheckpoint
+from app.services.order_events import order_event_broker
+from app.services.rollup_service import rollup_service
+from app.services.stripe_service import STRIPE_MAX_CHECKOUT_SECONDS, StripeService
+
+CHECKPOINT_NAME = "stripe_checkout_sessions"
+
+
+class PaymentReconciliationService:
+    async def reconcile(
+        self, db: Session, stripe_service: StripeService, since: Optional[int] = None, dry_run: bool = False
+    ) -> Dict[str, Any]:
+        # marks pending orders paid from completed checkout sessions whose webhook never arrived
+        now = int(time.time())
+        checkpoint = db.get(SyncCheckpoint, CHECKPOINT_NAME)
+        if since is None:
+            since = checkpoint.position if checkpoint else now - settings.PAYMENT_RECONCILE_LOOKBACK_HOURS * 3600
+
+        sessions = await stripe_service.list_completed_checkout_sessions(since)
+        paid_order_ids = {
+            (session.metadata or {}).get("order_id") or session.client_reference_id
+            for session in sessions
+            if session.payment_status == "paid"
+        }
+        paid_order_ids.discard(None)
+
+        # one transaction for every order update and the new high-water mark
+        orders = []
+        if paid_order_ids:
+            orders = (
+                db.query(Order)
+                .filter(Order.id.in_(paid_order_ids), Order.status == "pending")
+                .with_for_update()
+                .all()
+            )
+        for order in orders:
+            order.status = "processing"
+            rollup_service.record_status_change(db, order, "pending")
+            order_event_broker.notify(db, order)
+
+        # sessions created before this have either completed or expired, so later runs can skip them;
+        # sessions can be completed up to Stripe's maximum lifetime after creation, whatever expiry we asked for
+        position = max(since, now - max(STRIPE_MAX_CHECKOUT_SECONDS, settings.STRIPE_CHECKOUT_EXPIRY_MINUTES * 60))
+        if checkpoint is None:
+            checkpoint = SyncCheckpoint(name=CHECKPOINT_NAME, position=position)
+            db.add(checkpoint)
+        else:
+            checkpoint.position = max(checkpoint.position, position)
+
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        return {
+            "sessions": len(sessions),
+            "paid": len(paid_order_ids),
+            "updated": [order.order_search_id for order in orders],
+            "since": since,
+            "position": position,
+        }
+
+
+payment_reconciliation_service = PaymentReconciliationService()
@@ -0,0 +1,115 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# prices per printed side, i.e. per page image after pages_per_side imposition; PRICE_TABLE_PATH
+# points at a JSON file of the same shape to override it
+DEFAULT_PRICE_TABLE: Dict[str, Any] = {
+    "currency": "cny",
+    "per_side": {
+        "A4": {"bw": 0.20, "color": 1.00},
+        "A3": {"bw": 0.40, "color": 2.00},
+    },
+    "sides_multiplier": {"single": 1.0, "double": 1.0},
+    "delivery_fee": {"pickup": 0.0, "delivery": 0.0},
+    "pages_per_side": [1, 2, 4, 6, 9, 16],
+}
+
+
+class PriceTable:
+    def __init__(self, raw: Dict[str, Any]):
+        self.currency = raw["currency"]
+        # resolved once into integer cents per (paper_size, color_mode, sides), so a quote is lookups and integer math
+        self.unit_cents = {
+            (paper_size, color_mode, sides): round(price * multiplier * 100)
+            for paper_size, prices in raw["per_side"].items()
+            for color_mode, price in prices.items()
+            for sides, multiplier in raw["sides_multiplier"].items()
+        }
+        self.delivery_cents = {method: round(fee * 100) for method, fee in raw["delivery_fee"].items()}
+        self.options = {
+            "paper_size": set(raw["per_side"]),
+            "color_mode": {color_mode for prices in raw["per_side"].values() for color_mode in prices},
+            "sides": set(raw["sides_multiplier"]),
+            "delivery_method": set(raw["delivery_fee"]),
+            "pages_per_side": set(raw["pages_per_side"]),
+        }
+
+
+def load_price_table(path: Optional[str]) -> PriceTable:
+    if not path:
+        return PriceTable(DEFAULT_PRICE_TABLE)
+    with open(path) as f:
+        return PriceTable(json.load(f))
+
+
+class PricingService:
+    def __init__(self, table: PriceTable, check_mode: str = "enforce"):
+        self.table = table
+        self.check_mode = check_mode
+
+    def _validate(self, configurations: Sequence[Any]) -> None:
+        for field, allowed in self.table.options.items():
+            unknown = {getattr(configuration, field) for configuration in configurations} - allowed
+            if unknown:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Unsupported {field}: {', '.join(map(str, sorted(unknown)))}",
+                )
+
+    def quote_cents(self, pages: int, configurations: Sequence[Any]) -> List[Tuple[int, int]]:
+        # every candidate in one pass: the imposed side count is computed once per distinct pages_per_side
+        # and the unit price is a dict lookup; returns (printed_sides, amount_cents) per configuration
+        self._validate(configurations)
+        printed_sides = {n: -(-pages // n) for n in {configuration.pages_per_side for configuration in configurations}}
+        unit_cents = self.table.unit_cents
+        delivery_cents = self.table.delivery_cents
+        quotes = []
+        for configuration in configurations:
+            unit = unit_cents.get((configuration.paper_size, configuration.color_mode, configuration.sides))
+            if unit is None:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"No price for {configuration.paper_size} {configuration.color_mode} {configuration.sides}",
+                )
+            sides = printed_sides[configuration.pages_per_side]
+            quotes.append((sides, sides * unit * configuration.copies + delivery_cents[configuration.delivery_method]))
+        return quotes
+
+    def check_amount(self, order: Any, counted_pages: int) -> None:
+        # the client-supplied page count and amount must match the uploaded file and what the server
+        # would have quoted for the same options
+        if self.check_mode == "off":
+            return
+        expected = self.quote_cents(counted_pages, [order])[0][1]
+        if order.pages == counted_pages and round(order.amount * 100) == expected:
+            return
+        logger.warning(
+            "order does not match quote",
+            extra={
+                "pages": order.pages, "counted_pages": counted_pages,
+                "amount": order.amount, "expected": expected / 100, "check_mode": self.check_mode,
+            },
+        )
+        if self.check_mode != "enforce":
+            return
+        if order.pages != counted_pages:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Pages {order.pages} does not match the uploaded file ({counted_pages} pages)",
+            )
+        raise HTTPException(
+            status_code=422,
+            detail=f"Amount {order.amount:.2f} does not match the current price {expected / 100:.2f}",
+        )
+
+pricing_service = PricingService(load_price_table(settings.PRICE_TABLE_PATH), settings.PRICE_CHECK_MODE)
+
+def get_pricing_service():
+    return pricing_service
@@ -0,0 +1,400 @@
+import logging
+import math
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.order import Order
+from app.models.print_batch import PrintBatch
+from app.services.order_events import order_event_broker
+from app.services.rollup_service import rollup_service
+
+logger = logging.getLogger(__name__)
+
+# (paper_size, color_mode, sides): orders with the same key print without touching the printer
+MediaKey = Tuple[str, str, str]
+ACTIVE_STATUSES = ("queued", "printing")
+# advisory transaction lock key serializing schedule() runs
+SCHEDULE_LOCK_KEY = 7_300_501
+
+
+def _aware(value: datetime) -> datetime:
+    # sqlite hands back naive datetimes; everything here is UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def order_impressions(order: Any) -> int:
+    # printed sides over all copies, after pages_per_side imposition
+    return math.ceil(order.pages / (order.pages_per_side or 1)) * (order.copies or 1)
+
+
+class Printer:
+    def __init__(self, name: str, pages_per_minute: int, paper_sizes: Iterable[str], color_modes: Iterable[str]):
+        self.name = name
+        self.pages_per_minute = pages_per_minute
+        self.paper_sizes = set(paper_sizes)
+        self.color_modes = set(color_modes)
+
+    def can_print(self, key: MediaKey) -> bool:
+        paper_size, color_mode, _ = key
+        return paper_size in self.paper_sizes and color_mode in self.color_modes
+
+    def seconds_for(self, impressions: int) -> int:
+        return math.ceil(impressions * 60 / self.pages_per_minute)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "pages_per_minute": self.pages_per_minute,
+            "paper_sizes": sorted(self.paper_sizes),
+            "color_modes": sorted(self.color_modes),
+        }
+
+
+def parse_printers(raw: str) -> List[Printer]:
+    # "office-1:40:A4,A3:bw,color;office-2:60:A4:bw"
+    printers = []
+    for spec in raw.split(";"):
+        if not spec.strip():
+            continue
+        name, pages_per_minute, paper_sizes, color_modes = (part.strip() for part in spec.split(":"))
+        printers.append(Printer(name, int(pages_per_minute), paper_sizes.split(","), color_modes.split(",")))
+    return printers
+
+
+class _PrinterState:
+    # where a printer's queue ends: when it frees up, what media it is set up for, next queue position
+    def __init__(self, printer: Printer, available_at: datetime, last_key: Optional[MediaKey], next_position: int):
+        self.printer = printer
+        self.available_at = available_at
+        self.last_key = last_key
+        self.next_position = next_position
+
+
+class PrintSchedulerService:
+    def __init__(
+        self,
+        printers: List[Printer],
+        sla_minutes: Dict[str, int],
+        max_batch_impressions: int,
+        changeover_seconds: int,
+    ):
+        self.printers = printers
+        self.sla_minutes = sla_minutes
+        self.max_batch_impressions = max_batch_impressions
+        self.changeover_seconds = changeover_seconds
+
+    def due_at(self, order: Any) -> datetime:
+        # older orders and pickups (shorter SLA) come due first
+        sla = self.sla_minutes.get(order.delivery_method, max(self.sla_minutes.values()))
+        return _aware(order.created_at) + timedelta(minutes=sla)
+
+    # planning (pure, no database)
+    def group(self, orders: Iterable[Any]) -> List[Dict[str, Any]]:
+        # one batch per media, split at max_batch_impressions; most urgent batch first
+        by_key: Dict[MediaKey, List[Any]] = defaultdict(list)
+        for order in orders:
+            by_key[(order.paper_size, order.color_mode, order.sides)].append(order)
+
+        batches = []
+        for key, key_orders in by_key.items():
+            key_orders.sort(key=self.due_at)
+            current: List[Any] = []
+            impressions = 0
+            for order in key_orders:
+                size = order_impressions(order)
+                if current and impressions + size > self.max_batch_impressions:
+                    batches.append({"key": key, "orders": current, "impressions": impressions})
+                    current, impressions = [], 0
+                current.append(order)
+                impressions += size
+            batches.append({"key": key, "orders": current, "impressions": impressions})
+        for batch in batches:
+            batch["due_at"] = self.due_at(batch["orders"][0])
+        batches.sort(key=lambda batch: batch["due_at"])
+        return batches
+
+    def assign(self, batches: List[Dict[str, Any]], states: List[_PrinterState]) -> List[Dict[str, Any]]:
+        # earliest deadline first, each batch to the printer that finishes it soonest; a printer already
+        # set up for the batch's media skips the changeover, so same-media work sticks to one printer
+        unassigned = []
+        for batch in batches:
+            best, best_finish = None, None
+            for state in states:
+                if not state.printer.can_print(batch["key"]):
+                    continue
+                changeover = self.changeover_seconds if state.last_key not in (None, batch["key"]) else 0
+                finish = state.available_at + timedelta(
+                    seconds=changeover + state.printer.seconds_for(batch["impressions"])
+                )
+                if best_finish is None or finish < best_finish:
+                    best, best_finish = state, finish
+            if best is None:
+                unassigned.append(batch)
+                continue
+            batch.update(
+                printer=best.printer.name,
+                position=best.next_position,
+                duration_seconds=best.printer.seconds_for(batch["impressions"]),
+                estimated_finish_at=best_finish,
+            )
+            best.available_at, best.last_key = best_finish, batch["key"]
+            best.next_position += 1
+        return unassigned
+
+    # queue state
+    def _timelines(self, db: Session, now: datetime) -> Dict[str, List[Dict[str, Any]]]:
+        # active batches per printer with live start/finish estimates, in print order
+        batches = (
+            db.query(PrintBatch)
+            .filter(PrintBatch.status.in_(ACTIVE_STATUSES))
+            .order_by(PrintBatch.printer, PrintBatch.position)
+            .all()
+        )
+        timelines: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        clock: Dict[str, Tuple[datetime, Optional[MediaKey]]] = {}
+        # the batch being printed goes first, whatever its position
+        for batch in sorted(batches, key=lambda batch: (batch.printer, batch.status != "printing", batch.position)):
+            key = (batch.paper_size, batch.color_mode, batch.sides)
+            t, last_key = clock.get(batch.printer, (now, None))
+            if batch.status == "printing":
+                start = _aware(batch.started_at)
+                finish = max(now, start + timedelta(seconds=batch.duration_seconds))
+            else:
+                if last_key not in (None, key):
+                    t += timedelta(seconds=self.changeover_seconds)
+                start, finish = t, t + timedelta(seconds=batch.duration_seconds)
+            clock[batch.printer] = (finish, key)
+            timelines[batch.printer].append({"batch": batch, "estimated_start_at": start, "estimated_finish_at": finish})
+        return timelines
+
+    def _printer_states(self, db: Session, now: datetime) -> List[_PrinterState]:
+        timelines = self._timelines(db, now)
+        states = []
+        for printer in self.printers:
+            timeline = timelines.get(printer.name, [])
+            if timeline:
+                last = timeline[-1]["batch"]
+                states.append(_PrinterState(
+                    printer, timeline[-1]["estimated_finish_at"], (last.paper_size, last.color_mode, last.sides),
+                    max(entry["batch"].position for entry in timeline) + 1,
+                ))
+            else:
+                states.append(_PrinterState(printer, now, None, 0))
+        return states
+
+    def _batch_dict(self, batch: PrintBatch, order_search_ids: List[str], **extra) -> Dict[str, Any]:
+        return {
+            "id": batch.id,
+            "printer": batch.printer,
+            "position": batch.position,
+            "status": batch.status,
+            "paper_size": batch.paper_size,
+            "color_mode": batch.color_mode,
+            "sides": batch.sides,
+            "order_count": batch.order_count,
+            "impressions": batch.impressions,
+            "duration_seconds": batch.duration_seconds,
+            "due_at": _aware(batch.due_at),
+            "started_at": batch.started_at and _aware(batch.started_at),
+            "order_search_ids": order_search_ids,
+            **extra,
+        }
+
+    def _order_search_ids(self, db: Session, batch_ids: List[str]) -> Dict[str, List[str]]:
+        search_ids: Dict[str, List[str]] = defaultdict(list)
+        if batch_ids:
+            rows = (
+                db.query(Order.print_batch_id, Order.order_search_id)
+                .filter(Order.print_batch_id.in_(batch_ids))
+                .order_by(Order.created_at)
+                .all()
+            )
+            for batch_id, order_search_id in rows:
+                search_ids[batch_id].append(order_search_id)
+        return search_ids
+
+    def queue(self, db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or datetime.now(timezone.utc)
+        timelines = self._timelines(db, now)
+        search_ids = self._order_search_ids(db, [entry["batch"].id for entries in timelines.values() for entry in entries])
+        configured = {printer.name: printer for printer in self.printers}
+        printers = []
+        # printers removed from the configuration still show while they have batches
+        for name in list(configured) + sorted(set(timelines) - set(configured)):
+            printer = configured.get(name)
+            printers.append({
+                **(printer.as_dict() if printer else {"name": name, "configured": False}),
+                "batches": [
+                    self._batch_dict(
+                        entry["batch"], search_ids[entry["batch"].id],
+                        estimated_start_at=entry["estimated_start_at"],
+                        estimated_finish_at=entry["estimated_finish_at"],
+                        late=entry["estimated_finish_at"] > _aware(entry["batch"].due_at),
+                    )
+                    for entry in timelines.get(name, [])
+                ],
+            })
+        unbatched = (
+            db.query(Order.id).filter(Order.status == "processing", Order.print_batch_id.is_(None)).count()
+        )
+        return {"printers": printers, "unbatched_orders": unbatched}
+
+    # scheduling
+    def schedule(
+        self, db: Session, now: Optional[datetime] = None, dry_run: bool = False, wait: bool = False
+    ) -> Dict[str, Any]:
+        # batches every processing order that is not in a batch yet and queues it on a printer
+        now = now or datetime.now(timezone.utc)
+        if db.get_bind().dialect.name == "postgresql":
+            # one run at a time (API and job), so queue positions are never handed out twice; released at
+            # commit/rollback. A request gets a 409 instead of holding a worker thread until the other run ends,
+            # only jobs (wait=True) queue up behind it and then see its batches
+            if wait:
+                db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEDULE_LOCK_KEY})
+            elif not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SCHEDULE_LOCK_KEY}).scalar():
+                raise HTTPException(status_code=409, detail="A schedule run is already in progress")
+        orders = (
+            db.query(Order)
+            .filter(Order.status == "processing", Order.print_batch_id.is_(None))
+            .order_by(Order.created_at)
+            .with_for_update()
+            .all()
+        )
+
+        batches = self.group(orders)
+        unassigned = self.assign(batches, self._printer_states(db, now))
+        assigned = [batch for batch in batches if "printer" in batch]
+        for batch in unassigned:
+            logger.warning(
+                "no printer for batch",
+                extra={"paper_size": batch["key"][0], "color_mode": batch["key"][1], "orders": len(batch["orders"])},
+            )
+
+        result_batches = []
+        for batch in assigned:
+            paper_size, color_mode, sides = batch["key"]
+            print_batch = PrintBatch(
+                id=str(uuid.uuid4()),
+                printer=batch["printer"],
+                position=batch["position"],
+                status="queued",
+                paper_size=paper_size,
+                color_mode=color_mode,
+                sides=sides,
+                order_count=len(batch["orders"]),
+                impressions=batch["impressions"],
+                duration_seconds=batch["duration_seconds"],
+                due_at=batch["due_at"],
+            )
+            result_batches.append(self._batch_dict(
+                print_batch, [order.order_search_id for order in batch["orders"]],
+                estimated_finish_at=batch["estimated_finish_at"],
+                late=batch["estimated_finish_at"] > batch["due_at"],
+            ))
+            if not dry_run:
+                db.add(print_batch)
+                for order in batch["orders"]:
+                    order.print_batch_id = print_batch.id
+
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        logger.info(
+            "print batches scheduled",
+            extra={"orders": len(orders), "batches": len(assigned), "unassigned": len(unassigned), "dry_run": dry_run},
+        )
+        return {
+            "dry_run": dry_run,
+            "orders": len(orders),
+            "batches": result_batches,
+            "unschedulable": [
+                {"paper_size": batch["key"][0], "color_mode": batch["key"][1], "sides": batch["key"][2],
+                 "order_search_ids": [order.order_search_id for order in batch["orders"]]}
+                for batch in unassigned
+            ],
+        }
+
+    # batch lifecycle (staff or the fake printer)
+    def _get_batch(self, db: Session, batch_id: str) -> PrintBatch:
+        batch = db.query(PrintBatch).filter(PrintBatch.id == batch_id).with_for_update().first()
+        if not batch:
+            raise HTTPException(status_code=404, detail="print batch not found")
+        return batch
+
+    def next_batch(self, db: Session, printer: str) -> Optional[PrintBatch]:
+        # the batch being printed, otherwise the head of the queue
+        return (
+            db.query(PrintBatch)
+            .filter(PrintBatch.printer == printer, PrintBatch.status.in_(ACTIVE_STATUSES))
+            .order_by(PrintBatch.status != "printing", PrintBatch.position)
+            .first()
+        )
+
+    def start_batch(self, db: Session, batch_id: str) -> Dict[str, Any]:
+        batch = self._get_batch(db, batch_id)
+        if batch.status != "queued":
+            raise HTTPException(status_code=409, detail=f"print batch is {batch.status}")
+        busy = (
+            db.query(PrintBatch.id)
+            .filter(PrintBatch.printer == batch.printer, PrintBatch.status == "printing")
+            .first()
+        )
+        if busy:
+            raise HTTPException(status_code=409, detail=f"{batch.printer} is already printing batch {busy.id}")
+        batch.status = "printing"
+        batch.started_at = datetime.now(timezone.utc)
+        db.commit()
+        return self._batch_dict(batch, self._order_search_ids(db, [batch.id])[batch.id])
+
+    def complete_batch(self, db: Session, batch_id: str) -> Dict[str, Any]:
+        # completes the batch's orders that are still processing (an admin may have cancelled some meanwhile)
+        batch = self._get_batch(db, batch_id)
+        if batch.status != "printing":
+            raise HTTPException(status_code=409, detail=f"print batch is {batch.status}")
+        orders = db.query(Order).filter(Order.print_batch_id == batch.id).with_for_update().all()
+        for order in orders:
+            if order.status != "processing":
+                continue
+            previous_status = order.status
+            order.status = "completed"
+            order.completed_at = datetime.now()
+            rollup_service.record_status_change(db, order, previous_status)
+            order_event_broker.notify(db, order)
+        batch.status = "done"
+        batch.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        return self._batch_dict(batch, [order.order_search_id for order in orders])
+
+    def cancel_batch(self, db: Session, batch_id: str) -> Dict[str, Any]:
+        # its orders go back to unbatched and are picked up by the next schedule run
+        batch = self._get_batch(db, batch_id)
+        if batch.status not in ACTIVE_STATUSES:
+            raise HTTPException(status_code=409, detail=f"print batch is {batch.status}")
+        orders = db.query(Order).filter(Order.print_batch_id == batch.id).with_for_update().all()
+        released = []
+        for order in orders:
+            if order.status == "processing":
+                order.print_batch_id = None
+                released.append(order.order_search_id)
+        batch.status = "cancelled"
+        db.commit()
+        return self._batch_dict(batch, released)
+
+
+print_scheduler_service = PrintSchedulerService(
+    printers=parse_printers(settings.PRINTERS_RAW),
+    sla_minutes={"pickup": settings.PRINT_SLA_MINUTES_PICKUP, "delivery": settings.PRINT_SLA_MINUTES_DELIVERY},
+    max_batch_impressions=settings.PRINT_BATCH_MAX_IMPRESSIONS,
+    changeover_seconds=settings.PRINT_CHANGEOVER_SECONDS,
+)
+
+def get_print_scheduler_service():
+    return print_scheduler_service
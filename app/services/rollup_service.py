@@ -0,0 +1,128 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.order import Order
+from app.models.order_archive import OrderArchive
+from app.models.order_rollup import OrderDailyRollup
+from app.schemas.order_schema import target_timezone
+
+PAID_STATUSES = {"processing", "completed"}
+ROLLUP_DIMENSIONS = ("color_mode", "paper_size", "delivery_method")
+ROLLUP_MEASURES = ("paid_orders", "paid_pages", "revenue", "completed_orders", "completed_pages")
+ROLLUP_GROUPS = ("day",) + ROLLUP_DIMENSIONS
+
+RollupKey = Tuple[date, str, str, str]
+
+
+def _rollup_key(order: Any) -> RollupKey:
+    created_at = order.created_at or datetime.now(timezone.utc)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (
+        created_at.astimezone(target_timezone).date(),
+        order.color_mode or "unknown",
+        order.paper_size or "unknown",
+        order.delivery_method or "unknown",
+    )
+
+
+def _measures(order: Any, status: Optional[str]) -> Dict[str, float]:
+    printed = (order.pages or 0) * (order.copies or 1)
+    paid = status in PAID_STATUSES
+    completed = status == "completed"
+    return {
+        "paid_orders": int(paid),
+        "paid_pages": printed if paid else 0,
+        "revenue": order.amount if paid else 0.0,
+        "completed_orders": int(completed),
+        "completed_pages": printed if completed else 0,
+    }
+
+
+class RollupService:
+    def record_status_change(self, db: Session, order: Order, previous_status: Optional[str]) -> None:
+        # call after setting order.status; runs in the caller's transaction
+        before = _measures(order, previous_status)
+        after = _measures(order, order.status)
+        delta = {name: after[name] - before[name] for name in ROLLUP_MEASURES}
+        if any(delta.values()):
+            self._increment(db, _rollup_key(order), delta)
+        if any(value < 0 for value in delta.values()):
+            self._remove_if_empty(db, _rollup_key(order))
+
+    def _increment(self, db: Session, key: RollupKey, delta: Dict[str, float]) -> None:
+        dialect = db.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        table = OrderDailyRollup.__table__
+        statement = insert(table).values(**dict(zip(ROLLUP_GROUPS, key)), **delta)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(ROLLUP_GROUPS),
+            set_={name: table.c[name] + statement.excluded[name] for name in ROLLUP_MEASURES},
+        )
+        db.execute(statement)
+
+    def _remove_if_empty(self, db: Session, key: RollupKey) -> None:
+        # a cancelled payment can leave a row with nothing paid; rebuild() never creates those, so drop it
+        table = OrderDailyRollup.__table__
+        db.execute(
+            delete(table).where(
+                *(table.c[name] == value for name, value in zip(ROLLUP_GROUPS, key)),
+                table.c.paid_orders == 0,
+                table.c.completed_orders == 0,
+            )
+        )
+
+    def rebuild(self, db: Session, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        # recompute rollups from live and archived orders, optionally for a day range
+        columns = ("created_at", "status", "pages", "copies", "amount") + ROLLUP_DIMENSIONS
+        selects = []
+        for model in (Order, OrderArchive):
+            query = select(*(model.__table__.c[name] for name in columns)).where(model.status.in_(PAID_STATUSES))
+            # a day of slack on each side, exact local days are filtered below
+            if start:
+                query = query.where(model.created_at >= datetime.combine(start - timedelta(days=1), time.min))
+            if end:
+                query = query.where(model.created_at < datetime.combine(end + timedelta(days=2), time.min))
+            selects.append(query)
+        sources = union_all(*selects).subquery()
+
+        totals: Dict[RollupKey, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(ROLLUP_MEASURES, 0))
+        for row in db.execute(select(sources)).yield_per(1000):
+            key = _rollup_key(row)
+            if (start and key[0] < start) or (end and key[0] > end):
+                continue
+            for name, value in _measures(row, row.status).items():
+                totals[key][name] += value
+
+        clear = delete(OrderDailyRollup)
+        if start:
+            clear = clear.where(OrderDailyRollup.day >= start)
+        if end:
+            clear = clear.where(OrderDailyRollup.day <= end)
+        db.execute(clear)
+        db.add_all(
+            OrderDailyRollup(**dict(zip(ROLLUP_GROUPS, key)), **measures) for key, measures in totals.items()
+        )
+        db.commit()
+        return len(totals)
+
+    def summarize(self, db: Session, start: date, end: date, group_by: List[str]) -> List[Dict[str, Any]]:
+        groups = [getattr(OrderDailyRollup, name) for name in group_by]
+        rows = (
+            db.query(*groups, *(func.sum(getattr(OrderDailyRollup, name)).label(name) for name in ROLLUP_MEASURES))
+            .filter(OrderDailyRollup.day >= start, OrderDailyRollup.day <= end)
+            .group_by(*groups)
+            .order_by(*groups)
+            .all()
+        )
+        return [row._asdict() for row in rows]
+
+rollup_service = RollupService()
+
+def get_rollup_service():
+    return rollup_service
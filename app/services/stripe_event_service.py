@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.order import Order
+from app.models.stripe_event import StripeEvent
+from app.services.order_events import order_event_broker
+from app.services.rollup_service import rollup_service
+
+PAYMENT_EVENTS = {"checkout.session.completed", "checkout.session.async_payment_succeeded"}
+MAX_RETRY_DELAY_SECONDS = 3600
+
+logger = logging.getLogger(__name__)
+
+
+class StripeEventConsumer:
+    def __init__(self, batch_size: int = 50, poll_seconds: float = 5, max_attempts: int = 8, retry_base_seconds: float = 30):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    # intake (webhook request)
+    def record(self, db: Session, event_id: str, event_type: str, payload: str) -> bool:
+        # returns False for a redelivery of an event we already have
+        dialect = db.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert(StripeEvent.__table__).values(
+            id=event_id, type=event_type, payload=payload, status="pending", attempts=0,
+        ).on_conflict_do_nothing(index_elements=["id"])
+        inserted = db.execute(statement).rowcount == 1
+        db.commit()
+        return inserted
+
+    def wake(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    # processing
+    def process_batch(self, db: Session) -> int:
+        now = datetime.now(timezone.utc)
+        query = (
+            db.query(StripeEvent)
+            .filter(StripeEvent.status == "pending", StripeEvent.next_attempt_at <= now)
+            .order_by(StripeEvent.received_at)
+            .limit(self.batch_size)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            # every worker runs a consumer; each claims a disjoint batch
+            query = query.with_for_update(skip_locked=True)
+        events = query.all()
+        for stripe_event in events:
+            try:
+                # a savepoint per event so one bad event does not undo the rest of the batch
+                with db.begin_nested():
+                    handled = self._apply(db, stripe_event.type, json.loads(stripe_event.payload)["data"]["object"])
+                stripe_event.status = "processed" if handled else "ignored"
+                stripe_event.processed_at = now
+                stripe_event.last_error = None
+            except Exception as e:
+                stripe_event.attempts += 1
+                stripe_event.last_error = repr(e)[:2000]
+                if stripe_event.attempts >= self.max_attempts:
+                    # dead letter: left for inspection and `python -m app.jobs.process_stripe_events --requeue-dead`
+                    stripe_event.status = "dead"
+                else:
+                    delay = min(self.retry_base_seconds * 2 ** (stripe_event.attempts - 1), MAX_RETRY_DELAY_SECONDS)
+                    stripe_event.next_attempt_at = now + timedelta(seconds=delay)
+        db.commit()
+        return len(events)
+
+    def _apply(self, db: Session, event_type: str, data: Dict[str, Any]) -> bool:
+        if event_type not in PAYMENT_EVENTS or data.get("payment_status") != "paid":
+            return False
+        order_id = (data.get("metadata") or {}).get("order_id") or data.get("client_reference_id")
+        order = db.query(Order).filter(Order.id == order_id).with_for_update().first()
+        if order is None:
+            raise LookupError(f"order {order_id} not found")
+        if order.status == "pending":
+            order.status = "processing"
+            rollup_service.record_status_change(db, order, "pending")
+            order_event_broker.notify(db, order)
+        return True
+
+    def requeue_dead(self, db: Session) -> int:
+        count = (
+            db.query(StripeEvent)
+            .filter(StripeEvent.status == "dead")
+            .update(
+                {"status": "pending", "attempts": 0, "next_attempt_at": datetime.now(timezone.utc)},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return count
+
+    def _process_once(self) -> int:
+        with SessionLocal() as db:
+            return self.process_batch(db)
+
+    # background loop, one per worker
+    async def start(self) -> None:
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                processed = await asyncio.to_thread(self._process_once)
+            except Exception:
+                logger.exception("stripe event batch failed")
+                processed = 0
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self, timeout: float = 0.0) -> None:
+        # lets a batch that is already running commit (up to timeout) instead of abandoning it;
+        # unprocessed events stay in stripe_events and are picked up by the next worker
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            if timeout > 0:
+                await asyncio.wait({self._task}, timeout=timeout)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+
+
+stripe_event_consumer = StripeEventConsumer(
+    batch_size=settings.STRIPE_EVENT_BATCH_SIZE,
+    poll_seconds=settings.STRIPE_EVENT_POLL_SECONDS,
+    max_attempts=settings.STRIPE_EVENT_MAX_ATTEMPTS,
+    retry_base_seconds=settings.STRIPE_EVENT_RETRY_BASE_SECONDS,
+)
+
+def get_stripe_event_consumer():
+    return stripe_event_consumer
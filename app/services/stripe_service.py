@@ -1,14 +1,61 @@
-import stripe
+import logging
+import time
+from datetime import datetime, timezone
 from app.core.config import settings
+from app.core.metrics import track_stripe_call
 from app.models.order import Order
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+if TYPE_CHECKING:
+    import stripe
+
+logger = logging.getLogger(__name__)
+
+# the longest a checkout session may stay open
+STRIPE_MAX_CHECKOUT_SECONDS = 24 * 3600
 
 class StripeService:
     def __init__(self):
-        stripe.api_key = settings.STRIPE_SECRET_KEY
+        # the stripe SDK is slow to import; it is loaded on first use, not at app startup
+        self._client: Optional["stripe.StripeClient"] = None
+        self._http_client: Optional["stripe.HTTPXClient"] = None
+    
+    @property
+    def client(self) -> "stripe.StripeClient":
+        if self._client is None:
+            import httpx
+            import stripe
+            stripe.api_key = settings.STRIPE_SECRET_KEY
+            # one pooled keep-alive httpx.AsyncClient shared by every request, so Stripe calls never block the loop
+            self._http_client = stripe.HTTPXClient(
+                timeout=httpx.Timeout(settings.STRIPE_TIMEOUT_SECONDS, connect=settings.STRIPE_CONNECT_TIMEOUT_SECONDS),
+            )
+            self._client = stripe.StripeClient(
+                settings.STRIPE_SECRET_KEY,
+                http_client=self._http_client,
+                max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+                base_addresses={"api": settings.STRIPE_API_BASE} if settings.STRIPE_API_BASE else {},
+            )
+        return self._client
+    
+    async def close(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.close_async()
+            self._http_client = None
+            self._client = None
     
     async def create_checkout_session(self, order: Order) -> Dict[str, Any]:
         try:
+            amount_cents = int(order.amount * 100)
+            # Stripe rejects a reused key with other parameters, so expires_at comes from the minute that is
+            # in the key: concurrent requests within it are identical and get the same session back.
+            # The previous session ID is in the key so an expired session is really replaced.
+            minute = int(time.time()) // 60
+            expires_at = min(
+                (minute + 1) * 60 + settings.STRIPE_CHECKOUT_EXPIRY_MINUTES * 60,
+                minute * 60 + STRIPE_MAX_CHECKOUT_SECONDS,
+            )
+            idempotency_key = f"checkout-{order.id}-{amount_cents}-{order.checkout_session_id or 'first'}-{minute}"
             line_items = [{
                 'price_data': {
                     'currency': 'cny',
@@ -16,27 +63,30 @@ class StripeService:
                         'name': f'Print Order #{order.id}',
                         'description': f'Print Service: {order.pages} pages, {order.copies} copies, {"Color" if order.color_mode == "color" else "Black & White"}',
                     },
-                    'unit_amount': int(order.amount * 100),
+                    'unit_amount': amount_cents,
                 },
                 'quantity': 1,
             }]
             
-            checkout_session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=line_items,
-                mode='payment',
-                success_url=f"{settings.FRONTEND_URL}/orders/{order.id}?payment_success=true",
-                cancel_url=f"{settings.FRONTEND_URL}/orders/{order.id}?payment_canceled=true",
-                client_reference_id=order.id,
-                customer_email=order.email,
-                metadata={
-                    'order_id': order.id,
-                }
-            )
+            with track_stripe_call("checkout.sessions.create"):
+                checkout_session = await self.client.checkout.sessions.create_async({
+                    'payment_method_types': ['card'],
+                    'line_items': line_items,
+                    'mode': 'payment',
+                    'success_url': f"{settings.FRONTEND_URL}/orders/{order.id}?payment_success=true",
+                    'cancel_url': f"{settings.FRONTEND_URL}/orders/{order.id}?payment_canceled=true",
+                    'client_reference_id': order.id,
+                    'customer_email': order.email,
+                    'metadata': {
+                        'order_id': order.id,
+                    },
+                    'expires_at': expires_at,
+                }, {'idempotency_key': idempotency_key})
             
             return {
                 'session_id': checkout_session.id,
-                'url': checkout_session.url
+                'url': checkout_session.url,
+                'expires_at': datetime.fromtimestamp(checkout_session.expires_at, timezone.utc),
             }
             
         except Exception as e:
@@ -44,17 +94,19 @@ class StripeService:
     
     async def verify_payment(self, session_id: str, order_id: str) -> Dict[str, Any]:
         try:
-            print(f"Verifying payment for session: {session_id}")
-            print(f"Order ID: {order_id}")
-            print(f"Using Stripe API key: {stripe.api_key[:10]}...") 
-            session = stripe.checkout.Session.retrieve(session_id)
+            logger.debug("verifying payment", extra={"session_id": session_id, "order_id": order_id})
+            with track_stripe_call("checkout.sessions.retrieve"):
+                session = await self.client.checkout.sessions.retrieve_async(session_id)
             
             if session.metadata.get('order_id') != order_id:
-                print(f"Payment session does not match order: {session.metadata.get('order_id')} != {order_id}")
+                logger.warning(
+                    "payment session does not match order",
+                    extra={"session_id": session_id, "order_id": order_id, "session_order_id": session.metadata.get('order_id')},
+                )
                 raise Exception("Payment session does not match order")
             
             payment_status = session.payment_status
-            print(f"Payment status: {payment_status}")
+            logger.debug("payment status", extra={"session_id": session_id, "payment_status": payment_status})
             return {
                 'order_id': order_id,
                 'payment_status': payment_status,
@@ -65,29 +117,29 @@ class StripeService:
         except Exception as e:
             raise Exception(f"Payment verification failed: {str(e)}")
     
-    async def handle_webhook(self, payload: bytes, sig_header: str) -> Dict[str, Any]:
+    async def list_completed_checkout_sessions(self, created_after: int, page_size: int = 100) -> List["stripe.checkout.Session"]:
+        # every completed session created after the unix timestamp, in bulk pages
+        sessions: List["stripe.checkout.Session"] = []
+        params: Dict[str, Any] = {'status': 'complete', 'created': {'gt': created_after}, 'limit': page_size}
+        while True:
+            with track_stripe_call("checkout.sessions.list"):
+                page = await self.client.checkout.sessions.list_async(params)
+            sessions.extend(page.data)
+            if not page.has_more or not page.data:
+                return sessions
+            params['starting_after'] = page.data[-1].id
+    
+    def construct_webhook_event(self, payload: bytes, sig_header: str) -> "stripe.Event":
+        # signature check only (local HMAC); the event is applied later by StripeEventConsumer
+        import stripe
         try:
-            event = stripe.Webhook.construct_event(
+            return stripe.Webhook.construct_event(
                 payload=payload,
                 sig_header=sig_header,
                 secret=settings.STRIPE_WEBHOOK_SECRET
             )
-            
-            if event['type'] == 'checkout.session.completed':
-                session = event['data']['object']
-                order_id = session.metadata.get('order_id')
-                
-                return {
-                    'event_type': event['type'],
-                    'order_id': order_id,
-                    'payment_status': session.payment_status,
-                    'is_paid': session.payment_status == 'paid'
-                }
-            
-            return {'event_type': event['type']}
-            
         except Exception as e:
-            raise Exception(f"Failed to handle webhook: {str(e)}")
+            raise Exception(f"Failed to verify webhook: {str(e)}")
 
 stripe_service = StripeService()
 
@@ -3,6 +3,7 @@ from typing import Optional
 
 from app.models.user import User
 from app.schemas.user_schema import UserUpdate
+from app.core.security import user_cache
 
 class UserService:
     def update_user_profile(self, db: Session, user: User, user_update: UserUpdate) -> User:
@@ -12,6 +13,17 @@ class UserService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        user_cache.invalidate(user.username)
+        return user
+    
+    def update_user_role(self, db: Session, user: User, role: str) -> User:
+        user.role = role
+        # tokens carry the role, so the old ones have to go
+        user.token_version = (user.token_version or 0) + 1
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        user_cache.invalidate(user.username)
         return user
     
     def get_user_by_id(self, db: Session, user_id: int) -> Optional[User]:
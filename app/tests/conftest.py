@@ -0,0 +1,107 @@
+import asyncio
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+# settings are read at import time, so the environment is set up before anything from app is imported
+WORK_DIR = Path(tempfile.mkdtemp(prefix="printer-tests-"))
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{WORK_DIR / 'test.db'}"
+os.environ["UPLOAD_FOLDER"] = str(WORK_DIR / "uploads")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+for name in ("APP_NAME", "FRONTEND_URL", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB", "POSTGRES_HOST",
+             "POSTGRES_URL", "STRIPE_SECRET_KEY", "STRIPE_WEBHOOK_SECRET"):
+    os.environ.setdefault(name, "test")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import create_access_token, get_password_hash, user_cache  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+ORDER = {
+    "file_name": "document.pdf", "file_id": "file", "pages": 3, "color_mode": "bw", "sides": "single",
+    "paper_size": "A4", "orientation": "portrait", "pages_per_side": 1, "copies": 1, "amount": 0.6,
+    "delivery_method": "pickup", "email": "bob@example.com", "name": "Bob", "phone": "0412 345 678",
+}
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+    user_cache.clear()
+
+
+@pytest.fixture
+def order_payload():
+    # backed by a stored 3-page PDF, as if it had been uploaded, so the server-side page count matches
+    from PyPDF2 import PdfWriter
+
+    file_id = str(uuid.uuid4())
+    writer = PdfWriter()
+    for _ in range(ORDER["pages"]):
+        writer.add_blank_page(width=595, height=842)
+    os.makedirs(settings.UPLOAD_FOLDER, exist_ok=True)
+    with open(os.path.join(settings.UPLOAD_FOLDER, f"{file_id}.pdf"), "wb") as f:
+        writer.write(f)
+    return {**ORDER, "file_id": file_id}
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def queries_on_event_loop():
+    # statements executed on a thread that is running an event loop, i.e. blocking it
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def client():
+    # no lifespan: shutting it down would drain the process-wide coordinator and password hasher
+    return TestClient(app)
+
+
+def _auth_headers(db, username: str, role: str) -> dict:
+    db.add(User(username=username, email=f"{username}@example.com", hashed_password=get_password_hash("password123"), role=role))
+    db.commit()
+    token = create_access_token({"sub": username}, role=role)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_headers(db):
+    return _auth_headers(db, "admin", "admin")
+
+
+@pytest.fixture
+def user_headers(db):
+    return _auth_headers(db, "bob", "user")
@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.security import password_hasher, pwd_context
+from app.models.user import User
+
+NEW_USER = {"username": "carol", "email": "carol@example.com", "password": "password123"}
+
+
+@pytest.fixture(autouse=True)
+def no_queries_on_the_event_loop(queries_on_event_loop):
+    yield
+    assert [statement for statement in queries_on_event_loop if "users" in statement] == []
+
+
+def _login(client, username: str, password: str):
+    return client.post("/api/auth/login", data={"username": username, "password": password})
+
+
+def test_register_then_login(client):
+    response = client.post("/api/auth/register", json=NEW_USER)
+    assert response.status_code == 200
+    assert response.json()["username"] == "carol"
+    assert client.post("/api/auth/register", json=NEW_USER).status_code == 400
+
+    assert _login(client, "carol", "wrong-password").status_code == 401
+    response = _login(client, "carol@example.com", "password123")
+    assert response.status_code == 200
+    assert response.json()["role"] == "user"
+
+
+def test_login_upgrades_hashes_made_with_another_cost(client, db):
+    cheap = pwd_context.hash("password123", rounds=5)
+    db.add(User(username="dave", email="dave@example.com", hashed_password=cheap))
+    db.commit()
+
+    assert _login(client, "dave", "password123").status_code == 200
+    db.expire_all()
+    assert db.query(User).filter(User.username == "dave").one().hashed_password != cheap
+
+
+def test_reset_password_signs_out_other_sessions(client, user_headers):
+    response = client.post(
+        "/api/auth/reset-password",
+        json={"current_password": "password123", "new_password": "password456"},
+        headers=user_headers,
+    )
+    assert response.status_code == 200
+    fresh = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    assert client.get("/api/orders/my", headers=user_headers).status_code == 401
+    assert client.get("/api/orders/my", headers=fresh).status_code == 200
+    assert _login(client, "bob", "password456").status_code == 200
+
+
+def test_admin_reset_user_password(client, admin_headers, user_headers):
+    params = {"user_email": "bob@example.com", "new_password": "password789"}
+    assert client.post("/api/auth/reset-user-password", params=params, headers=user_headers).status_code == 403
+    assert client.post("/api/auth/reset-user-password", params=params, headers=admin_headers).status_code == 200
+    assert _login(client, "bob", "password789").status_code == 200
+    assert password_hasher.stats()["hash"]["count"] >= 1
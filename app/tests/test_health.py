@@ -0,0 +1,122 @@
+import asyncio
+import shutil
+import threading
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+
+import app.main as main
+import app.services.health_service as health_module
+from app.core.config import settings
+from app.core.shutdown import shutdown_coordinator
+from app.services.health_service import HealthService
+
+
+def test_db_pool_stats_are_admin_only(client, admin_headers, user_headers):
+    assert client.get("/health/db-pool").status_code == 401
+    assert client.get("/health/db-pool", headers=user_headers).status_code == 403
+
+    response = client.get("/health/db-pool", headers=admin_headers)
+    assert response.status_code == 200
+    assert "url" not in response.json()["primary"]
+
+
+def test_password_hasher_stats_are_admin_only(client, admin_headers, user_headers):
+    assert client.get("/health/password-hasher").status_code == 401
+    assert client.get("/health/password-hasher", headers=user_headers).status_code == 403
+    assert client.get("/health/password-hasher", headers=admin_headers).json()["capacity"] > 0
+
+
+@pytest.fixture
+def readiness(monkeypatch, tmp_path):
+    # a service of its own, so the cached result of one test never answers the next
+    service = HealthService(cache_seconds=60, db_timeout_seconds=2, min_free_disk_mb=1, max_queue_depth=10)
+    monkeypatch.setattr(main, "health_service", service)
+    monkeypatch.setattr(settings, "UPLOAD_FOLDER", str(tmp_path))
+    return service
+
+
+def test_readiness_hides_the_checks_from_anonymous_callers(client, admin_headers, user_headers, readiness):
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json() == {"ready": True}
+    assert response.headers["cache-control"] == "no-store"
+
+    assert client.get("/health/ready/details").status_code == 401
+    assert client.get("/health/ready/details", headers=user_headers).status_code == 403
+    checks = client.get("/health/ready/details", headers=admin_headers).json()["checks"]
+    assert set(checks) == {"database", "upload_disk", "password_hasher", "threadpool", "draining"}
+    assert all(check["ok"] for check in checks.values())
+
+
+def test_readiness_probes_once_per_cache_window(client, monkeypatch, readiness):
+    pings = []
+    monkeypatch.setattr(health_module, "engine", _CountingEngine(pings))
+    for _ in range(3):
+        assert client.get("/health/ready").json() == {"ready": True}
+    assert len(pings) == 1
+
+    readiness.cache_seconds = 0
+    client.get("/health/ready")
+    assert len(pings) == 2
+
+
+def test_full_upload_disk_is_not_ready(client, admin_headers, monkeypatch, readiness):
+    monkeypatch.setattr(health_module.shutil, "disk_usage", lambda path: shutil._ntuple_diskusage(100, 100, 0))
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {"ready": False}
+    assert client.get("/health/ready/details", headers=admin_headers).json()["checks"]["upload_disk"] == {
+        "ok": False, "free_mb": 0, "writable": True,
+    }
+
+
+def test_refused_database_is_not_ready(client, admin_headers, monkeypatch, readiness, tmp_path):
+    monkeypatch.setattr(health_module, "engine", create_engine(f"sqlite:///{tmp_path}/missing/app.db"))
+    assert client.get("/health/ready").status_code == 503
+    database = client.get("/health/ready/details", headers=admin_headers).json()["checks"]["database"]
+    # the class name only, never the message with the DSN in it
+    assert database == {"ok": False, "error": "OperationalError"}
+
+
+def test_draining_worker_is_not_ready_without_reprobing(client, monkeypatch, readiness):
+    assert client.get("/health/ready").status_code == 200
+    monkeypatch.setattr(shutdown_coordinator, "draining", True)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {"ready": False}
+
+
+def test_readiness_survives_a_new_event_loop(monkeypatch, readiness):
+    # a ping still pending when its loop went away must not be awaited from the next one
+    release = threading.Event()
+    monkeypatch.setattr(health_module, "engine", _CountingEngine([], wait_for=release))
+    readiness.cache_seconds, readiness.db_timeout_seconds = 0, 0.05
+    first_loop = asyncio.new_event_loop()
+    try:
+        assert first_loop.run_until_complete(readiness.readiness())["checks"]["database"] == {
+            "ok": False, "error": "timeout",
+        }
+        monkeypatch.setattr(health_module, "engine", _CountingEngine([]))
+        assert asyncio.run(readiness.readiness())["checks"]["database"]["ok"]
+    finally:
+        release.set()
+        first_loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(first_loop)))
+        first_loop.close()
+
+
+class _CountingEngine:
+    def __init__(self, pings, wait_for=None):
+        self.pings = pings
+        self.wait_for = wait_for
+
+    @contextmanager
+    def connect(self):
+        if self.wait_for is not None:
+            self.wait_for.wait(5)
+        self.pings.append(True)
+        yield self
+
+    def execute(self, statement):
+        return None
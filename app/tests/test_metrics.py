@@ -0,0 +1,43 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, metrics_response, require_metrics_token
+
+
+@pytest.fixture
+def client():
+    # /metrics is only mounted when METRICS_ENABLED, which the test settings turn off
+    api = FastAPI()
+
+    @api.get("/metrics", dependencies=[Depends(require_metrics_token)])
+    async def metrics():
+        return metrics_response()
+
+    @api.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    api.add_middleware(MetricsMiddleware)
+    return TestClient(api)
+
+
+def test_metrics_are_not_served_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+
+
+def test_metrics_require_the_scrape_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Basic scrape-secret"}).status_code == 401
+
+    client.get("/items/1")
+    client.get("/items/2")
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert 'route="/items/{item_id}"' in response.text
+    assert "db_pool_checked_out" in response.text
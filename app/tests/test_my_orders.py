@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.order import Order
+from app.models.user import User
+from app.routes.orders import _decode_cursor, _encode_cursor
+
+START = datetime(2024, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def my_orders(db, user_headers):
+    bob = db.query(User).filter(User.username == "bob").one()
+    # pairs share a created_at, so the id tie-breaker decides the order inside each pair
+    db.add_all(
+        Order(
+            id=f"order-{i}", order_search_id=f"2401011200-{i:04d}", user_id=bob.id, username="bob",
+            email="bob@example.com", file_name="document.pdf", file_id="file", pages=3, color_mode="bw",
+            sides="single", paper_size="A4", orientation="portrait", amount=0.6, status="pending",
+            delivery_method="pickup", created_at=START + timedelta(minutes=i // 2),
+        )
+        for i in range(5)
+    )
+    db.commit()
+    # newest first
+    return ["2401011200-0004", "2401011200-0003", "2401011200-0002", "2401011200-0001", "2401011200-0000"]
+
+
+def test_cursor_round_trips():
+    cursor = _encode_cursor(START, "order-1")
+    assert "=" not in cursor
+    assert _decode_cursor(cursor) == (START, "order-1")
+
+
+def test_default_response_is_the_full_order_list(client, user_headers, my_orders):
+    response = client.get("/api/orders/my", headers=user_headers)
+    assert response.status_code == 200
+    orders = response.json()
+    assert [order["order_search_id"] for order in orders] == my_orders
+    assert orders[0]["email"] == "bob@example.com" and orders[0]["paper_size"] == "A4"
+
+
+def test_pages_follow_the_cursor_without_gaps_or_repeats(client, user_headers, my_orders):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"paginated": True, "limit": 2, "view": "summary", **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/orders/my", headers=user_headers, params=params).json()
+        pages += 1
+        seen.extend(order["order_search_id"] for order in body["orders"])
+        assert "email" not in body["orders"][0]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == my_orders
+    assert pages == 3
+
+
+def test_last_full_page_has_no_next_cursor(client, user_headers, my_orders):
+    body = client.get("/api/orders/my", headers=user_headers, params={"paginated": True, "limit": 5}).json()
+    assert len(body["orders"]) == 5 and body["next_cursor"] is None
+
+
+def test_invalid_cursor_is_rejected(client, user_headers, my_orders):
+    response = client.get("/api/orders/my", headers=user_headers, params={"paginated": True, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_unchanged_list_is_not_modified_until_an_order_changes(client, user_headers, my_orders, db):
+    etag = client.get("/api/orders/my", headers=user_headers).headers["ETag"]
+    response = client.get("/api/orders/my", headers={**user_headers, "If-None-Match": etag})
+    assert response.status_code == 304 and response.headers["ETag"] == etag
+    # another view of the same list is a different representation
+    paged = client.get("/api/orders/my", headers={**user_headers, "If-None-Match": etag}, params={"paginated": True})
+    assert paged.status_code == 200
+
+    order = db.query(Order).filter(Order.id == "order-0").one()
+    order.status = "cancelled"
+    order.updated_at = START + timedelta(days=1)
+    db.commit()
+    assert client.get("/api/orders/my", headers={**user_headers, "If-None-Match": etag}).status_code == 200
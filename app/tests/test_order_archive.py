@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.order import Order
+from app.models.order_archive import OrderArchive
+from app.services.order_archive_service import order_archive_service
+
+NOW = datetime.now(timezone.utc)
+
+
+def _order(i: int, status: str, age_days: int) -> Order:
+    created_at = NOW - timedelta(days=age_days)
+    return Order(
+        id=f"order-{i}", order_search_id=f"{created_at:%y%m%d%H%M}-{i:04d}", email="bob@example.com",
+        file_name="document.pdf", file_id="file", pages=3, color_mode="bw", sides="single", paper_size="A4",
+        orientation="portrait", amount=0.6, status=status, delivery_method="pickup", phone="0412 345 678",
+        created_at=created_at,
+    )
+
+
+@pytest.fixture
+def orders(db):
+    orders = [
+        _order(0, "completed", 400),
+        _order(1, "cancelled", 500),
+        _order(2, "pending", 380),
+        _order(3, "completed", 10),
+        _order(4, "completed", 450),
+    ]
+    db.add_all(orders)
+    db.commit()
+    return {order.id: order.order_search_id for order in orders}
+
+
+def _ids(db, model) -> list:
+    return sorted(row.id for row in db.query(model.id))
+
+
+def test_finished_orders_past_retention_are_moved(db, orders):
+    result = order_archive_service.run(db, retention_days=365, batch_size=2, months_ahead=3)
+
+    assert result == {"archived": 3, "partitions_created": [], "partitions_dropped": []}
+    assert _ids(db, Order) == ["order-2", "order-3"]
+    assert _ids(db, OrderArchive) == ["order-0", "order-1", "order-4"]
+    archived = db.query(OrderArchive).filter(OrderArchive.id == "order-0").one()
+    assert archived.archived_at is not None
+    assert (archived.order_search_id, archived.phone_normalized) == (orders["order-0"], "+61412345678")
+
+    # nothing left to move
+    assert order_archive_service.archive_orders(db, 365, 2) == 0
+
+
+def test_lookups_fall_back_to_the_archive(client, db, orders, admin_headers):
+    order_archive_service.archive_orders(db, 365, 100)
+
+    assert order_archive_service.get_by_search_id(db, orders["order-0"]).id == "order-0"
+    assert order_archive_service.get_by_search_id(db, orders["order-3"]) is None
+    for search_id in (orders["order-0"], orders["order-3"]):
+        response = client.get(f"/api/orders/search/{search_id}")
+        assert response.status_code == 200 and response.json()["order_search_id"] == search_id
+        assert client.get(f"/api/orders/{search_id}", headers=admin_headers).status_code == 200
+    assert client.get("/api/orders/search/2401011200-9999").status_code == 404
+
+    live = client.get("/api/orders", headers=admin_headers).json()
+    assert live["total"] == 2
+    everything = client.get("/api/orders", headers=admin_headers, params={"include_archived": True}).json()
+    assert everything["total"] == 5
+    # newest first across both tables
+    assert [order["order_search_id"] for order in everything["orders"]][:3] == [orders["order-3"], orders["order-2"], orders["order-0"]]
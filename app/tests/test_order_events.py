@@ -0,0 +1,86 @@
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.models.order import Order
+from app.services.order_events import OrderEventBroker, order_event_broker
+
+
+@pytest.fixture
+def order(db):
+    order = Order(
+        id="order-1", order_search_id="2401011200-0001", email="bob@example.com", file_name="document.pdf",
+        file_id="file", pages=3, color_mode="bw", sides="single", paper_size="A4", orientation="portrait",
+        amount=0.6, status="pending", delivery_method="pickup", created_at=datetime(2024, 1, 1, 12, 0),
+    )
+    db.add(order)
+    db.commit()
+    return order
+
+
+def _events(body: str) -> list:
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+def test_status_change_is_streamed_to_subscribers(admin_headers, order):
+    async def main():
+        # on SQLite after_commit dispatches to the loop the broker was started on
+        await order_event_broker.start()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                async def complete_once_subscribed():
+                    while order_event_broker.subscriber_count == 0:
+                        await asyncio.sleep(0.01)
+                    response = await client.put("/api/orders/2401011200-0001/status", json={"status": "completed"}, headers=admin_headers)
+                    assert response.status_code == 200
+
+                # the stream ends on its own once the order reaches a terminal status
+                stream, _ = await asyncio.wait_for(
+                    asyncio.gather(client.get("/api/orders/2401011200-0001/events"), complete_once_subscribed()),
+                    timeout=5,
+                )
+        finally:
+            await order_event_broker.stop()
+        return stream
+
+    stream = asyncio.run(main())
+    assert stream.headers["content-type"].startswith("text/event-stream")
+    assert [event["status"] for event in _events(stream.text)] == ["pending", "completed"]
+    assert order_event_broker.subscriber_count == 0
+
+
+def test_events_are_published_only_on_commit(db, order):
+    broker = order_event_broker
+
+    async def main():
+        await broker.start()
+        everything, mine, other = broker.subscribe(), broker.subscribe("2401011200-0001"), broker.subscribe("other")
+
+        order.status = "processing"
+        broker.notify(db, order)
+        db.rollback()
+        order.status = "cancelled"
+        broker.notify(db, order)
+        db.commit()
+        # dispatched with call_soon_threadsafe, so give the loop a turn
+        await asyncio.sleep(0)
+        await broker.stop()
+        for queue, order_search_id in ((everything, None), (mine, "2401011200-0001"), (other, "other")):
+            broker.unsubscribe(queue, order_search_id)
+        return [queue.get_nowait()["status"] for queue in (everything, mine)], other.empty()
+
+    assert asyncio.run(main()) == (["cancelled", "cancelled"], True)
+
+
+def test_listener_requires_a_direct_url_behind_pgbouncer(monkeypatch):
+    broker = OrderEventBroker()
+    monkeypatch.setattr(OrderEventBroker, "uses_postgres", True)
+    monkeypatch.setattr(settings, "DB_POOL_MODE", "null")
+    monkeypatch.setattr(settings, "ORDER_EVENTS_LISTEN_URL", None)
+    with pytest.raises(RuntimeError, match="ORDER_EVENTS_LISTEN_URL"):
+        asyncio.run(broker.start())
@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.pricing_service import pricing_service
+
+
+def test_order_matching_the_upload_and_quote_is_created(client, order_payload):
+    response = client.post("/api/orders", json=order_payload)
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+
+
+@pytest.mark.parametrize("changes,detail", [
+    # a 3-page file ordered as 1 page at the 1-page price
+    ({"pages": 1, "amount": 0.2}, "does not match the uploaded file"),
+    ({"amount": 0.4}, "does not match the current price"),
+    ({"copies": 2}, "does not match the current price"),
+])
+def test_orders_that_do_not_match_the_upload_or_quote_are_rejected(client, order_payload, changes, detail):
+    response = client.post("/api/orders", json={**order_payload, **changes})
+    assert response.status_code == 422
+    assert detail in response.json()["detail"]
+
+
+@pytest.mark.parametrize("changes", [
+    {"copies": 0, "pages": 0, "amount": 0},
+    {"copies": -3, "amount": -0.6},
+    {"pages_per_side": 0},
+])
+def test_non_positive_counts_are_rejected(client, order_payload, changes):
+    assert client.post("/api/orders", json={**order_payload, **changes}).status_code == 422
+
+
+def test_order_for_an_unknown_file_is_rejected(client, order_payload):
+    response = client.post("/api/orders", json={**order_payload, "file_id": "8b0f0a4e-8a43-4f5e-9f3c-1f2d3c4b5a69"})
+    assert response.status_code == 404
+
+
+def test_log_mode_accepts_mismatches(client, order_payload, monkeypatch):
+    monkeypatch.setattr(pricing_service, "check_mode", "log")
+    assert client.post("/api/orders", json={**order_payload, "pages": 1, "amount": 0.2}).status_code == 200
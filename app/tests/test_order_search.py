@@ -0,0 +1,71 @@
+import pytest
+
+from app.models.order import Order
+from app.services.order_search_service import order_search_service
+
+
+def _add(db, i: int, **fields):
+    values = dict(
+        id=f"order-{i}", order_search_id=f"2401011200-{i:04d}", email=f"customer{i}@example.com",
+        file_name="document.pdf", file_id="file", pages=3, color_mode="bw", sides="single", paper_size="A4",
+        orientation="portrait", amount=0.6, status="pending", delivery_method="pickup",
+    )
+    values.update(fields)
+    db.add(Order(**values))
+    db.commit()
+
+
+def _search(db, term: str) -> list:
+    return [row.id for row in order_search_service.search(db, [Order.id], term, 0, 20)]
+
+
+@pytest.fixture
+def orders(db):
+    _add(db, 1, name="Alice Smith", notes="staple top left")
+    _add(db, 2, name="Bob Jones", notes="for smith's thesis, please bind it with a clear cover and a black back")
+    _add(db, 3, name="Carol Smithson", file_name="smith_report.pdf")
+    _add(db, 4, name="Dan Brown", email="dan@blacksmith.example.com")
+
+
+def test_best_match_ranks_first(db, orders):
+    # two matching fields first, then a match in a short field before one buried in long notes
+    assert _search(db, "smith") == ["order-3", "order-1", "order-2"]
+
+
+def test_words_match_as_prefixes(db, orders):
+    assert set(_search(db, "smi")) == {"order-1", "order-2", "order-3"}
+    assert _search(db, "blacks") == ["order-4"]
+    assert _search(db, "thes") == ["order-2"]
+    assert _search(db, "ali") == ["order-1"]
+
+
+def test_every_word_must_match(db, orders):
+    assert _search(db, "alice smith") == ["order-1"]
+    assert _search(db, "alice jones") == []
+
+
+def test_terms_without_words_match_nothing(db, orders):
+    assert _search(db, "\"*") == []
+
+
+def test_updates_and_deletes_reach_the_index(db, orders):
+    order = db.query(Order).filter(Order.id == "order-1").one()
+    order.notes = "urgent, collect before noon"
+    order.name = "Alice Walker"
+    db.commit()
+    assert _search(db, "urgent") == ["order-1"]
+    assert _search(db, "walker") == ["order-1"]
+    assert "order-1" not in _search(db, "smith")
+    assert _search(db, "staple") == []
+
+    db.delete(db.query(Order).filter(Order.id == "order-2").one())
+    db.commit()
+    assert _search(db, "thesis") == []
+
+
+def test_admin_search_endpoint_pages_results(client, admin_headers, orders):
+    first = client.get("/api/orders/admin/search", headers=admin_headers, params={"q": "smith", "size": 2}).json()
+    assert [order["order_search_id"] for order in first["orders"]][0] == "2401011200-0003"
+    assert first["has_more"] is True
+    second = client.get("/api/orders/admin/search", headers=admin_headers, params={"q": "smith", "size": 2, "page": 2}).json()
+    assert len(second["orders"]) == 1 and second["has_more"] is False
@@ -0,0 +1,47 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from app.core.phone import normalize_phone
+
+SAMPLES = ["0412 345 678", "+61 412 345 678", "0061412345678", "61412345678", "412345678", "(02) 9876-5432",
+           "+1 (415) 555-0100", "", "  ", "n/a", None]
+
+
+@pytest.mark.parametrize("phone,expected", [
+    # national format with the trunk prefix
+    ("0412345678", "+61412345678"),
+    ("(02) 9876 5432", "+61298765432"),
+    # international, with "+" or "00"
+    ("+61 412 345 678", "+61412345678"),
+    ("+1 (415) 555-0100", "+14155550100"),
+    ("0061412345678", "+61412345678"),
+    # country code without "+", or no prefix at all
+    ("61412345678", "+61412345678"),
+    ("412345678", "+61412345678"),
+    # separators
+    ("0412-345-678", "+61412345678"),
+    ("0412.345.678", "+61412345678"),
+    ("  0412 345 678  ", "+61412345678"),
+])
+def test_normalize_phone(phone, expected):
+    assert normalize_phone(phone) == expected
+
+
+@pytest.mark.parametrize("phone", [None, "", "   ", "n/a", "+", "---"])
+def test_invalid_phone_numbers_normalize_to_none(phone):
+    assert normalize_phone(phone) is None
+
+
+def test_other_default_country():
+    assert normalize_phone("020 7946 0018", country_code="44") == "+442079460018"
+
+
+def test_migration_backfill_matches_the_current_normalizer():
+    # the migration keeps a frozen copy; when the normalizer changes, existing rows need a new backfill migration
+    path = Path(__file__).resolve().parents[2] / "alembic" / "versions" / "8b41d5e2c6a3_add_orders_phone_normalized.py"
+    spec = importlib.util.spec_from_file_location("phone_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    assert [migration.normalize_phone(phone) for phone in SAMPLES] == [normalize_phone(phone) for phone in SAMPLES]
@@ -0,0 +1,213 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.order import Order
+from app.models.print_batch import PrintBatch
+from app.services.fake_printer import FakePrinter
+from app.services.print_scheduler_service import (
+    PrintSchedulerService,
+    Printer,
+    _PrinterState,
+    order_impressions,
+    parse_printers,
+    print_scheduler_service,
+)
+
+NOW = datetime(2025, 3, 3, 9, 0, tzinfo=timezone.utc)
+A4_BW = ("A4", "bw", "single")
+A4_COLOR = ("A4", "color", "single")
+A3_COLOR = ("A3", "color", "double")
+
+
+def _scheduler(printers=None, max_batch_impressions=100, changeover_seconds=120) -> PrintSchedulerService:
+    return PrintSchedulerService(
+        printers or [Printer("office", 60, ["A4", "A3"], ["bw", "color"])],
+        sla_minutes={"pickup": 120, "delivery": 24 * 60},
+        max_batch_impressions=max_batch_impressions,
+        changeover_seconds=changeover_seconds,
+    )
+
+
+def _order(search_id: str, key=A4_BW, pages: int = 10, copies: int = 1, minutes_ago: int = 0, delivery: str = "pickup"):
+    paper_size, color_mode, sides = key
+    return SimpleNamespace(
+        order_search_id=search_id, paper_size=paper_size, color_mode=color_mode, sides=sides, pages=pages,
+        pages_per_side=1, copies=copies, delivery_method=delivery, created_at=NOW - timedelta(minutes=minutes_ago),
+    )
+
+
+def _ids(batch) -> list:
+    return [order.order_search_id for order in batch["orders"]]
+
+
+def test_parse_printers():
+    office, copier = parse_printers("office:40:A4,A3:bw,color; copier:60:A4:bw")
+    assert (office.name, office.pages_per_minute, office.paper_sizes, office.color_modes) == ("office", 40, {"A4", "A3"}, {"bw", "color"})
+    assert copier.can_print(A4_BW) and not copier.can_print(A4_COLOR)
+    assert copier.seconds_for(61) == 61
+
+
+def test_orders_are_grouped_by_paper_colour_and_sides():
+    orders = [_order("a", A4_BW), _order("b", A4_COLOR), _order("c", A4_BW), _order("d", ("A4", "bw", "double"))]
+    batches = _scheduler().group(orders)
+    assert sorted((batch["key"], tuple(_ids(batch))) for batch in batches) == [
+        (("A4", "bw", "double"), ("d",)),
+        (A4_BW, ("a", "c")),
+        (A4_COLOR, ("b",)),
+    ]
+
+
+def test_batches_are_split_at_max_impressions():
+    orders = [_order(str(i), pages=30, minutes_ago=10 - i) for i in range(5)]
+    batches = _scheduler(max_batch_impressions=100).group(orders)
+    assert [_ids(batch) for batch in batches] == [["0", "1", "2"], ["3", "4"]]
+    assert [batch["impressions"] for batch in batches] == [90, 60]
+    # an order bigger than the limit still gets a batch of its own
+    big = _scheduler(max_batch_impressions=100).group([_order("big", pages=50, copies=3)])
+    assert big[0]["impressions"] == order_impressions(_order("big", pages=50, copies=3)) == 150
+
+
+def test_batches_come_earliest_deadline_first():
+    orders = [
+        _order("delivery-old", A4_COLOR, minutes_ago=60, delivery="delivery"),
+        _order("pickup-new", A4_BW, minutes_ago=5),
+        _order("pickup-old", A3_COLOR, minutes_ago=30),
+    ]
+    batches = _scheduler().group(orders)
+    assert [_ids(batch) for batch in batches] == [["pickup-old"], ["pickup-new"], ["delivery-old"]]
+    assert batches[0]["due_at"] == NOW - timedelta(minutes=30) + timedelta(minutes=120)
+
+
+def test_assignment_counts_changeovers_and_keeps_media_on_one_printer():
+    scheduler = _scheduler(
+        [Printer("left", 60, ["A4"], ["bw", "color"]), Printer("right", 60, ["A4"], ["bw", "color"])],
+        changeover_seconds=300,
+    )
+    states = [_PrinterState(printer, NOW, A4_BW, 0) for printer in scheduler.printers]
+    states[1].last_key = A4_COLOR
+    batches = [
+        {"key": A4_COLOR, "orders": [], "impressions": 60},
+        {"key": A4_BW, "orders": [], "impressions": 60},
+        {"key": A4_BW, "orders": [], "impressions": 60},
+    ]
+    assert scheduler.assign(batches, states) == []
+    # each printer already set up for a media keeps it, without paying the changeover
+    assert [(batch["printer"], batch["position"]) for batch in batches] == [("right", 0), ("left", 0), ("left", 1)]
+    assert batches[2]["estimated_finish_at"] == NOW + timedelta(seconds=120)
+
+    # once "left" is far behind, switching "right" over is faster despite the changeover
+    states[0].available_at = NOW + timedelta(hours=1)
+    extra = [{"key": A4_BW, "orders": [], "impressions": 60}]
+    scheduler.assign(extra, states)
+    assert extra[0]["printer"] == "right"
+    assert extra[0]["estimated_finish_at"] == NOW + timedelta(seconds=60 + 300 + 60)
+
+
+def test_batches_no_printer_can_take_are_unschedulable():
+    scheduler = _scheduler([Printer("mono", 60, ["A4"], ["bw"])])
+    batches = scheduler.group([_order("a", A4_BW), _order("b", A3_COLOR)])
+    unassigned = scheduler.assign(batches, [_PrinterState(scheduler.printers[0], NOW, None, 0)])
+    assert [_ids(batch) for batch in unassigned] == [["b"]]
+
+
+def _processing_orders(db, specs):
+    orders = []
+    for i, (key, pages) in enumerate(specs):
+        paper_size, color_mode, sides = key
+        orders.append(Order(
+            id=f"order-{i}", order_search_id=f"2503030900-{i:04d}", email="bob@example.com", file_name="doc.pdf",
+            file_id="file", pages=pages, color_mode=color_mode, sides=sides, paper_size=paper_size,
+            orientation="portrait", amount=1.0, status="processing", delivery_method="pickup",
+            created_at=NOW - timedelta(minutes=len(specs) - i),
+        ))
+    db.add_all(orders)
+    db.commit()
+    return orders
+
+
+def test_schedule_stores_batches_and_appends_to_existing_queues(db):
+    scheduler = _scheduler([Printer("office", 60, ["A4"], ["bw", "color"])])
+    _processing_orders(db, [(A4_BW, 10), (A4_COLOR, 10), (A4_BW, 10), (A3_COLOR, 5)])
+
+    dry = scheduler.schedule(db, now=NOW, dry_run=True)
+    assert len(dry["batches"]) == 2 and db.query(PrintBatch).count() == 0
+
+    result = scheduler.schedule(db, now=NOW)
+    assert [(batch["position"], batch["order_count"]) for batch in result["batches"]] == [(0, 2), (1, 1)]
+    assert [entry["order_search_ids"] for entry in result["unschedulable"]] == [["2503030900-0003"]]
+
+    # nothing new: a second run is a no-op
+    assert scheduler.schedule(db, now=NOW)["batches"] == []
+    db.add(Order(
+        id="late", order_search_id="2503030905-0001", email="bob@example.com", file_name="doc.pdf", file_id="file",
+        pages=4, color_mode="bw", sides="single", paper_size="A4", orientation="portrait", amount=1.0,
+        status="processing", delivery_method="pickup", created_at=NOW,
+    ))
+    db.commit()
+    assert [batch["position"] for batch in scheduler.schedule(db, now=NOW)["batches"]] == [2]
+
+
+@pytest.fixture
+def queued_batches(client, admin_headers, db, monkeypatch):
+    monkeypatch.setattr(print_scheduler_service, "printers", [Printer("printer-1", 60, ["A4", "A3"], ["bw", "color"])])
+    _processing_orders(db, [(A4_BW, 10), (A4_COLOR, 10), (A4_BW, 10)])
+    response = client.post("/api/print-queue/schedule", headers=admin_headers)
+    assert response.status_code == 200
+    return [batch["id"] for batch in response.json()["batches"]]
+
+
+def _transition(client, headers, batch_id: str, action: str):
+    return client.post(f"/api/print-queue/batches/{batch_id}/{action}", headers=headers)
+
+
+def test_batch_transitions_are_checked(client, admin_headers, db, queued_batches):
+    first, second = queued_batches
+    assert _transition(client, admin_headers, first, "complete").status_code == 409
+    assert _transition(client, admin_headers, first, "start").status_code == 200
+    assert _transition(client, admin_headers, first, "start").status_code == 409
+    busy = _transition(client, admin_headers, second, "start")
+    assert busy.status_code == 409 and "already printing" in busy.json()["detail"]
+
+    assert _transition(client, admin_headers, first, "complete").status_code == 200
+    assert _transition(client, admin_headers, first, "cancel").status_code == 409
+    db.expire_all()
+    assert {order.status for order in db.query(Order).filter(Order.color_mode == "bw")} == {"completed"}
+
+    cancelled = _transition(client, admin_headers, second, "cancel")
+    assert cancelled.status_code == 200 and cancelled.json()["order_search_ids"] == ["2503030900-0001"]
+    assert _transition(client, admin_headers, second, "start").status_code == 409
+    assert _transition(client, admin_headers, "missing", "start").status_code == 404
+    assert client.get("/api/print-queue", headers=admin_headers).json()["unbatched_orders"] == 1
+
+
+def test_fake_printer_works_through_the_queue(db):
+    printer = Printer("office", 60, ["A4", "A3"], ["bw", "color"])
+    scheduler = _scheduler([printer], max_batch_impressions=45, changeover_seconds=120)
+    _processing_orders(db, [(A4_BW, 20), (A4_COLOR, 20), (A4_BW, 20), (A4_COLOR, 5), (A4_BW, 10)])
+    batches = scheduler.schedule(db, now=NOW)["batches"]
+    fake = FakePrinter(printer, changeover_seconds=120)
+
+    async def run():
+        while (batch := scheduler.next_batch(db, printer.name)) is not None:
+            scheduler.start_batch(db, batch.id)
+            await fake.print_batch(batch.id, (batch.paper_size, batch.color_mode, batch.sides), batch.duration_seconds)
+            scheduler.complete_batch(db, batch.id)
+
+    asyncio.run(run())
+    # bw 0+2 (40), colour 1+3 (25), then the bw order that didn't fit (10), in deadline order
+    assert fake.printed == [batch["id"] for batch in batches]
+    assert [batch["impressions"] for batch in batches] == [40, 25, 10]
+    assert fake.changeovers == 2
+    assert fake.clock_seconds == 40 + 120 + 25 + 120 + 10
+    db.expire_all()
+    assert {order.status for order in db.query(Order)} == {"completed"}
+
+
+def test_queue_routes_keep_scheduler_queries_off_the_event_loop(client, admin_headers, queued_batches, queries_on_event_loop):
+    assert _transition(client, admin_headers, queued_batches[0], "start").status_code == 200
+    assert client.post("/api/print-queue/schedule", headers=admin_headers).status_code == 200
+    assert client.get("/api/print-queue", headers=admin_headers).status_code == 200
+    assert not any("print_batches" in statement for statement in queries_on_event_loop)
@@ -0,0 +1,63 @@
+import pytest
+
+from app.db.query_stats import assert_max_queries
+from app.models.order import Order
+from app.models.user import User
+
+
+@pytest.fixture
+def orders(db, user_headers):
+    bob = db.query(User).filter(User.username == "bob").one()
+
+    def create(count: int):
+        start = db.query(Order).count()
+        db.add_all(
+            Order(
+                id=f"order-{i}", order_search_id=f"2401011200-{i:04d}", user_id=bob.id, username="bob",
+                email="bob@example.com", file_name="document.pdf", file_id="file", pages=3, color_mode="bw",
+                sides="single", paper_size="A4", orientation="portrait", amount=0.6, status="pending",
+            )
+            for i in range(start, start + count)
+        )
+        db.commit()
+
+    return create
+
+
+# warm principal cache; a cold one adds the user lookup
+@pytest.mark.parametrize("url,params,role,limit", [
+    ("/api/orders", {}, "admin", 2),
+    ("/api/orders", {"include_archived": True}, "admin", 2),
+    ("/api/orders/my", {"paginated": True}, "user", 2),
+    ("/api/orders/my", {"paginated": True, "view": "summary"}, "user", 2),
+    ("/api/orders/admin/search", {"q": "document"}, "admin", 1),
+])
+def test_list_endpoints_run_a_fixed_number_of_queries(client, admin_headers, user_headers, orders, url, params, role, limit):
+    headers = admin_headers if role == "admin" else user_headers
+    orders(2)
+    with assert_max_queries(limit + 1):
+        assert client.get(url, headers=headers, params=params).status_code == 200
+    with assert_max_queries(limit):
+        assert client.get(url, headers=headers, params=params).status_code == 200
+
+    # no query per row
+    orders(20)
+    with assert_max_queries(limit):
+        response = client.get(url, headers=headers, params={**params, "size": 100, "limit": 100})
+    assert response.status_code == 200
+    assert len(response.json()["orders"]) == 22
+
+
+def test_unchanged_order_list_is_answered_from_the_aggregate(client, user_headers, orders):
+    orders(5)
+    etag = client.get("/api/orders/my", headers=user_headers).headers["ETag"]
+    with assert_max_queries(1):
+        response = client.get("/api/orders/my", headers={**user_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_assert_max_queries_reports_the_statements(client, admin_headers, orders):
+    orders(1)
+    with pytest.raises(AssertionError, match="expected at most 0 queries"):
+        with assert_max_queries(0):
+            client.get("/api/orders", headers=admin_headers)
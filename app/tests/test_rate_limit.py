@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.core.rate_limit as rate_limit
+from app.core.rate_limit import MemoryBucketBackend, RateLimitMiddleware, RateLimitRule, default_rate_limit_rules, parse_rate
+from app.core.security import create_access_token
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def _throttled_client(rules) -> TestClient:
+    api = FastAPI()
+
+    @api.get("/limited")
+    @api.get("/open")
+    async def endpoint():
+        return {"ok": True}
+
+    api.add_middleware(RateLimitMiddleware, rules=rules, backend=MemoryBucketBackend())
+    return TestClient(api)
+
+
+def _bearer(username: str) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": username}, role="user")}
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 60.0)
+    assert parse_rate("5/seconds") == (5, 1.0)
+    assert parse_rate("100/day") == (100, 86400.0)
+
+
+def test_bucket_denies_when_empty_and_refills_over_time(clock):
+    backend = MemoryBucketBackend()
+
+    def consume():
+        return asyncio.run(backend.consume("k", 2, 60))
+
+    assert consume()[:2] == (True, 1)
+    assert consume()[:2] == (True, 0)
+    allowed, remaining, full_in, next_in = consume()
+    assert (allowed, remaining) == (False, 0)
+    assert next_in == pytest.approx(30)
+    assert full_in == pytest.approx(60)
+
+    clock.now += 30
+    assert consume()[0] is True
+    assert consume()[0] is False
+    clock.now += 120
+    # never refills past capacity
+    assert consume()[:2] == (True, 1)
+
+
+def test_least_recently_used_buckets_are_evicted(clock):
+    backend = MemoryBucketBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        asyncio.run(backend.consume(key, 1, 60))
+    # "a" was evicted, so it starts full again
+    assert asyncio.run(backend.consume("a", 1, 60))[0] is True
+    assert asyncio.run(backend.consume("c", 1, 60))[0] is False
+
+
+def test_responses_carry_rate_limit_headers_and_429_has_retry_after(clock):
+    client = _throttled_client([RateLimitRule("limited", ["GET"], "/limited", per_ip="2/minute")])
+
+    first = client.get("/limited")
+    assert first.status_code == 200
+    assert first.headers["RateLimit-Limit"] == "2"
+    assert first.headers["RateLimit-Remaining"] == "1"
+    assert first.headers["RateLimit-Reset"] == "30"
+    assert client.get("/limited").headers["RateLimit-Remaining"] == "0"
+
+    denied = client.get("/limited")
+    assert denied.status_code == 429
+    assert denied.headers["Retry-After"] == "30"
+    assert denied.headers["RateLimit-Remaining"] == "0"
+
+    unthrottled = client.get("/open")
+    assert unthrottled.status_code == 200
+    assert "RateLimit-Limit" not in unthrottled.headers
+
+    clock.now += 30
+    assert client.get("/limited").status_code == 200
+
+
+def test_denied_request_does_not_use_up_the_other_buckets(clock):
+    client = _throttled_client([RateLimitRule("limited", ["GET"], "/limited", per_ip="3/minute", per_user="1/minute")])
+    bob = _bearer("bob")
+
+    assert client.get("/limited", headers=bob).status_code == 200
+    assert client.get("/limited", headers=bob).status_code == 429
+    assert client.get("/limited", headers=bob).status_code == 429
+    # bob's denied requests were refunded to the IP bucket, so another client behind it still gets through
+    assert client.get("/limited").status_code == 200
+    assert client.get("/limited", headers=_bearer("carol")).status_code == 200
+    assert client.get("/limited").status_code == 429
+
+
+def test_default_rules_match_literal_paths_only():
+    login, upload, tracking = default_rate_limit_rules()
+    assert login.matches("POST", "/api/auth/login")
+    assert not login.matches("GET", "/api/auth/login")
+    assert not upload.matches("POST", "/api/files/upload/extra")
+    assert tracking.matches("GET", "/api/orders/search/2401011200-1234")
+    assert not tracking.matches("GET", "/api/orders/search/")
@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import create_engine
+
+import app.db.session as session_module
+from app.db.base import Base
+from app.db.session import ReplicaRouter, engine
+from app.models.user import User
+
+
+@pytest.fixture
+def replicas(tmp_path):
+    engines = [create_engine(f"sqlite:///{tmp_path / 'replica-1.db'}"), create_engine(f"sqlite:///{tmp_path / 'replica-2.db'}")]
+    for replica in engines:
+        Base.metadata.create_all(replica)
+    yield engines
+    for replica in engines:
+        Base.metadata.drop_all(replica)
+        replica.dispose()
+
+
+@pytest.fixture
+def dead_replica(tmp_path):
+    # the directory does not exist, so every checkout fails with OperationalError
+    replica = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    yield replica
+    replica.dispose()
+
+
+def test_sessions_round_robin_over_replicas(replicas):
+    router = ReplicaRouter(replicas, engine)
+    binds = []
+    for _ in range(4):
+        with router.session() as db:
+            binds.append(db.get_bind())
+    assert binds == [replicas[0], replicas[1], replicas[0], replicas[1]]
+
+
+def test_without_replicas_reads_go_to_the_primary():
+    router = ReplicaRouter([], engine)
+    with router.session() as db:
+        assert db.get_bind() is engine
+
+
+def test_dead_replica_is_marked_down_and_skipped(replicas, dead_replica):
+    router = ReplicaRouter([dead_replica, replicas[0]], engine, retry_seconds=60)
+    with router.session() as db:
+        assert db.get_bind() is replicas[0]
+    assert router._down_until[id(dead_replica)] > 0
+    for _ in range(3):
+        with router.session() as db:
+            assert db.get_bind() is replicas[0]
+
+
+def test_primary_is_the_fallback_when_every_replica_is_down(dead_replica):
+    router = ReplicaRouter([dead_replica], engine, retry_seconds=60)
+    with router.session() as db:
+        assert db.get_bind() is engine
+    router.mark_down(dead_replica)
+    with router.session() as db:
+        assert db.get_bind() is engine
+
+
+def test_marked_down_replica_is_retried_after_the_retry_window(replicas):
+    router = ReplicaRouter(replicas[:1], engine, retry_seconds=60)
+    router.mark_down(replicas[0])
+    with router.session() as db:
+        assert db.get_bind() is engine
+    router.retry_seconds = 0
+    router.mark_down(replicas[0])
+    with router.session() as db:
+        assert db.get_bind() is replicas[0]
+
+
+def test_read_sessions_reject_writes(replicas):
+    router = ReplicaRouter(replicas, engine)
+    with router.session() as db:
+        db.add(User(username="eve", email="eve@example.com", hashed_password="x"))
+        with pytest.raises(RuntimeError):
+            db.flush()
+
+
+def test_order_is_readable_right_after_it_is_created(client, admin_headers, order_payload, replicas, monkeypatch):
+    # the replicas never receive the order, as if replication were lagging
+    monkeypatch.setattr(session_module, "replica_router", ReplicaRouter(replicas, engine))
+    created = client.post("/api/orders", json=order_payload).json()
+
+    response = client.get(f"/api/orders/search/{created['order_search_id']}")
+    assert response.status_code == 200
+    assert client.get(f"/api/orders/{created['order_search_id']}", headers=admin_headers).status_code == 200
+    # the admin list still reads from a replica
+    assert client.get("/api/orders", headers=admin_headers).json()["total"] == 0
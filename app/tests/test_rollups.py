@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.order import Order
+from app.models.order_rollup import OrderDailyRollup
+from app.services.rollup_service import ROLLUP_GROUPS, ROLLUP_MEASURES, rollup_service
+
+
+def _rows(db) -> dict:
+    db.expire_all()
+    return {
+        tuple(getattr(row, name) for name in ROLLUP_GROUPS): {name: getattr(row, name) for name in ROLLUP_MEASURES}
+        for row in db.query(OrderDailyRollup)
+    }
+
+
+def _add_orders(db, specs):
+    for i, (color_mode, created_at, amount) in enumerate(specs):
+        db.add(Order(
+            id=f"order-{i}", order_search_id=f"{created_at:%y%m%d%H%M}-{i:04d}", email="bob@example.com",
+            file_name="document.pdf", file_id="file", pages=3, copies=2, color_mode=color_mode, sides="single",
+            paper_size="A4", orientation="portrait", amount=amount, status="pending", delivery_method="pickup",
+            created_at=created_at,
+        ))
+    db.commit()
+
+
+def test_incremental_rollups_match_a_rebuild(client, admin_headers, db):
+    day_one, day_two = datetime(2024, 1, 1, 1, 0), datetime(2024, 1, 2, 1, 0)
+    _add_orders(db, [("bw", day_one, 0.6), ("bw", day_one, 0.7), ("color", day_one, 2.5), ("color", day_two, 1.5)])
+    search_ids = [order.order_search_id for order in db.query(Order).order_by(Order.id)]
+
+    def move(index: int, *statuses: str):
+        for status in statuses:
+            response = client.put(f"/api/orders/{search_ids[index]}/status", json={"status": status}, headers=admin_headers)
+            assert response.status_code == 200
+
+    move(0, "processing", "cancelled")
+    move(1, "processing", "completed")
+    move(2, "processing")
+    # the only paid order of its day and options is cancelled again
+    move(3, "processing", "cancelled")
+
+    incremental = _rows(db)
+    assert len(incremental) == 2
+    rollup_service.rebuild(db)
+    rebuilt = _rows(db)
+
+    assert incremental.keys() == rebuilt.keys()
+    for key, measures in rebuilt.items():
+        assert incremental[key] == pytest.approx(measures)
+    bw = next(measures for key, measures in rebuilt.items() if key[1] == "bw")
+    assert bw == pytest.approx({"paid_orders": 1, "paid_pages": 6, "revenue": 0.7, "completed_orders": 1, "completed_pages": 6})
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.core.security import create_access_token, get_current_user_optional, user_cache
+from app.models.user import User
+
+
+def _token_headers(username: str, role: str, version: int = 0) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"sub": username, "ver": version}, role=role)}
+
+
+def test_admin_endpoints_reject_a_token_from_before_a_role_change(client, admin_headers, db):
+    assert client.get("/api/orders", headers=admin_headers).status_code == 200
+
+    admin = db.query(User).filter(User.username == "admin").one()
+    admin.role = "user"
+    admin.token_version = 1
+    db.commit()
+    user_cache.invalidate("admin")
+
+    assert client.get("/api/orders", headers=admin_headers).status_code == 401
+    assert client.get("/api/orders", headers=_token_headers("admin", "user", 1)).status_code == 403
+
+
+def test_admin_endpoints_reject_a_forged_role_claim(client, user_headers):
+    # signed with the right key, but the user record says "user"
+    assert client.get("/api/orders", headers=_token_headers("bob", "admin")).status_code == 401
+
+
+def test_admin_endpoints_reject_deactivated_admins(client, admin_headers, db):
+    admin = db.query(User).filter(User.username == "admin").one()
+    admin.is_active = False
+    db.commit()
+
+    assert client.get("/api/orders", headers=admin_headers).status_code == 401
+
+
+def test_optional_user_ignores_stale_tokens(db, user_headers):
+    stale = create_access_token({"sub": "bob", "ver": 3}, role="user")
+    current = create_access_token({"sub": "bob"}, role="user")
+    assert asyncio.run(get_current_user_optional(stale, db)) is None
+    assert asyncio.run(get_current_user_optional(current, db)).username == "bob"
+
+
+def test_principal_cache_miss_does_not_block_the_event_loop(client, user_headers, queries_on_event_loop):
+    assert client.get("/api/orders/my", headers=user_headers).status_code == 200
+    assert not any("FROM users" in statement for statement in queries_on_event_loop)
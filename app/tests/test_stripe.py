@@ -0,0 +1,355 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import app.services.stripe_service as stripe_service_module
+from app.core.config import settings
+from app.models.order import Order
+from app.models.order_rollup import OrderDailyRollup
+from app.models.stripe_event import StripeEvent
+from app.models.sync_checkpoint import SyncCheckpoint
+from app.services.payment_reconciliation_service import CHECKPOINT_NAME, payment_reconciliation_service
+from app.services.rollup_service import rollup_service
+from app.services.stripe_event_service import StripeEventConsumer
+from app.services.stripe_service import StripeService
+
+
+class FakeStripe:
+    # just enough of the checkout sessions API: create (idempotent), retrieve and list
+    def __init__(self):
+        self.requests = []
+        self.sessions = {}
+        self.fail_next_posts = 0
+        self._by_idempotency_key = {}
+        self._lock = threading.Lock()
+
+    def add_session(self, session_id: str, created: int, order_id: str, status: str = "complete", payment_status: str = "paid"):
+        self.sessions[session_id] = {
+            "id": session_id, "object": "checkout.session", "status": status, "payment_status": payment_status,
+            "created": created, "client_reference_id": order_id, "metadata": {"order_id": order_id},
+        }
+
+    def create(self, form: dict, idempotency_key: str) -> Optional[dict]:
+        # like Stripe: a repeated key returns the first result, or fails if the parameters differ
+        with self._lock:
+            if idempotency_key in self._by_idempotency_key:
+                first_form, session = self._by_idempotency_key[idempotency_key]
+                return session if first_form == form else None
+            session_id = f"cs_test_{len(self.sessions) + 1}"
+            order_id = form["metadata[order_id]"][0]
+            self.add_session(session_id, 0, order_id, status="open", payment_status="unpaid")
+            self.sessions[session_id].update(
+                url=f"https://checkout.stripe.test/{session_id}",
+                expires_at=int(form["expires_at"][0]),
+                amount_total=int(form["line_items[0][price_data][unit_amount]"][0]),
+            )
+            self._by_idempotency_key[idempotency_key] = (form, self.sessions[session_id])
+            return self.sessions[session_id]
+
+    def list(self, query: dict) -> dict:
+        created_after, limit = int(query["created[gt]"][0]), int(query["limit"][0])
+        rows = sorted(
+            (s for s in self.sessions.values() if s["created"] > created_after and s["status"] == query["status"][0]),
+            key=lambda s: s["created"],
+            reverse=True,
+        )
+        if "starting_after" in query:
+            rows = rows[[row["id"] for row in rows].index(query["starting_after"][0]) + 1:]
+        return {"object": "list", "url": "/v1/checkout/sessions", "data": rows[:limit], "has_more": len(rows) > limit}
+
+
+def _handler(fake: FakeStripe):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode())
+            fake.requests.append(("POST", self.path, dict(self.headers)))
+            if fake.fail_next_posts:
+                fake.fail_next_posts -= 1
+                return self._reply(500, {"error": {"type": "api_error", "message": "boom"}})
+            session = fake.create(form, self.headers.get("Idempotency-Key"))
+            if session is None:
+                return self._reply(400, {"error": {"type": "idempotency_error", "message": "Keys for idempotent requests can only be used with the same parameters"}})
+            self._reply(200, session)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            fake.requests.append(("GET", url.path, dict(self.headers)))
+            if url.path == "/v1/checkout/sessions":
+                return self._reply(200, fake.list(parse_qs(url.query)))
+            session = fake.sessions.get(url.path.rsplit("/", 1)[-1])
+            if session is None:
+                return self._reply(404, {"error": {"type": "invalid_request_error", "message": "No such session"}})
+            self._reply(200, session)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def fake_stripe(monkeypatch):
+    fake = FakeStripe()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(fake))
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    monkeypatch.setattr(settings, "STRIPE_API_BASE", f"http://127.0.0.1:{server.server_port}")
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def _run(coroutine_function):
+    # a fresh service per event loop: its pooled httpx client is bound to the loop it was used on
+    async def main():
+        service = StripeService()
+        try:
+            return await coroutine_function(service)
+        finally:
+            await service.close()
+    return asyncio.run(main())
+
+
+def _order(**fields) -> SimpleNamespace:
+    values = dict(id="order-1", amount=1.5, pages=3, copies=1, color_mode="bw", email="bob@example.com", checkout_session_id=None)
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def test_client_calls_the_configured_api_base(fake_stripe):
+    session = _run(lambda service: service.create_checkout_session(_order()))
+
+    assert session["session_id"] == "cs_test_1"
+    assert session["url"] == "https://checkout.stripe.test/cs_test_1"
+    method, path, headers = fake_stripe.requests[0]
+    assert (method, path) == ("POST", "/v1/checkout/sessions")
+    assert headers["Authorization"] == f"Bearer {settings.STRIPE_SECRET_KEY}"
+    assert fake_stripe.sessions["cs_test_1"]["amount_total"] == 150
+
+
+def test_failed_create_is_retried_with_the_same_idempotency_key(fake_stripe):
+    fake_stripe.fail_next_posts = 1
+    session = _run(lambda service: service.create_checkout_session(_order()))
+
+    assert session["session_id"] == "cs_test_1"
+    keys = [headers["Idempotency-Key"] for method, _, headers in fake_stripe.requests if method == "POST"]
+    assert len(keys) == 2 and keys[0] == keys[1]
+
+
+def test_concurrent_creates_for_an_order_get_one_session(fake_stripe, monkeypatch):
+    clock = SimpleNamespace(time=lambda: 1_700_000_000.0)
+    monkeypatch.setattr(stripe_service_module, "time", clock)
+
+    async def create_twice(service):
+        first = await service.create_checkout_session(_order())
+        clock.time = lambda: 1_700_000_010.0
+        return first, await service.create_checkout_session(_order())
+
+    first, second = _run(create_twice)
+    assert first == second
+    assert first["expires_at"].timestamp() - 1_700_000_000 >= settings.STRIPE_CHECKOUT_EXPIRY_MINUTES * 60
+
+    clock.time = lambda: 1_700_000_100.0
+    later = _run(lambda service: service.create_checkout_session(_order()))
+    assert later["session_id"] != first["session_id"]
+
+
+def test_verify_payment_checks_the_session_belongs_to_the_order(fake_stripe):
+    fake_stripe.add_session("cs_paid", 1, "order-1")
+
+    result = _run(lambda service: service.verify_payment("cs_paid", "order-1"))
+    assert result["is_paid"] is True
+    with pytest.raises(Exception, match="does not match"):
+        _run(lambda service: service.verify_payment("cs_paid", "order-2"))
+
+
+def test_completed_sessions_are_listed_across_pages(fake_stripe):
+    for i in range(5):
+        fake_stripe.add_session(f"cs_{i}", 100 + i, f"order-{i}")
+    fake_stripe.add_session("cs_old", 50, "order-old")
+    fake_stripe.add_session("cs_open", 120, "order-open", status="open")
+
+    sessions = _run(lambda service: service.list_completed_checkout_sessions(99, page_size=2))
+    assert [session.id for session in sessions] == ["cs_4", "cs_3", "cs_2", "cs_1", "cs_0"]
+    assert len([request for request in fake_stripe.requests if request[1] == "/v1/checkout/sessions"]) == 3
+
+
+def _pending_orders(db, count: int):
+    orders = [
+        Order(
+            id=f"order-{i}", order_search_id=f"2401011200-000{i}", email="bob@example.com", file_name="document.pdf",
+            file_id="file", pages=3, color_mode="bw", sides="single", paper_size="A4", orientation="portrait",
+            amount=0.6, status="pending",
+        )
+        for i in range(count)
+    ]
+    db.add_all(orders)
+    db.commit()
+    return orders
+
+
+def _statuses(db):
+    db.expire_all()
+    return {order.id: order.status for order in db.query(Order).order_by(Order.id)}
+
+
+def test_reconciliation_marks_orders_with_missed_webhooks_paid(fake_stripe, db):
+    _pending_orders(db, 4)
+    now = int(time.time())
+    fake_stripe.add_session("cs_paid", now - 2 * 3600, "order-0")
+    fake_stripe.add_session("cs_unpaid", now - 3600, "order-1", payment_status="unpaid")
+    fake_stripe.add_session("cs_open", now - 600, "order-2", status="open", payment_status="unpaid")
+    # older than the first run's lookback
+    fake_stripe.add_session("cs_ancient", now - (settings.PAYMENT_RECONCILE_LOOKBACK_HOURS + 1) * 3600, "order-3")
+
+    dry = _run(lambda service: payment_reconciliation_service.reconcile(db, service, dry_run=True))
+    assert dry["updated"] == ["2401011200-0000"]
+    assert set(_statuses(db).values()) == {"pending"}
+    assert db.get(SyncCheckpoint, CHECKPOINT_NAME) is None
+
+    result = _run(lambda service: payment_reconciliation_service.reconcile(db, service))
+    assert result["updated"] == ["2401011200-0000"]
+    assert _statuses(db) == {"order-0": "processing", "order-1": "pending", "order-2": "pending", "order-3": "pending"}
+
+
+def test_reconciliation_catches_sessions_completed_after_the_previous_run(fake_stripe, db):
+    _pending_orders(db, 2)
+    now = int(time.time())
+    fake_stripe.add_session("cs_first", now - 3600, "order-0")
+    _run(lambda service: payment_reconciliation_service.reconcile(db, service))
+    # the checkpoint lags by Stripe's maximum session lifetime, not the configured expiry
+    assert now - db.get(SyncCheckpoint, CHECKPOINT_NAME).position >= 24 * 3600
+
+    # created hours before that run, but only completed (and its webhook lost) afterwards
+    fake_stripe.add_session("cs_late", now - 5 * 3600, "order-1")
+    result = _run(lambda service: payment_reconciliation_service.reconcile(db, service))
+    assert result["updated"] == ["2401011200-0001"]
+    assert _statuses(db) == {"order-0": "processing", "order-1": "processing"}
+
+
+def _completed_event(event_id: str, order_id: str) -> str:
+    session = {"id": f"cs_{event_id}", "object": "checkout.session", "payment_status": "paid", "metadata": {"order_id": order_id}}
+    return json.dumps({"id": event_id, "object": "event", "type": "checkout.session.completed", "data": {"object": session}})
+
+
+def _webhook(client, payload: str):
+    timestamp = int(time.time())
+    signature = hmac.new(settings.STRIPE_WEBHOOK_SECRET.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return client.post("/api/stripe/webhook", content=payload, headers={"Stripe-Signature": f"t={timestamp},v1={signature}"})
+
+
+def _events(db) -> dict:
+    db.expire_all()
+    return {event.id: event for event in db.query(StripeEvent)}
+
+
+def _due_now(db, event_id: str) -> None:
+    db.query(StripeEvent).filter(StripeEvent.id == event_id).update({"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+    db.commit()
+
+
+def test_webhook_events_are_stored_once_and_applied_once(fake_stripe, client, db):
+    _pending_orders(db, 1)
+    payload = _completed_event("evt_paid", "order-0")
+    assert _webhook(client, payload).status_code == 200
+    # a redelivery is acknowledged but not stored again
+    assert _webhook(client, payload).status_code == 200
+    assert list(_events(db)) == ["evt_paid"]
+    assert _statuses(db) == {"order-0": "pending"}
+
+    consumer = StripeEventConsumer()
+    assert consumer.process_batch(db) == 1
+    assert consumer.process_batch(db) == 0
+    # a second event for the same payment, e.g. async_payment_succeeded after completed
+    assert consumer.record(db, "evt_paid_again", "checkout.session.completed", _completed_event("evt_paid_again", "order-0"))
+    assert consumer.process_batch(db) == 1
+
+    assert {event.id: event.status for event in _events(db).values()} == {"evt_paid": "processed", "evt_paid_again": "processed"}
+    assert _statuses(db) == {"order-0": "processing"}
+    assert [row.paid_orders for row in db.query(OrderDailyRollup)] == [1]
+    assert fake_stripe.requests == []
+
+
+def test_failing_events_back_off_then_go_to_the_dead_letter(db):
+    _pending_orders(db, 1)
+    consumer = StripeEventConsumer(max_attempts=3, retry_base_seconds=30)
+    consumer.record(db, "evt_good", "checkout.session.completed", _completed_event("evt_good", "order-0"))
+    consumer.record(db, "evt_missing", "checkout.session.completed", _completed_event("evt_missing", "no-such-order"))
+    consumer.record(db, "evt_other", "customer.created", json.dumps({"data": {"object": {}}}))
+
+    before = datetime.now(timezone.utc)
+    assert consumer.process_batch(db) == 3
+    events = _events(db)
+    assert (events["evt_good"].status, events["evt_other"].status) == ("processed", "ignored")
+    failed = events["evt_missing"]
+    assert (failed.status, failed.attempts) == ("pending", 1)
+    assert "no-such-order" in failed.last_error
+    # SQLite hands back naive datetimes
+    assert failed.next_attempt_at.replace(tzinfo=timezone.utc) - before >= timedelta(seconds=30)
+
+    # not due yet
+    assert consumer.process_batch(db) == 0
+    _due_now(db, "evt_missing")
+    assert consumer.process_batch(db) == 1
+    failed = _events(db)["evt_missing"]
+    assert (failed.status, failed.attempts) == ("pending", 2)
+    assert failed.next_attempt_at.replace(tzinfo=timezone.utc) - before >= timedelta(seconds=60)
+
+    _due_now(db, "evt_missing")
+    consumer.process_batch(db)
+    assert (_events(db)["evt_missing"].status, _events(db)["evt_missing"].attempts) == ("dead", 3)
+    _due_now(db, "evt_missing")
+    assert consumer.process_batch(db) == 0
+
+    # once the order exists, a requeued event goes through
+    db.add(Order(
+        id="no-such-order", order_search_id="2401011200-0009", email="bob@example.com", file_name="document.pdf",
+        file_id="file", pages=3, color_mode="bw", sides="single", paper_size="A4", orientation="portrait",
+        amount=0.6, status="pending",
+    ))
+    db.commit()
+    assert consumer.requeue_dead(db) == 1
+    assert consumer.process_batch(db) == 1
+    assert _events(db)["evt_missing"].status == "processed"
+    assert _statuses(db)["no-such-order"] == "processing"
+
+
+def test_a_failing_event_only_rolls_back_its_own_changes(db, monkeypatch):
+    _pending_orders(db, 2)
+    consumer = StripeEventConsumer()
+    consumer.record(db, "evt_0", "checkout.session.completed", _completed_event("evt_0", "order-0"))
+    consumer.record(db, "evt_1", "checkout.session.completed", _completed_event("evt_1", "order-1"))
+    record_status_change = rollup_service.record_status_change
+
+    def fail_for_order_1(db, order, previous_status):
+        record_status_change(db, order, previous_status)
+        if order.id == "order-1":
+            raise RuntimeError("rollup failed")
+
+    monkeypatch.setattr(rollup_service, "record_status_change", fail_for_order_1)
+    assert consumer.process_batch(db) == 2
+
+    # order-1's status change and rollup increment were undone by its savepoint, order-0's were committed
+    assert _statuses(db) == {"order-0": "processing", "order-1": "pending"}
+    assert [row.paid_orders for row in db.query(OrderDailyRollup)] == [1]
+    events = _events(db)
+    assert (events["evt_0"].status, events["evt_1"].status, events["evt_1"].attempts) == ("processed", "pending", 1)
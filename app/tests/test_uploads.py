@@ -0,0 +1,95 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+from fastapi import UploadFile
+
+import app.services.file_processor as file_processor_module
+from app.core.config import settings
+from app.core.shutdown import shutdown_coordinator
+from app.services.file_processor import PAGES_SUFFIX, PARTIAL_SUFFIX, FileProcessor
+
+
+class BrokenStream(io.BytesIO):
+    # the client goes away after the first chunk
+    def read(self, size=-1):
+        if self.tell() > 0:
+            raise ConnectionResetError("client disconnected")
+        return super().read(size)
+
+
+def _upload(stream, filename: str = "document.pdf") -> UploadFile:
+    return UploadFile(file=stream, filename=filename)
+
+
+def test_interrupted_upload_leaves_no_file_behind(tmp_path):
+    upload = _upload(BrokenStream(b"%PDF-" + b"x" * (3 * 1024 * 1024)))
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(FileProcessor().save_file(upload, str(tmp_path)))
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_is_written_under_a_partial_name_then_renamed(tmp_path, monkeypatch):
+    content = b"%PDF-" + os.urandom(2 * 1024 * 1024)
+    renamed = []
+
+    def replace(source, target):
+        # at the moment of the rename the complete content sits under the .part name
+        with open(source, "rb") as partial:
+            renamed.append((source, target, partial.read() == content, os.path.exists(target)))
+        os.rename(source, target)
+
+    monkeypatch.setattr(file_processor_module.os, "replace", replace)
+    file_id, file_path = asyncio.run(FileProcessor().save_file(_upload(io.BytesIO(content)), str(tmp_path)))
+
+    assert renamed == [(file_path + PARTIAL_SUFFIX, file_path, True, False)]
+    assert os.listdir(tmp_path) == [f"{file_id}.pdf"]
+    with open(file_path, "rb") as saved:
+        assert saved.read() == content
+
+
+def test_only_stale_partials_are_removed(tmp_path):
+    old = time.time() - 7200
+    for name in ("stale.pdf.part", "fresh.pdf.part", "done.pdf"):
+        (tmp_path / name).write_bytes(b"data")
+    os.utime(tmp_path / "stale.pdf.part", (old, old))
+    os.utime(tmp_path / "done.pdf", (old, old))
+
+    assert FileProcessor().remove_stale_partials(str(tmp_path), max_age_seconds=3600) == 1
+    assert sorted(os.listdir(tmp_path)) == ["done.pdf", "fresh.pdf.part"]
+    assert FileProcessor().remove_stale_partials(str(tmp_path / "missing"), max_age_seconds=3600) == 0
+
+
+def test_uploads_are_refused_while_draining(client, monkeypatch):
+    monkeypatch.setattr(shutdown_coordinator, "draining", True)
+    response = client.post("/api/files/upload", files={"file": ("document.pdf", b"%PDF-1.4", "application/pdf")})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert response.headers["Connection"] == "close"
+    # everything else is still served until the worker exits
+    assert client.get("/health/live").status_code == 200
+
+
+def test_page_count_is_stored_at_upload_and_not_parsed_again(client, monkeypatch, tmp_path):
+    from PyPDF2 import PdfWriter
+
+    monkeypatch.setattr(settings, "UPLOAD_FOLDER", str(tmp_path))
+    writer = PdfWriter()
+    for _ in range(2):
+        writer.add_blank_page(width=595, height=842)
+    document = io.BytesIO()
+    writer.write(document)
+
+    response = client.post("/api/files/upload", files={"file": ("document.pdf", document.getvalue(), "application/pdf")})
+    assert response.status_code == 200
+    file_id = str(response.json()["fileId"])
+    assert (tmp_path / f"{file_id}{PAGES_SUFFIX}").read_text() == "2"
+    assert client.get(f"/api/files/{file_id}{PAGES_SUFFIX}").status_code == 404
+
+    def parse(*args):
+        raise AssertionError("stored upload parsed again")
+
+    monkeypatch.setattr(FileProcessor, "_parse_pages", parse)
+    assert asyncio.run(FileProcessor().count_saved_file_pages(file_id, str(tmp_path))) == 2
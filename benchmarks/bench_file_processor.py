@@ -0,0 +1,105 @@
+"""Microbenchmarks for FileProcessor: time and peak Python memory per document.
+
+Runs process_file, _count_pages and _estimate_word_pages over the
+generated corpus and writes benchmarks/results/file_processor-<commit>.json:
+
+    python -m benchmarks.bench_file_processor --repeat 5
+    python -m benchmarks.bench_file_processor --only pdf --max-pages 100
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Awaitable, Callable, Dict
+
+from starlette.datastructures import Headers, UploadFile
+
+from benchmarks.corpus import DEFAULT_DIR, generate
+from benchmarks.results import write_results
+
+MIME_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "doc": "application/msword",
+}
+
+
+def _upload(path: Path, content: bytes) -> UploadFile:
+    kind = path.suffix.lstrip(".")
+    return UploadFile(
+        file=io.BytesIO(content), size=len(content), filename=path.name,
+        headers=Headers({"content-type": MIME_TYPES[kind]}),
+    )
+
+
+async def _measure(func: Callable[[], Awaitable[int]], repeat: int) -> Dict[str, float]:
+    pages = await func()  # warm-up, also the reported page count
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - start)
+    # separate run for memory, tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    await func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "pages": pages,
+        "median_ms": statistics.median(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+async def run(corpus_dir: Path, repeat: int, only: str, max_pages: int) -> Dict[str, Dict[str, float]]:
+    from app.services.file_processor import FileProcessor
+
+    processor = FileProcessor()
+    results: Dict[str, Dict[str, float]] = {}
+    for name, path in generate(corpus_dir).items():
+        kind = path.suffix.lstrip(".")
+        if (only and kind != only) or int(path.name.split("-")[0]) > max_pages:
+            continue
+        content = path.read_bytes()
+        mime_type = MIME_TYPES[kind]
+
+        async def process_file() -> int:
+            return (await processor.process_file(_upload(path, content)))["pages"]
+
+        async def count_pages() -> int:
+            return await processor._count_pages(_upload(path, content), mime_type)
+
+        cases = {"process_file": process_file, "_count_pages": count_pages}
+        if kind != "pdf":
+            async def estimate_word_pages() -> int:
+                return await processor._estimate_word_pages(content, mime_type)
+            cases["_estimate_word_pages"] = estimate_word_pages
+
+        for case, func in cases.items():
+            results[f"{case}[{name}]"] = await _measure(func, repeat)
+            row = results[f"{case}[{name}]"]
+            print(f"  {case:<21} {name:<20} {row['pages']:6.0f} pages {row['median_ms']:10.2f} ms {row['peak_kb']:10.0f} KB")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", choices=sorted(MIME_TYPES), default="")
+    parser.add_argument("--max-pages", type=int, default=1000)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.corpus, args.repeat, args.only, args.max_pages))
+    path = write_results(
+        "file_processor", results, {"repeat": args.repeat, "only": args.only, "max_pages": args.max_pages}
+    )
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""In-process ASGI load test of the upload, create-order, tracking and admin-list endpoints.
+
+Requests go through the full middleware stack via httpx.ASGITransport
+(no sockets), against a throwaway SQLite database unless --database-url
+points at an already migrated one. Rate limiting is switched off.
+Results go to benchmarks/results/http-<commit>.json:
+
+    python -m benchmarks.bench_http --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="printer-bench-"))
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{WORK_DIR / 'bench.db'}")
+os.environ.setdefault("UPLOAD_FOLDER", str(WORK_DIR / "uploads"))
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+for name in ("APP_NAME", "FRONTEND_URL", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB", "POSTGRES_HOST",
+             "POSTGRES_URL", "STRIPE_SECRET_KEY", "STRIPE_WEBHOOK_SECRET"):
+    os.environ.setdefault(name, "bench")
+
+import httpx  # noqa: E402
+
+from benchmarks.corpus import DEFAULT_DIR, generate  # noqa: E402
+from benchmarks.results import write_results  # noqa: E402
+
+ORDER = {
+    "file_name": "document.pdf", "file_id": "bench", "pages": 10, "color_mode": "bw", "sides": "double",
+    "paper_size": "A4", "orientation": "portrait", "pages_per_side": 1, "copies": 1, "amount": 2.0,
+    "delivery_method": "pickup", "email": "bench@example.com", "name": "Bench", "phone": "0412 345 678",
+}
+
+
+def _seed(orders: int) -> Dict[str, Any]:
+    from datetime import datetime, timedelta, timezone
+
+    from app.core.security import create_access_token, get_password_hash
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.order import Order
+    from app.models.user import User
+
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        suffix = uuid.uuid4().hex[:8]
+        users = {
+            role: User(username=f"bench-{role}-{suffix}", email=f"{role}-{suffix}@example.com",
+                       hashed_password=get_password_hash("bench-password"), role=role)
+            for role in ("admin", "user")
+        }
+        db.add_all(users.values())
+        db.flush()
+        now = datetime.now(timezone.utc)
+        search_ids = []
+        for i in range(orders):
+            created_at = now - timedelta(minutes=i)
+            search_id = f"{created_at:%y%m%d%H%M}-{i % 10000:04d}"
+            search_ids.append(search_id)
+            db.add(Order(id=str(uuid.uuid4()), order_search_id=search_id, user_id=users["user"].id,
+                         username=users["user"].username, status="processing", created_at=created_at, **ORDER))
+        db.commit()
+        return {
+            "admin": {"Authorization": "Bearer " + create_access_token({"sub": users["admin"].username}, role="admin")},
+            "user": {"Authorization": "Bearer " + create_access_token({"sub": users["user"].username}, role="user")},
+            "search_ids": search_ids,
+        }
+
+
+async def _load(request: Callable[[int], Awaitable[httpx.Response]], total: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await request(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests_per_second": total / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "errors": errors,
+    }
+
+
+async def run(total: int, concurrency: int, orders: int, upload_pages: int) -> Dict[str, Dict[str, float]]:
+    from app.main import app
+
+    seed = _seed(orders)
+    upload = generate(DEFAULT_DIR)[f"{upload_pages:04d}-pages.pdf"].read_bytes()
+    search_ids = seed["search_ids"]
+
+    scenarios: Dict[str, Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]] = {
+        "upload": lambda client, i: client.post(
+            "/api/files/upload", files={"file": ("document.pdf", upload, "application/pdf")}, headers=seed["user"]
+        ),
+        "create_order": lambda client, i: client.post("/api/orders", json=order, headers=seed["user"]),
+        "tracking": lambda client, i: client.get(f"/api/orders/search/{search_ids[i % len(search_ids)]}"),
+        "admin_list": lambda client, i: client.get(f"/api/orders?page={i % 10 + 1}&size=50", headers=seed["admin"]),
+    }
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # orders are checked against a stored upload and its quote
+            uploaded = (await scenarios["upload"](client, 0)).json()
+            quote = await client.post("/api/pricing/quote", json={
+                "file_id": uploaded["fileId"],
+                "configurations": [{key: ORDER[key] for key in ("color_mode", "sides", "paper_size", "pages_per_side", "copies", "delivery_method")}],
+            })
+            order = {**ORDER, "file_id": uploaded["fileId"], "pages": uploaded["pages"], "amount": quote.json()["quotes"][0]["amount"]}
+            for name, scenario in scenarios.items():
+                await scenario(client, 0)  # warm-up
+                results[name] = await _load(lambda i: scenario(client, i), total, concurrency)
+                row = results[name]
+                print(
+                    f"  {name:<14} {row['requests_per_second']:8.1f} req/s  p50 {row['p50_ms']:7.2f} ms  "
+                    f"p95 {row['p95_ms']:7.2f} ms  p99 {row['p99_ms']:7.2f} ms  errors {row['errors']:.0f}"
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--orders", type=int, default=2000, help="orders seeded before the run")
+    parser.add_argument("--upload-pages", type=int, default=10, choices=(1, 10, 100, 1000))
+    parser.add_argument("--database-url", default=None, help="already migrated database to run against")
+    args = parser.parse_args()
+    if args.database_url:
+        os.environ["SQLALCHEMY_DATABASE_URI"] = args.database_url
+
+    results = asyncio.run(run(args.requests, args.concurrency, args.orders, args.upload_pages))
+    params = {key: value for key, value in vars(args).items() if key != "database_url"}
+    params["database"] = os.environ["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0]
+    print(f"results written to {write_results('http', results, params)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compare the model-validation and column-only serialization paths for order lists.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_order_serialization --rows 100 --repeat 200
+"""
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytz
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base_class import Base
+from app.models.order import Order
+from app.models.user import User  # noqa: F401  (orders.user_id foreign key target)
+from app.schemas.order_schema import OrderListResponse, OrderResponse, order_rows_to_dicts, target_timezone
+
+ORDER_RESPONSE_COLUMNS = [getattr(Order, name) for name in OrderResponse.model_fields]
+pytz_timezone = pytz.timezone('Australia/Sydney')
+
+
+def _seed(session, rows: int) -> None:
+    now = datetime.now(timezone.utc)
+    for i in range(rows):
+        session.add(Order(
+            id=str(uuid.uuid4()),
+            order_search_id=f"2601010000-{i:04d}",
+            email=f"user{i}@example.com",
+            name=f"User {i}",
+            phone="0412345678",
+            file_name=f"document-{i}.pdf",
+            file_id=str(uuid.uuid4()),
+            pages=i % 50 + 1,
+            color_mode="color" if i % 3 else "bw",
+            sides="double",
+            paper_size="A4",
+            orientation="portrait",
+            amount=1.5 + i,
+            status="processing",
+            delivery_method="pickup",
+            notes="leave at reception" * 3,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+            completed_at=now,
+        ))
+    session.commit()
+
+
+def model_path(session, rows: int) -> bytes:
+    orders = session.query(Order).limit(rows).all()
+    page = OrderListResponse.model_validate(
+        {"orders": orders, "total": rows, "page": 1, "size": rows, "total_pages": 1}
+    )
+    return json.dumps(page.model_dump(mode="json")).encode()
+
+
+def fast_path(session, rows: int) -> bytes:
+    orders = session.query(*ORDER_RESPONSE_COLUMNS).limit(rows).all()
+    return orjson.dumps(
+        {"orders": order_rows_to_dicts(orders), "total": rows, "page": 1, "size": rows, "total_pages": 1}
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    _seed(session, args.rows)
+
+    value = datetime.now(timezone.utc)
+    results = {
+        "pytz astimezone": timeit.timeit(lambda: value.astimezone(pytz_timezone), number=args.repeat * args.rows * 3),
+        "zoneinfo astimezone": timeit.timeit(lambda: value.astimezone(target_timezone), number=args.repeat * args.rows * 3),
+    }
+    for name, func in (("model validation path", model_path), ("column-only orjson path", fast_path)):
+        # expire between runs so the ORM path pays for loading instances each time
+        results[name] = timeit.timeit(lambda: (session.expire_all(), func(session, args.rows)), number=args.repeat)
+
+    print(f"{args.rows} rows x {args.repeat} iterations")
+    for name, seconds in results.items():
+        print(f"  {name:<26} {seconds / args.repeat * 1000:8.3f} ms/iter")
+    print(f"  speed-up: {results['model validation path'] / results['column-only orjson path']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Generate the deterministic document corpus used by the benchmarks.
+
+PDFs get real text content streams, DOCX files get paragraphs and tables
+sized to the page estimator, and DOC files are OLE2-headed stand-ins
+(legacy .doc pages are estimated from file size only). DOC stops at 100
+pages because a 1000-page estimate needs ~75 MB, over the upload limit.
+
+    python -m benchmarks.corpus --out benchmarks/.corpus
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import Dict, List
+
+PAGE_COUNTS = (1, 10, 100, 1000)
+DOC_PAGE_COUNTS = (1, 10, 100)
+DEFAULT_DIR = Path(__file__).parent / ".corpus"
+OLE2_MAGIC = bytes.fromhex("D0CF11E0A1B11AE1")
+WORDS = (
+    "print order paper colour double single page copies delivery pickup mailbox building "
+    "invoice receipt campus library student report draft final thesis chapter figure table"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def write_pdf(path: Path, pages: int, seed: int = 0) -> None:
+    # hand-written PDF so every page has a text content stream, like a real exported document
+    rng = random.Random(seed)
+    objects: List[bytes] = [b"", b""]  # 1: catalog, 2: pages tree, filled in below
+    font_id = 3
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for _ in range(pages):
+        lines = [f"BT /F1 11 Tf 72 {770 - 14 * i} Td ({_sentence(rng, 12)}) Tj ET" for i in range(48)]
+        stream = "\n".join(lines).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (content_id, font_id)
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), pages
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def write_docx(path: Path, pages: int, seed: int = 0) -> None:
+    from docx import Document
+
+    rng = random.Random(seed)
+    document = Document()
+    # ~54 estimated lines per page: 8 paragraphs of 78 words (6 lines + 0.5 spacing each) = 52 lines
+    for page in range(pages):
+        for _ in range(8):
+            document.add_paragraph(_sentence(rng, 78))
+        if page % 10 == 9:
+            table = document.add_table(rows=5, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = rng.choice(WORDS)
+    document.save(path)
+
+
+def write_doc(path: Path, pages: int, seed: int = 0) -> None:
+    # inverse of FileProcessor._count_pages' size-based .doc estimate (75 KB per page)
+    size = pages * 75 * 1024 + 512
+    rng = random.Random(seed)
+    path.write_bytes(OLE2_MAGIC + rng.randbytes(size - len(OLE2_MAGIC)))
+
+
+def generate(out_dir: Path = DEFAULT_DIR) -> Dict[str, Path]:
+    # reuses files that already exist, so repeated runs are cheap
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files: Dict[str, Path] = {}
+    for kind, writer, counts in (
+        ("pdf", write_pdf, PAGE_COUNTS),
+        ("docx", write_docx, PAGE_COUNTS),
+        ("doc", write_doc, DOC_PAGE_COUNTS),
+    ):
+        for pages in counts:
+            path = out_dir / f"{pages:04d}-pages.{kind}"
+            if not path.exists():
+                writer(path, pages, seed=pages)
+            files[path.stem + "." + kind] = path
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, default=DEFAULT_DIR)
+    args = parser.parse_args()
+    for name, path in generate(args.out).items():
+        print(f"{name:<20} {path.stat().st_size / 1024:10.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Store benchmark results as JSON and compare two runs.
+
+Every benchmark writes benchmarks/results/<name>-<commit>.json; compare
+a baseline with a later run (lower is better for every metric):
+
+    python -m benchmarks.results benchmarks/results/file_processor-3a7371e.json \\
+        benchmarks/results/file_processor-0748ed7.json --threshold 10
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(name: str, results: Dict[str, Dict[str, float]], params: Dict[str, Any]) -> Path:
+    # results: case name -> metric name -> value
+    commit = git_commit()
+    payload = {
+        "benchmark": name,
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR / f"{name}-{commit}.json"
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True))
+    return path
+
+
+def _metrics(payload: Dict[str, Any]) -> Iterator[Tuple[str, str, float]]:
+    for case, metrics in payload["results"].items():
+        for metric, value in metrics.items():
+            if isinstance(value, (int, float)):
+                yield case, metric, value
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> int:
+    # prints every shared metric and returns how many got worse by more than threshold percent
+    current_metrics = {(case, metric): value for case, metric, value in _metrics(current)}
+    regressions = 0
+    print(f"{baseline['commit']} -> {current['commit']} ({baseline['benchmark']})")
+    for case, metric, before in _metrics(baseline):
+        after = current_metrics.get((case, metric))
+        if after is None or not before:
+            continue
+        change = (after - before) / before * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {case:<32} {metric:<18} {before:12.4f} {after:12.4f} {change:+8.1f}%{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slower/larger that counts as a regression")
+    args = parser.parse_args()
+    regressions = compare(json.loads(args.baseline.read_text()), json.loads(args.current.read_text()), args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
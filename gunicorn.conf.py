@@ -0,0 +1,51 @@
+"""Production server: gunicorn managing uvicorn workers (uvloop + httptools).
+
+    gunicorn -c gunicorn.conf.py
+
+The app is imported once in the master (preload_app) and forked into the
+workers, which share its memory copy-on-write. Anything that must not
+cross a fork (database connections, the logging thread) is reset in
+post_fork. Tuning comes from the SERVER_* settings in app/core/config.py.
+"""
+import multiprocessing
+import os
+import shutil
+
+from app.core.config import settings
+
+# must be set before prometheus_client is imported by the app, so every worker writes its own metric files
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.SERVER_METRICS_DIR)
+
+wsgi_app = "app.main:app"
+worker_class = "app.core.workers.ProductionUvicornWorker"
+bind = settings.SERVER_BIND
+workers = settings.SERVER_WORKERS or multiprocessing.cpu_count()
+preload_app = True
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+timeout = settings.SERVER_TIMEOUT_SECONDS
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+keepalive = settings.SERVER_KEEPALIVE_SECONDS
+
+
+def on_starting(server):
+    # metric files left over from a previous run would be summed into the new one
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    from app.core.logging_config import reinit_logging_after_fork
+    from app.db.session import engine, replica_engines
+
+    reinit_logging_after_fork()
+    # pooled connections opened in the master belong to it; the worker opens its own
+    for db_engine in (engine, *replica_engines):
+        db_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)